@@ -0,0 +1,11 @@
+# Performans ölçüm betikleri. Her betik geçici bir SQLite veritabanı üzerinde çalışır:
+#   python -m benchmarks.generator --scale medium      # sentetik veri üretimi
+#   python -m benchmarks.routes --output sonuc.json    # rota bazlı gecikme/SQL/bellek ölçümü
+#   python -m benchmarks.quiz_attempts                 # quiz sonuçları yükleme karşılaştırması
+#   python -m benchmarks.quiz_import --questions 10000 # toplu quiz içe aktarma karşılaştırması
+#   python -m benchmarks.login_storm                   # eşzamanlı giriş / şifre doğrulama yükü
+#   python -m benchmarks.startup                       # modül import ve ilk istek süresi
+#   python -m benchmarks.pool_exhaustion               # bağlantı havuzu tükenmesi altında bekleme
+#   python -m benchmarks.search --comments 100000       # tam metin arama ve dizin yeniden kurma
+#   python -m benchmarks.user_import --users 10000      # CSV ile toplu kullanıcı ekleme
+#   python -m benchmarks.account_sweep --users 100000   # süresi dolan hesap taraması ve toplu uzatma
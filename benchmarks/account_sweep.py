@@ -0,0 +1,81 @@
+# Hesap durumu: süresi dolan hesapların tek UPDATE ile taranması ve bir dönemin toplu uzatılması;
+# karşılaştırma için admin panelindeki gibi kullanıcı başına ORM güncellemesi.
+#   python -m benchmarks.account_sweep --users 100000
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+
+from benchmarks.common import setup_app
+
+
+def seed(m, count, rng):
+    now = datetime.utcnow()
+    for start in range(0, count, 10000):
+        m.db.session.execute(insert(m.User), [
+            dict(username=f'{2025 + i % 2}-ogrenci{i:06d}', password='x', is_admin=False,
+                 expire_date=now + timedelta(days=rng.randint(-200, 200)) if rng.random() < 0.9 else None)
+            for i in range(start, min(start + 10000, count))
+        ])
+    m.db.session.commit()
+
+
+def per_user_extend(m, prefix, days, limit):
+    now = datetime.utcnow()
+    users = m.User.query.filter(m.User.username.startswith(prefix), m.User.expire_date.isnot(None)).limit(limit).all()
+    for user in users:
+        user.expire_date = max(user.expire_date, now) + timedelta(days=days)
+        user.is_expired = False
+        m.db.session.commit()
+    return len(users)
+
+
+def timed_ms(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hesap taraması ve toplu erişim uzatma benchmarkı.')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--per-user-sample', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    m = setup_app()
+    with m.app.app_context():
+        seed(m, args.users, random.Random(args.seed))
+        print(f"{args.users} kullanıcı")
+
+        def sweep():
+            result = m.sweep_expired_users()
+            m.db.session.commit()
+            return result
+
+        elapsed, (expired, _) = timed_ms(sweep)
+        print(f"{'ilk tarama':>28}: {elapsed:9.1f} ms  {expired} hesap işaretlendi")
+        elapsed, (expired, _) = timed_ms(sweep)
+        print(f"{'tekrar tarama (değişiklik yok)':>28}: {elapsed:9.1f} ms  {expired} hesap işaretlendi")
+        elapsed, active = timed_ms(lambda: m.dashboard_stats.compute().active_users)
+        print(f"{'admin istatistikleri':>28}: {elapsed:9.1f} ms  {active} aktif")
+
+        cohort = m.db.session.query(func.count(m.User.id)).filter(m.User.username.startswith('2026-'),
+                                                                  m.User.expire_date.isnot(None)).scalar()
+
+        def bulk_extend():
+            count = m.extend_user_access(m.user_access_conditions(username_prefix='2026-'), 30)
+            m.db.session.commit()
+            return count
+
+        elapsed, count = timed_ms(bulk_extend)
+        print(f"{'toplu uzatma (tek UPDATE)':>28}: {elapsed:9.1f} ms  {count} hesap")
+        sample_ms, sample = timed_ms(lambda: per_user_extend(m, '2026-', 30, args.per_user_sample))
+        print(f"{'kullanıcı başına ORM':>28}: {sample_ms:9.1f} ms  {sample} hesap -> {cohort} hesap için "
+              f"~{sample_ms / sample * cohort:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
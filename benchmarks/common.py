@@ -0,0 +1,39 @@
+# Benchmark betiklerinin ortak kurulumu: uygulamayı geçici bir veritabanıyla içe aktarır.
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_app(database_url=None):
+    """dersplanlama modülünü geçici bir SQLite veritabanıyla yükler ve şemayı sıfırdan kurar."""
+    work_dir = tempfile.mkdtemp(prefix='dersplanlama_bench_')
+    if database_url is None:
+        database_url = 'sqlite:///' + os.path.join(work_dir, 'bench.db')
+    os.environ['DATABASE_URL'] = database_url
+    os.chdir(work_dir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    import dersplanlama
+    # Göreli 'uploads' yolu send_from_directory'de uygulama köküne göre çözülür; mutlak yol veriyoruz
+    upload_folder = os.path.join(work_dir, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    dersplanlama.app.config['UPLOAD_FOLDER'] = upload_folder
+    with dersplanlama.app.app_context():
+        dersplanlama.db.drop_all()
+        dersplanlama.db.create_all()
+    return dersplanlama
+
+
+def timed(func, repeat=5):
+    """func'ı repeat kez çalıştırır, en iyi süreyi milisaniye olarak döner."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
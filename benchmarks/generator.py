@@ -0,0 +1,172 @@
+# Gerçek modelleri kullanarak tohumlanmış (seeded), ölçeklenebilir sentetik veri üretir.
+#   python -m benchmarks.generator --scale medium
+import argparse
+import io
+import json
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+from werkzeug.security import generate_password_hash
+
+BENCH_PASSWORD = 'bench-sifre'
+
+SCALES = {
+    'small': dict(users=50, dersler=3, konu_per_ders=5, alt_baslik_per_konu=5, quiz_ratio=0.5,
+                  questions_per_quiz=5, answers_per_question=4, progress_per_user=20,
+                  comments_per_alt_baslik=5, attempts_per_user=5, materials_per_alt_baslik=1),
+    'medium': dict(users=500, dersler=8, konu_per_ders=10, alt_baslik_per_konu=8, quiz_ratio=0.6,
+                   questions_per_quiz=10, answers_per_question=4, progress_per_user=80,
+                   comments_per_alt_baslik=20, attempts_per_user=20, materials_per_alt_baslik=2),
+    'large': dict(users=3000, dersler=15, konu_per_ders=20, alt_baslik_per_konu=10, quiz_ratio=0.7,
+                  questions_per_quiz=15, answers_per_question=5, progress_per_user=200,
+                  comments_per_alt_baslik=50, attempts_per_user=60, materials_per_alt_baslik=2),
+}
+
+
+def _insert_many(db, model, rows):
+    """Satırları toplu ekler ve oluşan id'leri parametre sırasıyla döner."""
+    if not rows:
+        return []
+    result = db.session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return [row[0] for row in result]
+
+
+def generate_dataset(m, seed=42, upload_folder=None, **scale):
+    """m (dersplanlama modülü) üzerinden veriyi üretir; oluşan id'lerin özetini döner.
+
+    upload_folder verilirse materyal içerikleri uygulamanın blob deposuna (UPLOAD_FOLDER) yazılır.
+    """
+    params = dict(SCALES['small'])
+    params.update(scale)
+    rng = random.Random(seed)
+    db = m.db
+    now = datetime.utcnow()
+
+    # Hash maliyeti ölçümü bozmasın diye tüm kullanıcılar aynı hash'i paylaşır
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    admin_id = _insert_many(db, m.User, [dict(username='admin', password=password_hash, is_admin=True)])[0]
+    user_ids = _insert_many(db, m.User, [
+        dict(username=f'ogrenci{i:05d}', password=password_hash, is_admin=False,
+             expire_date=now + timedelta(days=rng.randint(-30, 365)) if rng.random() < 0.8 else None)
+        for i in range(params['users'])
+    ])
+
+    ders_ids = _insert_many(db, m.Ders, [dict(name=f'Ders {i:03d}') for i in range(params['dersler'])])
+    konu_rows = [dict(name=f'Konu {d}-{k}', ders_id=ders_id)
+                 for d, ders_id in enumerate(ders_ids) for k in range(params['konu_per_ders'])]
+    konu_ids = _insert_many(db, m.Konu, konu_rows)
+    alt_baslik_rows = [dict(name=f'Alt Başlık {konu_id}-{a}', konu_id=konu_id,
+                            video_link='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+                       for konu_id in konu_ids for a in range(params['alt_baslik_per_konu'])]
+    alt_baslik_ids = _insert_many(db, m.AltBaslik, alt_baslik_rows)
+
+    quiz_alt_basliklar = [ab_id for ab_id in alt_baslik_ids if rng.random() < params['quiz_ratio']]
+    quiz_ids = _insert_many(db, m.Quiz, [dict(title=f'Quiz {ab_id}', alt_baslik_id=ab_id, quiz_type='normal')
+                                         for ab_id in quiz_alt_basliklar])
+    question_rows = [dict(quiz_id=quiz_id, question_text=f'Soru {quiz_id}-{q}: ' + 'lorem ipsum ' * 6)
+                     for quiz_id in quiz_ids for q in range(params['questions_per_quiz'])]
+    question_ids = _insert_many(db, m.Question, question_rows)
+    answer_rows = [dict(question_id=question_id, answer_text=f'Cevap {a}', is_correct=(a == 0))
+                   for question_id in question_ids for a in range(params['answers_per_question'])]
+    answer_ids = _insert_many(db, m.Answer, answer_rows)
+
+    # Sorular ve cevaplar quiz sırasıyla eklendiği için id'ler bloklar halinde eşleşir
+    questions_by_quiz = {}
+    for question_id, row in zip(question_ids, question_rows):
+        questions_by_quiz.setdefault(row['quiz_id'], []).append(question_id)
+    answers_by_question = {}
+    for answer_id, row in zip(answer_ids, answer_rows):
+        answers_by_question.setdefault(row['question_id'], []).append((answer_id, row['answer_text'], row['is_correct']))
+
+    if upload_folder:
+        os.makedirs(upload_folder, exist_ok=True)
+    material_rows = []
+    # Aynı dosyanın birden çok alt başlığa yüklenmesini taklit etmek için sınırlı sayıda farklı içerik
+    digests = []
+    if upload_folder:
+        digests = [m.store_material_stream(io.BytesIO(rng.randbytes(64 * 1024)))[0] for _ in range(16)]
+    ref_counts = Counter()
+    for ab_id in alt_baslik_ids:
+        for i in range(params['materials_per_alt_baslik']):
+            digest = rng.choice(digests) if digests else None
+            material_rows.append(dict(alt_baslik_id=ab_id, filename=f'bench_{ab_id}_{i}.pdf',
+                                      original_filename=f'Notlar {i}.pdf', blob_digest=digest))
+            ref_counts[digest] += 1
+    material_ids = _insert_many(db, m.Material, material_rows)
+    # Toplu INSERT mapper olaylarını tetiklemediği için referans sayıları burada yazılır
+    for digest in digests:
+        db.session.execute(update(m.MaterialBlob).where(m.MaterialBlob.digest == digest)
+                           .values(ref_count=ref_counts[digest]))
+
+    progress_rows = []
+    for user_id in user_ids:
+        for ab_id in rng.sample(alt_baslik_ids, min(params['progress_per_user'], len(alt_baslik_ids))):
+            progress_rows.append(dict(user_id=user_id, alt_baslik_id=ab_id,
+                                      completed_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))))
+    _insert_many(db, m.UserProgress, progress_rows)
+
+    comment_rows = [dict(user_id=rng.choice(user_ids), alt_baslik_id=ab_id, content=f'Yorum {c}: ' + 'soru var ' * 5,
+                         created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)))
+                    for ab_id in alt_baslik_ids for c in range(params['comments_per_alt_baslik'])]
+    comment_ids = _insert_many(db, m.Comment, comment_rows)
+    # Yorumların yaklaşık üçte birine bir yanıt
+    reply_rows = [dict(user_id=rng.choice(user_ids), alt_baslik_id=row['alt_baslik_id'], content='Yanıt',
+                       parent_comment_id=comment_id, created_at=row['created_at'] + timedelta(minutes=5))
+                  for comment_id, row in zip(comment_ids, comment_rows) if rng.random() < 0.33]
+    _insert_many(db, m.Comment, reply_rows)
+
+    attempt_rows = []
+    for user_id in user_ids:
+        for quiz_id in rng.sample(quiz_ids, min(params['attempts_per_user'], len(quiz_ids))):
+            packed = b''
+            correct = 0
+            question_ids = questions_by_quiz.get(quiz_id, [])
+            for question_id in question_ids:
+                chosen = rng.choice(answers_by_question[question_id])
+                correct += chosen[2]
+                packed += m.ATTEMPT_ANSWER_PAIR.pack(question_id, chosen[0])
+            total = len(question_ids) or 1
+            attempt_rows.append(dict(user_id=user_id, quiz_id=quiz_id, score=int(correct / total * 100),
+                                     attempt_date=now - timedelta(days=rng.randint(0, 90)),
+                                     answers=packed))
+    _insert_many(db, m.UserQuizAttempt, attempt_rows)
+
+    db.session.commit()
+    m.rebuild_progress_summary_tables()
+    # Toplu eklemeler arama dizinini ve hesap durumu bayrağını güncellemez
+    m.reindex_search()
+    m.sweep_expired_users()
+    db.session.commit()
+    return {
+        'admin_id': admin_id, 'user_ids': user_ids, 'ders_ids': ders_ids, 'konu_ids': konu_ids,
+        'alt_baslik_ids': alt_baslik_ids, 'quiz_ids': quiz_ids, 'material_ids': material_ids,
+        'questions_by_quiz': questions_by_quiz,
+        'answers_by_question': {q: [a[0] for a in answers] for q, answers in answers_by_question.items()},
+        'material_filenames': [row['filename'] for row in material_rows],
+        'counts': {'users': len(user_ids) + 1, 'dersler': len(ders_ids), 'konular': len(konu_ids),
+                   'alt_basliklar': len(alt_baslik_ids), 'quizzes': len(quiz_ids), 'questions': len(question_ids),
+                   'answers': len(answer_ids), 'materials': len(material_rows), 'progress': len(progress_rows),
+                   'comments': len(comment_rows) + len(reply_rows), 'attempts': len(attempt_rows)},
+    }
+
+
+def main():
+    from benchmarks.common import setup_app
+
+    parser = argparse.ArgumentParser(description='Sentetik veri üretir ve sayıları yazdırır.')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    m = setup_app()
+    with m.app.app_context():
+        dataset = generate_dataset(m, seed=args.seed, **SCALES[args.scale])
+    print(json.dumps(dataset['counts'], indent=2))
+    print('Veritabanı:', os.environ['DATABASE_URL'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Sınav başı giriş fırtınası: aynı anda çok sayıda giriş yapılırken şifre doğrulamanın
+# istek thread'inde (eski yol) ve sınırlı süreç havuzunda yapılması karşılaştırılır.
+# Her turda ayrı bir thread hash gerektirmeyen giriş sayfasını ölçer.
+#   python -m benchmarks.login_storm --logins 60 --concurrency 30
+import argparse
+import threading
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import setup_app
+from benchmarks.generator import BENCH_PASSWORD
+from benchmarks.routes import percentile
+
+
+def seed_users(m, count):
+    password_hash = m.hash_password(BENCH_PASSWORD)
+    m.db.session.execute(insert(m.User), [dict(username=f'sinav{i:04d}', password=password_hash, is_admin=False)
+                                          for i in range(count)])
+    m.db.session.commit()
+
+
+def storm(m, logins, concurrency):
+    latencies, statuses, probe = [], {}, []
+    lock = threading.Lock()
+    next_user = iter(range(logins))
+    done = threading.Event()
+
+    def login_worker():
+        client = m.app.test_client()
+        while True:
+            with lock:
+                index = next(next_user, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            response = client.post('/', data={'username': f'sinav{index:04d}', 'password': BENCH_PASSWORD})
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    def probe_worker():
+        client = m.app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/').close()
+            probe.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    probe_thread = threading.Thread(target=probe_worker)
+    probe_thread.start()
+    threads = [threading.Thread(target=login_worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - start
+    done.set()
+    probe_thread.join()
+    return latencies, statuses, probe, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Eşzamanlı giriş yükü altında şifre doğrulamayı ölçer.')
+    parser.add_argument('--logins', type=int, default=60)
+    parser.add_argument('--concurrency', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=2, help='LOGIN_HASH_WORKERS (havuz turu)')
+    parser.add_argument('--queue-limit', type=int, default=16, help='LOGIN_QUEUE_LIMIT (havuz turu)')
+    args = parser.parse_args()
+
+    m = setup_app()
+    m.app.config['TESTING'] = True
+    with m.app.app_context():
+        seed_users(m, args.logins)
+        method = m.app.config['PASSWORD_HASH_METHOD']
+
+    print(f"{args.logins} giriş, {args.concurrency} eşzamanlı istemci, hash yöntemi {method}")
+    print(f"{'yol':>8} {'süre (s)':>9} {'giriş p50':>10} {'giriş p95':>10} {'503':>5} {'sayfa p95':>10}")
+    rounds = [('eski', 0, args.logins), ('havuz', args.workers, args.queue_limit)]
+    for name, workers, queue_limit in rounds:
+        m.app.config['LOGIN_HASH_WORKERS'] = workers
+        m.app.config['LOGIN_QUEUE_LIMIT'] = queue_limit
+        latencies, statuses, probe, total = storm(m, args.logins, args.concurrency)
+        print(f"{name:>8} {total:>9.2f} {percentile(latencies, 50):>8.0f}ms {percentile(latencies, 95):>8.0f}ms "
+              f"{statuses.get(503, 0):>5} {percentile(probe, 95):>8.1f}ms")
+    print('Havuz ölçümleri:', m.password_hasher.stats())
+
+
+if __name__ == '__main__':
+    main()
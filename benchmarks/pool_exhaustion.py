@@ -0,0 +1,81 @@
+# Bağlantı havuzu tükenmesi: her istemci bir bağlantıyı belirli süre tutarken eşzamanlılık
+# havuz kapasitesinin (pool_size + max_overflow) üzerine çıkarılır. Kapasite aşılınca bekleme
+# süresi artar, DB_POOL_TIMEOUT aşılınca istek TimeoutError ile düşer.
+#   python -m benchmarks.pool_exhaustion --pool-size 2 --max-overflow 1 --timeout 1
+import argparse
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+
+def hold_connection(m, hold, results, lock):
+    start = time.perf_counter()
+    with m.app.app_context():
+        try:
+            m.db.session.execute(text('SELECT 1'))
+            acquired = time.perf_counter()
+            time.sleep(hold)  # yavaş bir isteği taklit eder: bağlantı iş bitene kadar tutulur
+            outcome = ('ok', acquired - start)
+        except m.PoolTimeoutError:
+            outcome = ('timeout', time.perf_counter() - start)
+        finally:
+            m.db.session.remove()
+    with lock:
+        results.append(outcome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Havuz tükenmesi altında bağlantı bekleme davranışını gösterir.')
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--max-overflow', type=int, default=1)
+    parser.add_argument('--timeout', type=int, default=1, help='DB_POOL_TIMEOUT (tam saniye)')
+    parser.add_argument('--hold', type=float, default=0.3, help='Bağlantının tutulduğu süre (saniye)')
+    parser.add_argument('--concurrency', default='1,3,6,12,24')
+    args = parser.parse_args()
+
+    # Havuz ayarları engine oluşturulurken okunur; modül import edilmeden önce verilmeli
+    os.environ.update(DB_POOL_PROFILE='threaded', DB_POOL_SIZE=str(args.pool_size),
+                      DB_MAX_OVERFLOW=str(args.max_overflow), DB_POOL_TIMEOUT=str(args.timeout))
+    from benchmarks.common import setup_app
+    from benchmarks.routes import percentile
+    m = setup_app()
+
+    with m.app.app_context():
+        pool = m.db.engine.pool
+    capacity = args.pool_size + args.max_overflow
+    print(f"kapasite {capacity} (pool_size {args.pool_size} + max_overflow {args.max_overflow}), "
+          f"timeout {args.timeout}s, bağlantı tutma {args.hold}s")
+    print(f"{'eşzamanlı':>10} {'başarılı':>9} {'timeout':>8} {'bekleme p50':>12} {'bekleme max':>12} {'taşma':>6}")
+    for concurrency in (int(value) for value in args.concurrency.split(',')):
+        results, lock = [], threading.Lock()
+        overflow_seen = [0]
+
+        def watch(done):
+            while not done.is_set():
+                overflow_seen[0] = max(overflow_seen[0], pool.overflow())
+                time.sleep(0.005)
+
+        done = threading.Event()
+        watcher = threading.Thread(target=watch, args=(done,))
+        watcher.start()
+        threads = [threading.Thread(target=hold_connection, args=(m, args.hold, results, lock))
+                   for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done.set()
+        watcher.join()
+
+        waits = [wait * 1000 for status, wait in results if status == 'ok']
+        timeouts = sum(1 for status, _ in results if status == 'timeout')
+        print(f"{concurrency:>10} {len(waits):>9} {timeouts:>8} {percentile(waits, 50):>10.1f}ms "
+              f"{max(wait * 1000 for _, wait in results):>10.1f}ms {max(0, overflow_seen[0]):>6}")
+
+    print('Havuz ölçümleri:', m.pool_metrics.stats(pool))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# user_panel quiz sonuçları: eski "tüm denemeler + joinedload" yolu ile
+# seçili konuya kapsamlanmış load_quiz_results karşılaştırması.
+#   python -m benchmarks.quiz_attempts
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+
+from benchmarks.common import setup_app, timed
+
+ATTEMPT_COUNTS = (10, 100, 1000)
+QUESTIONS_PER_QUIZ = 5
+ANSWERS_PER_QUESTION = 4
+ALT_BASLIK_PER_KONU = 10
+
+
+def seed(m, attempt_count):
+    db = m.db
+    ders_id = db.session.execute(insert(m.Ders).values(name=f'Ders {attempt_count}')).inserted_primary_key[0]
+    user_id = db.session.execute(insert(m.User).values(username=f'ogrenci{attempt_count}', password='x',
+                                                       is_admin=False)).inserted_primary_key[0]
+    konu_ids = []
+    quiz_ids = []
+    for konu_index in range(attempt_count // ALT_BASLIK_PER_KONU):
+        konu_id = db.session.execute(insert(m.Konu).values(name=f'Konu {konu_index}', ders_id=ders_id)).inserted_primary_key[0]
+        konu_ids.append(konu_id)
+        for ab_index in range(ALT_BASLIK_PER_KONU):
+            ab_id = db.session.execute(insert(m.AltBaslik).values(name=f'Alt {ab_index}', konu_id=konu_id)).inserted_primary_key[0]
+            quiz_id = db.session.execute(insert(m.Quiz).values(title=f'Quiz {ab_id}', alt_baslik_id=ab_id,
+                                                               quiz_type='normal')).inserted_primary_key[0]
+            quiz_ids.append(quiz_id)
+            packed = b''
+            for q_index in range(QUESTIONS_PER_QUIZ):
+                question_id = db.session.execute(insert(m.Question).values(
+                    quiz_id=quiz_id, question_text=f'Soru {q_index} ' + 'x' * 80)).inserted_primary_key[0]
+                answer_ids = db.session.execute(insert(m.Answer).returning(m.Answer.id, sort_by_parameter_order=True), [
+                    {'question_id': question_id, 'answer_text': f'Cevap {a}', 'is_correct': a == 0}
+                    for a in range(ANSWERS_PER_QUESTION)
+                ]).scalars().all()
+                packed += m.ATTEMPT_ANSWER_PAIR.pack(question_id, answer_ids[0])
+            db.session.execute(insert(m.UserQuizAttempt).values(user_id=user_id, quiz_id=quiz_id, score=100,
+                                                                answers=packed))
+    m.bump_cache_version(m.CATALOG_VERSION_KEY)
+    db.session.commit()
+    return user_id, konu_ids[0]
+
+
+def legacy_load(m, user_id, selected_quiz_ids):
+    # Eski user_panel yolu: kullanıcının tüm denemeleri, tüm soru ve cevaplarıyla;
+    # metinler önbellek olmadan yüklenen ilişkilerden çözülür
+    attempts = m.db.session.query(m.UserQuizAttempt).filter_by(user_id=user_id)\
+                .options(joinedload(m.UserQuizAttempt.quiz_obj).joinedload(m.Quiz.questions).joinedload(m.Question.answers))\
+                .all()
+    by_quiz = {attempt.quiz_id: attempt for attempt in attempts}
+    results = {}
+    for quiz_id in selected_quiz_ids:
+        if quiz_id in by_quiz:
+            attempt = by_quiz[quiz_id]
+            selections = m.unpack_attempt_answers(attempt.answers)
+            details = []
+            for question in sorted(attempt.quiz_obj.questions, key=lambda q: q.id):
+                answers = sorted(question.answers, key=lambda a: a.id)
+                correct = next((a for a in answers if a.is_correct), None)
+                selected = next((a for a in answers if a.id == selections.get(question.id)), None)
+                details.append({'question_text': question.question_text,
+                                'user_selected_answer': selected.answer_text if selected else "Cevap verilmedi",
+                                'correct_answer': correct.answer_text if correct else "Belirtilmedi",
+                                'is_correct': bool(selected and selected.is_correct)})
+            results[quiz_id] = {'score': attempt.score, 'attempt_date': attempt.attempt_date,
+                                'details': details, 'id': attempt.id}
+    m.db.session.expunge_all()
+    return results
+
+
+def main():
+    m = setup_app()
+    print(f"{'deneme':>8} {'eski (ms)':>12} {'yeni (ms)':>12} {'hızlanma':>10}")
+    with m.app.app_context():
+        for attempt_count in ATTEMPT_COUNTS:
+            user_id, konu_id = seed(m, attempt_count)
+            selected_quiz_ids = [row[0] for row in m.db.session.query(m.Quiz.id).join(m.AltBaslik)
+                                 .filter(m.AltBaslik.konu_id == konu_id).all()]
+            assert legacy_load(m, user_id, selected_quiz_ids) == m.load_quiz_results(user_id, selected_quiz_ids)
+
+            legacy_ms = timed(lambda: legacy_load(m, user_id, selected_quiz_ids))
+            scoped_ms = timed(lambda: m.load_quiz_results(user_id, selected_quiz_ids))
+            print(f"{attempt_count:>8} {legacy_ms:>12.2f} {scoped_ms:>12.2f} {legacy_ms / scoped_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
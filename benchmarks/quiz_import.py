@@ -0,0 +1,103 @@
+# Quiz ekleme: eski "soru başına flush" ORM yolu ile toplu INSERT kullanan import_quizzes
+# karşılaştırması (varsayılan 10.000 soru, soru başına 4 cevap).
+#   python -m benchmarks.quiz_import --questions 10000
+import argparse
+import time
+
+from sqlalchemy import event, insert
+
+from benchmarks.common import setup_app
+
+ANSWERS_PER_QUESTION = 4
+QUESTIONS_PER_QUIZ = 50
+
+
+def seed_alt_basliklar(m, name, count):
+    db = m.db
+    ders_id = db.session.execute(insert(m.Ders).values(name=name)).inserted_primary_key[0]
+    konu_id = db.session.execute(insert(m.Konu).values(name='Konu', ders_id=ders_id)).inserted_primary_key[0]
+    result = db.session.execute(insert(m.AltBaslik).returning(m.AltBaslik.id, sort_by_parameter_order=True),
+                                [{'name': f'Alt {i}', 'konu_id': konu_id} for i in range(count)])
+    ids = [row[0] for row in result]
+    m.bump_cache_version(m.CATALOG_VERSION_KEY)
+    db.session.commit()
+    return ids
+
+
+def build_quizzes(alt_baslik_ids, questions_per_quiz):
+    return [{
+        'alt_baslik_id': alt_baslik_id,
+        'title': f'Quiz {alt_baslik_id}',
+        'quiz_type': 'normal',
+        'questions': [{
+            'text': f'Soru {q_index} ' + 'x' * 80,
+            'answers': [{'text': f'Cevap {a}', 'correct': a == 0} for a in range(ANSWERS_PER_QUESTION)]
+        } for q_index in range(questions_per_quiz)]
+    } for alt_baslik_id in alt_baslik_ids]
+
+
+def legacy_import(m, quizzes):
+    # Eski add_quiz yolu: her soru için ayrı flush, her cevap için ayrı ORM nesnesi
+    db = m.db
+    for quiz in quizzes:
+        new_quiz = m.Quiz(title=quiz['title'], alt_baslik_id=quiz['alt_baslik_id'], quiz_type=quiz['quiz_type'])
+        db.session.add(new_quiz)
+        db.session.flush()
+        for question in quiz['questions']:
+            new_question = m.Question(quiz_id=new_quiz.id, question_text=question['text'])
+            db.session.add(new_question)
+            db.session.flush()
+            for answer in question['answers']:
+                db.session.add(m.Answer(question_id=new_question.id, answer_text=answer['text'],
+                                        is_correct=answer['correct']))
+    db.session.commit()
+
+
+def bulk_import(m, quizzes):
+    m.import_quizzes(quizzes)
+    m.db.session.commit()
+
+
+def measure(m, func, quizzes):
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    engine = m.db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    try:
+        func(m, quizzes)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return (time.perf_counter() - start) * 1000, statements[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quiz içe aktarma yollarını karşılaştırır.')
+    parser.add_argument('--questions', type=int, default=10000)
+    args = parser.parse_args()
+
+    m = setup_app()
+    quiz_count = max(1, args.questions // QUESTIONS_PER_QUIZ)
+    with m.app.app_context():
+        legacy_quizzes = build_quizzes(seed_alt_basliklar(m, 'Eski', quiz_count), QUESTIONS_PER_QUIZ)
+        bulk_quizzes = build_quizzes(seed_alt_basliklar(m, 'Toplu', quiz_count), QUESTIONS_PER_QUIZ)
+        m.db.session.expunge_all()
+
+        legacy_ms, legacy_sql = measure(m, legacy_import, legacy_quizzes)
+        m.db.session.expunge_all()
+        bulk_ms, bulk_sql = measure(m, bulk_import, bulk_quizzes)
+
+        questions = quiz_count * QUESTIONS_PER_QUIZ
+        assert m.Question.query.count() == 2 * questions
+        print(f"{questions} soru, {questions * ANSWERS_PER_QUESTION} cevap ({m.db.engine.dialect.name})")
+        print(f"{'yol':>8} {'süre (ms)':>12} {'SQL':>8}")
+        print(f"{'eski':>8} {legacy_ms:>12.1f} {legacy_sql:>8}")
+        print(f"{'toplu':>8} {bulk_ms:>12.1f} {bulk_sql:>8}")
+        print(f"hızlanma: {legacy_ms / bulk_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+# Flask test client üzerinden rota bazlı gecikme, SQL ifade sayısı ve bellek ölçümü.
+#   python -m benchmarks.routes --scale medium --iterations 200 --output sonuc.json
+#   python -m benchmarks.routes --compare onceki.json
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+from flask import url_for
+from sqlalchemy import event
+
+from benchmarks.common import REPO_ROOT, setup_app
+from benchmarks.generator import BENCH_PASSWORD, SCALES, generate_dataset
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def login(client, username):
+    response = client.post('/', data={'username': username, 'password': BENCH_PASSWORD})
+    assert response.status_code == 302, f'{username} giriş yapamadı'
+    return client
+
+
+def build_scenarios(m, dataset, rng):
+    """Her senaryo (ad, istemci, istek fonksiyonu) üçlüsüdür; istek fonksiyonu Response döner."""
+    app = m.app
+    student = dataset['user_ids'][0]
+    with app.app_context():
+        m.db.session.execute(m.User.__table__.update().where(m.User.id == student).values(expire_date=None))
+        m.db.session.commit()
+        konu_ders = dict(m.db.session.query(m.Konu.id, m.Konu.ders_id).all())
+        quiz_konu = dict(m.db.session.query(m.Quiz.id, m.AltBaslik.konu_id).join(m.AltBaslik).all())
+        quiz_alt_baslik = dict(m.db.session.query(m.Quiz.id, m.Quiz.alt_baslik_id).all())
+        materials = m.Material.query.filter(m.Material.filename.in_(dataset['material_filenames'][:200])).all()
+    student_name = 'ogrenci00000'
+
+    student_client = login(app.test_client(), student_name)
+    admin_client = login(app.test_client(), 'admin')
+    anonymous_client = app.test_client()
+
+    def user_panel():
+        konu_id = rng.choice(dataset['konu_ids'])
+        return student_client.get(f'/panel?ders_id={konu_ders[konu_id]}&konu_id={konu_id}')
+
+    def submit_quiz():
+        quiz_id = rng.choice(dataset['quiz_ids'])
+        form = {'quiz_id': quiz_id, 'alt_baslik_id': quiz_alt_baslik[quiz_id], 'selected_konu_id': quiz_konu[quiz_id]}
+        for question_id in dataset['questions_by_quiz'].get(quiz_id, []):
+            form[f'question_{question_id}'] = rng.choice(dataset['answers_by_question'][question_id])
+        return student_client.post('/submit_quiz', data=form)
+
+    def mark_completed():
+        return student_client.post('/mark_completed', data={'alt_baslik_id': rng.choice(dataset['alt_baslik_ids'])})
+
+    def download_file():
+        return student_client.get(f"/download/{rng.choice(dataset['material_filenames'])}")
+
+    # Paneldeki imzalı bağlantılar: User/Material sorgusu yapılmaz
+    with app.test_request_context():
+        with student_client.session_transaction() as student_session:
+            student_id = student_session['user_id']
+        signed_urls = [url_for('download_file', filename=material.filename,
+                               t=m.make_download_token(material, student_id)) for material in materials]
+
+    def download_file_signed():
+        return student_client.get(rng.choice(signed_urls))
+
+    # Katalog API: tam gövde ve If-None-Match ile koşullu istek (304)
+    catalog_etag = student_client.get('/api/v1/catalog').headers['ETag']
+
+    def api_catalog_304():
+        return student_client.get('/api/v1/catalog', headers={'If-None-Match': catalog_etag})
+
+    return [
+        ('login', lambda: anonymous_client.post('/', data={'username': student_name, 'password': BENCH_PASSWORD})),
+        ('user_panel', user_panel),
+        ('admin_panel', lambda: admin_client.get('/admin')),
+        ('submit_quiz', submit_quiz),
+        ('mark_completed', mark_completed),
+        ('download_file', download_file),
+        ('download_file_signed', download_file_signed),
+        ('api_catalog', lambda: student_client.get('/api/v1/catalog')),
+        ('api_catalog_304', api_catalog_304),
+        ('search', lambda: student_client.get('/search', query_string={'q': rng.choice(('soru', 'Konu 1', 'YORUM'))})),
+    ]
+
+
+def run(m, scenarios, iterations, warmup):
+    statement_count = [0]
+
+    def count_statement(*args):
+        statement_count[0] += 1
+
+    with m.app.app_context():
+        engine = m.db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+
+    results = {}
+    for name, request in scenarios:
+        for _ in range(warmup):
+            request()
+        latencies = []
+        statements = []
+        statuses = {}
+        for _ in range(iterations):
+            statement_count[0] = 0
+            start = time.perf_counter()
+            response = request()
+            response.get_data()
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.close()
+            statements.append(statement_count[0])
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        # Bellek ölçümü ayrı bir turda yapılır; tracemalloc gecikme ölçümünü bozmasın
+        tracemalloc.start()
+        for _ in range(min(iterations, 10)):
+            request().close()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            'iterations': iterations,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'sql_statements_mean': round(sum(statements) / len(statements), 2),
+            'sql_statements_max': max(statements),
+            'peak_memory_kib': round(peak / 1024, 1),
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+        }
+        print(f"{name:>20}: p50 {results[name]['p50_ms']:8.2f} ms  p95 {results[name]['p95_ms']:8.2f} ms  "
+              f"p99 {results[name]['p99_ms']:8.2f} ms  sql {results[name]['sql_statements_mean']:7.1f}  "
+              f"bellek {results[name]['peak_memory_kib']:9.1f} KiB")
+
+    event.remove(engine, 'before_cursor_execute', count_statement)
+    return results
+
+
+def compare(old_path, new_report):
+    with open(old_path, encoding='utf-8') as f:
+        old_report = json.load(f)
+    print(f"\nKarşılaştırma: {old_report.get('git_revision')} -> {new_report.get('git_revision')}")
+    for name, new in new_report['routes'].items():
+        old = old_report['routes'].get(name)
+        if not old:
+            continue
+        deltas = []
+        for key in ('p50_ms', 'p95_ms', 'sql_statements_mean', 'peak_memory_kib'):
+            if old[key]:
+                deltas.append(f"{key} {(new[key] - old[key]) / old[key] * 100:+.1f}%")
+        print(f"{name:>20}: " + '  '.join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rota bazlı benchmark çalıştırır.')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--compare', help='Karşılaştırılacak önceki sonuç dosyası')
+    parser.add_argument('--strict', action='store_true',
+                        help='Rota sorgu bütçesini aşan istekte hata ver (SQL_QUERY_BUDGET_STRICT)')
+    args = parser.parse_args()
+
+    # setup_app çalışma dizinini değiştirir; göreli yolları önceden çözüyoruz
+    output = os.path.abspath(args.output) if args.output else None
+    previous = os.path.abspath(args.compare) if args.compare else None
+
+    m = setup_app()
+    with m.app.app_context():
+        dataset = generate_dataset(m, seed=args.seed, upload_folder=m.app.config['UPLOAD_FOLDER'],
+                                   **SCALES[args.scale])
+        database = m.db.engine.url.get_backend_name()
+    m.app.config['TESTING'] = True
+    m.app.config['SQL_QUERY_BUDGET_STRICT'] = args.strict
+
+    print(f"Ölçek: {args.scale} {dataset['counts']}")
+    rng = random.Random(args.seed)
+    routes = run(m, build_scenarios(m, dataset, rng), args.iterations, args.warmup)
+
+    report = {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'database': database,
+        'scale': args.scale,
+        'seed': args.seed,
+        'counts': dataset['counts'],
+        'routes': routes,
+    }
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print('Sonuçlar yazıldı:', output)
+    if previous:
+        compare(previous, report)
+
+
+if __name__ == '__main__':
+    main()
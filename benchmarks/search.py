@@ -0,0 +1,110 @@
+# Tam metin arama: dizin yeniden kurma süresi ve FTS sorgusu ile LIKE taraması karşılaştırması.
+#   python -m benchmarks.search --comments 100000
+import argparse
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert
+
+from benchmarks.common import setup_app
+from benchmarks.routes import percentile
+
+# Sık kullanılan Türkçe ders kelimeleri + hecelerden türetilmiş uzun kuyruk; Zipf dağılımıyla seçilir
+COMMON_WORDS = ('türev integral limit fonksiyon denklem eşitsizlik olasılık istatistik geometri üçgen çember '
+         'vektör matris kuvvet hareket enerji momentum ışık kırılma yansıma dalga elektrik manyetizma '
+         'atom molekül çözelti asit baz tepkime hücre kalıtım ekosistem fotosentez paragraf anlatım '
+         'yazım noktalama şiir roman tarih coğrafya iklim nüfus ödev soru çözüm anlamadım tekrar '
+         'örnek sınav deneme hocam teşekkürler güzel anlatım video').split()
+SYLLABLES = 'ka la me ri so tu ne bi yı dö şe çı ğa ül ün ar ik os em ba'.split()
+VOCABULARY_SIZE = 20000
+QUERIES = ('soru', 'ışık', 'KIRILMA', 'türev integral', 'olasılık soru', 'fotosentez hücre', 'üçgen', 'mat')
+
+
+def build_vocabulary(rng):
+    words = list(COMMON_WORDS)
+    seen = set(words)
+    while len(words) < VOCABULARY_SIZE:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    rng.shuffle(words)
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(words)):
+        total += 1 / (rank + 1)
+        cum_weights.append(total)
+    return words, cum_weights
+
+
+def seed(m, comment_count, rng):
+    db = m.db
+    words, cum_weights = build_vocabulary(rng)
+    user_id = db.session.execute(insert(m.User).values(username='ogrenci', password='x')).inserted_primary_key[0]
+    ders_ids = db.session.execute(insert(m.Ders).returning(m.Ders.id, sort_by_parameter_order=True),
+                                  [{'name': f'{word.title()} Dersi'} for word in COMMON_WORDS[:10]]).scalars().all()
+    konu_ids = db.session.execute(insert(m.Konu).returning(m.Konu.id, sort_by_parameter_order=True), [
+        {'name': f'{rng.choice(COMMON_WORDS).title()} {k}', 'ders_id': ders_id} for ders_id in ders_ids for k in range(10)
+    ]).scalars().all()
+    alt_baslik_ids = db.session.execute(insert(m.AltBaslik).returning(m.AltBaslik.id, sort_by_parameter_order=True), [
+        {'name': ' '.join(rng.sample(COMMON_WORDS, 3)), 'konu_id': konu_id} for konu_id in konu_ids for _ in range(10)
+    ]).scalars().all()
+    now = datetime.utcnow()
+    for start in range(0, comment_count, 10000):
+        # Toplu INSERT mapper olaylarını tetiklemez; dizin aşağıda reindex_search ile kurulur
+        db.session.execute(insert(m.Comment), [
+            {'user_id': user_id, 'alt_baslik_id': rng.choice(alt_baslik_ids), 'created_at': now,
+             'content': ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(8, 30)))}
+            for _ in range(start, min(start + 10000, comment_count))
+        ])
+    m.bump_cache_version(m.CATALOG_VERSION_KEY)
+    db.session.commit()
+
+
+def like_scan(m, query):
+    # Dizin olmadan: ham içerikte LIKE taraması (Türkçe katlama yapılmaz). Sıralama ve sonraki sayfa için
+    # eşleşmelerin tamamı gerektiğinden LIMIT'le erken durmaz; FTS sorgusu da tüm eşleşmeleri puanlar.
+    return m.db.session.query(func.count(m.Comment.id)).filter(
+        *[m.Comment.content.ilike(f'%{term}%') for term in query.split()]).scalar()
+
+
+def measure(func, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 50), percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tam metin arama benchmarkı.')
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    m = setup_app()
+    rng = random.Random(args.seed)
+    with m.app.app_context():
+        seed(m, args.comments, rng)
+        start = time.perf_counter()
+        counts = m.reindex_search()
+        m.db.session.commit()
+        print(f"Dizin yeniden kuruldu: {(time.perf_counter() - start):.2f} sn {counts}")
+
+        print(f"{'sorgu':>18} {'sonuç':>6} {'fts p50':>9} {'fts p95':>9} {'like p50':>9} {'like p95':>9}")
+        for query in QUERIES:
+            hits, _ = m.search_documents(query)
+            fts = measure(lambda: m.search_documents(query), args.iterations)
+            # Sonuç sayfasının katalog ve yorum çözümlemesiyle birlikte maliyeti
+            with m.app.test_request_context():
+                full = measure(lambda: m.build_search_results(m.search_documents(query)[0]), args.iterations)
+            like = measure(lambda: like_scan(m, query), args.iterations)
+            print(f"{query:>18} {len(hits):>6} {fts[0]:>9.2f} {fts[1]:>9.2f} {like[0]:>9.2f} {like[1]:>9.2f}"
+                  f"   (sayfa p50 {full[0]:.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Başlangıç süresi: her tur yeni bir Python sürecinde modül importunu, import sırasında
+# çalışan SQL sayısını ve ilk isteklerin süresini ölçer. Şema olmayan boş bir veritabanıyla
+# import'un başarılı olması, import'un veritabanına dokunmadığını gösterir.
+#   python -m benchmarks.startup --runs 5
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import REPO_ROOT
+from benchmarks.routes import percentile
+
+PROBE = r'''
+import json, sys, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+statements = [0]
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+start = time.perf_counter()
+import dersplanlama
+import_ms = (time.perf_counter() - start) * 1000
+import_statements = statements[0]
+
+start = time.perf_counter()
+dersplanlama.warm_up()
+warm_up_ms = (time.perf_counter() - start) * 1000
+
+# İlk istekler: şablon derleme, engine/havuz açılışı ve katalog yüklemesi burada ödenir
+client = dersplanlama.app.test_client()
+start = time.perf_counter()
+login_page = client.get('/')
+first_request_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+client.get('/')
+second_request_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({'import_ms': import_ms, 'import_statements': import_statements, 'warm_up_ms': warm_up_ms,
+                  'first_request_ms': first_request_ms, 'second_request_ms': second_request_ms,
+                  'status': login_page.status_code}))
+'''
+
+
+def run_probe(database_url, warm):
+    code = PROBE if warm else PROBE.replace('dersplanlama.warm_up()', 'pass')
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=REPO_ROOT)
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=tempfile.mkdtemp(prefix='dersplanlama_start_'),
+                                     env=env, stderr=subprocess.DEVNULL)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Modül import ve ilk istek sürelerini ölçer.')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    # Tablolar bilerek oluşturulmaz: import şemaya ihtiyaç duymamalı
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='dersplanlama_start_'), 'bos.db')
+    print(f"{args.runs} tur, her biri yeni bir süreçte; veritabanı şemasız: {database_url}")
+    print(f"{'tur':>10} {'import':>10} {'import SQL':>11} {'ısınma':>9} {'1. istek':>10} {'2. istek':>10}")
+    for name, warm in (('soğuk', False), ('preload', True)):
+        samples = [run_probe(database_url, warm) for _ in range(args.runs)]
+        column = lambda key: percentile([sample[key] for sample in samples], 50)
+        print(f"{name:>10} {column('import_ms'):>8.1f}ms {max(s['import_statements'] for s in samples):>11} "
+              f"{column('warm_up_ms'):>7.1f}ms {column('first_request_ms'):>8.1f}ms {column('second_request_ms'):>8.1f}ms")
+    print("'preload' turunda ısınma gunicorn ebeveyninde bir kez ödenir; worker'lar ilk isteği ısınmış başlatır.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# Dönem başı toplu kullanıcı ekleme: admin panelindeki tek tek ekleme yolu (satır başına
+# mevcutluk sorgusu + hash + commit) ile import_users (parti başına tek sorgu, süreç havuzunda
+# paralel hash, executemany INSERT) karşılaştırılır. Dosyanın ~%5'i hatalı satırdır.
+#   python -m benchmarks.user_import --users 10000
+#   python -m benchmarks.user_import --users 10000 --method pbkdf2:sha256:1000   # hash'siz yol maliyeti
+import argparse
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import setup_app
+
+
+def build_csv(count, rng, existing):
+    lines = ['username,password,access_days']
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.02:
+            lines.append(f'{rng.choice(existing)},sifre{i},30')            # zaten mevcut
+        elif roll < 0.03:
+            lines.append(f'ogrenci{max(i - 1, 0):05d},sifre{i},30')         # dosyada tekrar
+        elif roll < 0.05:
+            lines.append(f'ogrenci{i:05d},sifre{i},{rng.choice(["abc", "0", "99999"])}')
+        else:
+            lines.append(f'ogrenci{i:05d},sifre{i},{rng.choice(["", "30", "180", "365"])}')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def legacy_import(m, rows):
+    # admin_panel add_user yolunun satır başına tekrarı
+    created = 0
+    for _, row in rows:
+        username, password = row['username'].strip(), row['password'].strip()
+        if not username or not password or m.User.query.filter_by(username=username).first():
+            continue
+        try:
+            days = m.parse_access_days(row.get('access_days'))
+        except ValueError:
+            continue
+        expire_date = datetime.utcnow() + timedelta(days=days) if days else None
+        m.db.session.add(m.User(username=username, password=m.hash_password(password), is_admin=False,
+                                expire_date=expire_date))
+        m.db.session.commit()
+        created += 1
+    return created
+
+
+def reset_users(m, keep):
+    m.db.session.execute(m.User.__table__.delete().where(m.User.username.notin_(keep)))
+    m.db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Toplu kullanıcı ekleme benchmarkı.')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--legacy-users', type=int, default=200,
+                        help='Tek tek ekleme yolu bu kadar satırla ölçülüp --users için ölçeklenir')
+    parser.add_argument('--workers', type=int, default=max(os.cpu_count() or 1, 2))
+    parser.add_argument('--method', help='Şifre hash yöntemi (varsayılan PASSWORD_HASH_METHOD)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    m = setup_app()
+    if args.method:
+        m.app.config['PASSWORD_HASH_METHOD'] = args.method
+    rng = random.Random(args.seed)
+    existing = [f'mevcut{i:03d}' for i in range(100)]
+    with m.app.app_context():
+        m.db.session.execute(m.User.__table__.insert(), [dict(username=name, password='x', is_admin=False)
+                                                         for name in existing])
+        m.db.session.commit()
+        data = build_csv(args.users, rng, existing)
+        print(f"{args.users} satır, yöntem {m.app.config['PASSWORD_HASH_METHOD']}, {args.workers} hash süreci")
+
+        sample = list(m.iter_user_csv(io.BytesIO(data)))[:args.legacy_users]
+        start = time.perf_counter()
+        created = legacy_import(m, sample)
+        legacy_seconds = time.perf_counter() - start
+        per_row = legacy_seconds / len(sample)
+        print(f"{'tek tek (add_user)':>26}: {legacy_seconds:7.2f} sn / {len(sample)} satır ({created} eklendi) "
+              f"-> {args.users} satır için ~{per_row * args.users:.1f} sn")
+        reset_users(m, existing)
+
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            summary = m.import_users(m.iter_user_csv(io.BytesIO(data)), workers=workers)
+            seconds = time.perf_counter() - start
+            print(f"{f'import_users (workers={workers})':>26}: {seconds:7.2f} sn  {summary['created']} eklendi, "
+                  f"{len(summary['errors'])} hata  {summary['rows'] / seconds:8.0f} satır/sn  "
+                  f"(tek tek yola göre {per_row * args.users / seconds:.1f}x)")
+            reset_users(m, existing)
+
+
+if __name__ == '__main__':
+    main()
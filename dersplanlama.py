@@ -1,16 +1,46 @@
 # Gerekli kütüphaneleri ve modülleri import ediyoruz
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session, send_from_directory, jsonify, current_app
+import io
+import re
+import csv
+import click
+import json
+import time
+import struct
+import hashlib
+import secrets
+import tempfile
+import mimetypes
+import unicodedata
+from urllib.parse import quote
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import namedtuple, Counter, OrderedDict, deque
+from itertools import islice, repeat
+from types import MappingProxyType
+from flask import Flask, render_template, request, redirect, url_for, flash, session, send_from_directory, jsonify, current_app, g, has_request_context
+from flask import before_render_template, template_rendered, Response, stream_with_context, abort, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import wraps, cache, partial
 from sqlalchemy import UniqueConstraint
 from sqlalchemy import func
-from sqlalchemy.orm import joinedload
+from sqlalchemy import update, select, and_, or_, text, event, insert, delete
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import QueuePool, NullPool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError, IntegrityError
+from sqlalchemy.schema import DDL
 from sqlalchemy.dialects import postgresql # PostgreSQL JSON desteği için
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from werkzeug.utils import secure_filename
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
 
 # --- UYGULAMA VE VERITABANI KURULUMU ---
 
@@ -23,6 +53,88 @@ if database_url and database_url.startswith("postgres://"):
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# İstek başına SQL ölçümü: Server-Timing başlığı, N+1 uyarısı ve rota bazlı sorgu bütçesi
+app.config['SERVER_TIMING_ENABLED'] = os.environ.get('SERVER_TIMING_ENABLED', '1') == '1'
+app.config['SQL_REPEAT_WARN_THRESHOLD'] = int(os.environ.get('SQL_REPEAT_WARN_THRESHOLD', '5'))
+app.config['SQL_QUERY_BUDGET_STRICT'] = os.environ.get('SQL_QUERY_BUDGET_STRICT') == '1'
+app.config['SQL_QUERY_BUDGET_DEFAULT'] = 25
+app.config['SQL_QUERY_BUDGETS'] = {
+    'login': 3,
+    # Soğuk katalog önbelleğiyle (her katalog değişikliğinden sonraki ilk istek) en kötü durum
+    'user_panel': 17,
+    'admin_panel': 12,
+    # Yazma işlemleri: soğuk katalog ağacı, sürüm sayacı ve soru sayısından bağımsız toplu ekleme
+    'admin_panel:POST': 16,
+    'submit_quiz': 10,
+    'submit_quiz_json': 10,
+    'mark_completed': 6,
+    'download_file': 4,
+    # Toplu içe aktarma parti başına sabit sayıda ifade çalıştırır; parti sayısı dosya boyutuyla
+    # büyüdüğü için bütçe uygulanmaz
+    'import_quizzes_route': None,
+}
+
+# Parçalı yükleme: varsayılan/üst sınır parça boyutu ve tamamlanmamış oturumların ömrü
+app.config['UPLOAD_CHUNK_SIZE'] = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+app.config['UPLOAD_CHUNK_SIZE_MAX'] = 64 * 1024 * 1024
+app.config['UPLOAD_MAX_SIZE'] = int(os.environ.get('UPLOAD_MAX_SIZE', str(4 * 1024 * 1024 * 1024)))
+app.config['UPLOAD_SESSION_TTL_HOURS'] = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', '24'))
+
+# /api/v1 katalog yanıtları: ETag katalog sürümünden türetilir. 0 ise tarayıcı her seferinde
+# If-None-Match ile doğrular (değişmediyse 304); >0 ise o kadar saniye sormadan kullanır.
+app.config['CATALOG_API_MAX_AGE'] = int(os.environ.get('CATALOG_API_MAX_AGE', '0'))
+
+# Şablon parça önbelleği ({% cache %}): worker başına, toplam HTML boyutuna göre sınırlı LRU
+app.config['FRAGMENT_CACHE_ENABLED'] = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Giriş: şifreler worker başına sınırlı bir süreç havuzunda doğrulanır. Bekleyen doğrulama
+# sayısı LOGIN_QUEUE_LIMIT'e ulaşınca yeni girişler hash hesaplanmadan 503 + Retry-After alır.
+# PASSWORD_HASH_METHOD değişirse eski hash'ler başarılı girişte yeni yöntemle yeniden yazılır.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+app.config['LOGIN_HASH_WORKERS'] = int(os.environ.get('LOGIN_HASH_WORKERS', '2'))  # 0: istek thread'inde doğrula
+app.config['LOGIN_QUEUE_LIMIT'] = int(os.environ.get('LOGIN_QUEUE_LIMIT', '16'))
+app.config['LOGIN_QUEUE_TIMEOUT'] = float(os.environ.get('LOGIN_QUEUE_TIMEOUT', '10'))
+app.config['LOGIN_RETRY_AFTER'] = int(os.environ.get('LOGIN_RETRY_AFTER', '3'))
+
+# Toplu kullanıcı ekleme (CSV): şifreler girişlerden ayrı, içe aktarma süresince açılan bir süreç
+# havuzunda hash'lenir (0 veya 1: sırayla, mevcut süreçte). Web formu proxy zaman aşımına takılmasın diye
+# USER_IMPORT_WEB_MAX_ROWS ile sınırlıdır; daha büyük dönemler `flask import-users` ile eklenir.
+app.config['USER_IMPORT_HASH_WORKERS'] = int(os.environ.get('USER_IMPORT_HASH_WORKERS', str(os.cpu_count() or 1)))
+app.config['USER_IMPORT_WEB_MAX_ROWS'] = int(os.environ.get('USER_IMPORT_WEB_MAX_ROWS', '500'))
+
+# Kullanıcı bağlamı (id, admin bayrağı, erişim süresi) worker başına LRU önbellekte tutulur.
+# Aynı süreçteki değişiklikler anında, diğer worker'lardakiler en geç TTL sonunda yansır.
+app.config['USER_CONTEXT_CACHE_SIZE'] = int(os.environ.get('USER_CONTEXT_CACHE_SIZE', '4096'))
+app.config['USER_CONTEXT_TTL_SECONDS'] = int(os.environ.get('USER_CONTEXT_TTL_SECONDS', '60'))
+
+# Süresi dolan hesaplar her worker'da bu aralıkla çalışan tarama ile toplu işaretlenir
+# (0: kapalı; tarama `flask sweep-expired-users` ile cron'dan çalıştırılır).
+app.config['ACCOUNT_SWEEP_INTERVAL_SECONDS'] = int(os.environ.get('ACCOUNT_SWEEP_INTERVAL_SECONDS', '300'))
+
+# Admin paneli istatistikleri arka planda bu aralıkla yenilenir (0: her istekte hesapla)
+app.config['DASHBOARD_STATS_REFRESH_SECONDS'] = int(os.environ.get('DASHBOARD_STATS_REFRESH_SECONDS', '60'))
+
+# Materyal indirmeleri: yetki kontrolünden sonra baytları ön vekil sunucu gönderebilir.
+#   none       -> dosya Python worker'ı üzerinden gönderilir (varsayılan)
+#   x-accel    -> nginx: X-Accel-Redirect: <MATERIAL_X_ACCEL_PREFIX><ab>/<digest>
+#                 location /_protected_blobs/ { internal; alias <UPLOAD_FOLDER>/blobs/; }
+#   x-sendfile -> Apache mod_xsendfile / lighttpd: X-Sendfile: <mutlak dosya yolu>
+app.config['MATERIAL_DOWNLOAD_OFFLOAD'] = os.environ.get('MATERIAL_DOWNLOAD_OFFLOAD', 'none')
+app.config['MATERIAL_X_ACCEL_PREFIX'] = os.environ.get('MATERIAL_X_ACCEL_PREFIX', '/_protected_blobs/')
+# Panelde üretilen imzalı indirme bağlantılarının geçerlilik süresi (saniye)
+app.config['MATERIAL_DOWNLOAD_TOKEN_MAX_AGE'] = int(os.environ.get('MATERIAL_DOWNLOAD_TOKEN_MAX_AGE', '600'))
+
+# Bağlantı havuzu profilleri (DB_POOL_PROFILE):
+#   sync      -> gunicorn sync worker: worker başına bir istek + iki arka plan thread'i
+#                (panel istatistikleri ve süresi dolan hesap temizleyicisi)
+#   threaded  -> gthread worker: GUNICORN_THREADS kadar bağlantı, yarısı kadar taşma (varsayılan)
+#   pgbouncer -> PgBouncer transaction modu: havuzu PgBouncer tutar, uygulama bağlantı saklamaz
+# DB_POOL_SIZE / DB_MAX_OVERFLOW profilin hesapladığı boyutları ezer.
+app.config['DB_POOL_PROFILE'] = os.environ.get('DB_POOL_PROFILE', 'threaded')
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', '10'))  # tam saniye
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'zip', 'rar', 'txt'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -30,6 +142,107 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# --- VERİTABANI BAĞLANTI HAVUZU ---
+
+POOL_METRICS_WINDOW = 1024
+
+def _percentiles(values):
+    ordered = sorted(values)
+    if not ordered:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0}
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+    return {'p50_ms': round(pick(0.50) * 1000, 2), 'p95_ms': round(pick(0.95) * 1000, 2)}
+
+class PoolMetrics:
+    """Bağlantı alma bekleme süresi, zaman aşımı ve yeni bağlantı sayaçları (worker başına)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=POOL_METRICS_WINDOW)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.max_wait = 0.0
+
+    def record_wait(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self._waits.append(wait)
+            self.max_wait = max(self.max_wait, wait)
+
+    def stats(self, pool):
+        with self._lock:
+            stats = {
+                'pool': type(pool).__name__,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'checkout_wait': dict(_percentiles(self._waits), max_ms=round(self.max_wait * 1000, 2))
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), in_use=pool.checkedout(), idle=pool.checkedin(),
+                         overflow=max(0, pool.overflow()), max_overflow=pool._max_overflow)
+        return stats
+
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """Havuzdan bağlantı almak için geçen süreyi (boş bağlantı beklemesi dahil) ölçer."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+@event.listens_for(InstrumentedQueuePool, 'connect')
+def _count_pool_connect(dbapi_connection, connection_record):
+    pool_metrics.connects += 1
+
+@event.listens_for(InstrumentedQueuePool, 'invalidate')
+def _count_pool_invalidate(dbapi_connection, connection_record, exception):
+    # pre-ping'in yakaladığı kopuk bağlantılar (ör. veritabanı yeniden başladıktan sonra)
+    pool_metrics.invalidations += 1
+
+def engine_options(config):
+    """DB_POOL_PROFILE'a göre SQLALCHEMY_ENGINE_OPTIONS üretir."""
+    profile = config['DB_POOL_PROFILE']
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri:
+        # Bellek içi SQLite tek bağlantıda yaşar; Flask-SQLAlchemy'nin StaticPool'u kalmalı
+        return {}
+    if profile == 'pgbouncer':
+        # Bağlantıları PgBouncer havuzlar; her checkout yeni, kısa ömürlü bir bağlantıdır.
+        # psycopg2 sunucu tarafı prepared statement kullanmadığı için transaction modu güvenlidir.
+        return {'poolclass': NullPool}
+    if profile == 'sync':
+        # İstek bağlantısı havuzda; istatistik ve hesap temizleme thread'leri taşmadan birer bağlantı alır
+        pool_size, max_overflow = 1, 2
+    elif profile == 'threaded':
+        threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+        pool_size, max_overflow = threads, max(1, threads // 2)
+    else:
+        raise ValueError(f"Bilinmeyen DB_POOL_PROFILE: {profile}")
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', max_overflow)),
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True
+    }
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
@@ -45,10 +258,15 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(256), nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
-    expire_date = db.Column(db.DateTime)
+    expire_date = db.Column(db.DateTime, index=True)
+    # Erişim süresi dolmuş/iptal edilmiş hesap; tarama ve toplu işlemler günceller (HESAP DURUMU)
+    is_expired = db.Column(db.Boolean, default=False, server_default=db.false(), nullable=False)
     progress = db.relationship('UserProgress', backref='user', lazy=True, cascade="all, delete-orphan")
     comments = db.relationship('Comment', backref='user_rel', lazy=True, cascade="all, delete-orphan")
     quiz_attempts = db.relationship('UserQuizAttempt', backref='user_rel', lazy=True, cascade="all, delete-orphan")
+    quiz_attempt_history = db.relationship('QuizAttemptHistory', lazy=True, cascade="all, delete-orphan")
+
+    __table_args__ = (db.Index('ix_user_is_expired_expire_date', 'is_expired', 'expire_date'),)
 
 class Ders(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -58,7 +276,7 @@ class Ders(db.Model):
 class Konu(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    ders_id = db.Column(db.Integer, db.ForeignKey('ders.id'), nullable=False)
+    ders_id = db.Column(db.Integer, db.ForeignKey('ders.id'), nullable=False, index=True)
     alt_basliklar = db.relationship('AltBaslik', backref='konu', lazy=True, cascade="all, delete-orphan")
 
 class AltBaslik(db.Model):
@@ -66,7 +284,7 @@ class AltBaslik(db.Model):
     name = db.Column(db.String(200), nullable=False)
     video_link = db.Column(db.Text)
     # notlar = db.Column(db.Text) # KALDIRILDI
-    konu_id = db.Column(db.Integer, db.ForeignKey('konu.id'), nullable=False)
+    konu_id = db.Column(db.Integer, db.ForeignKey('konu.id'), nullable=False, index=True)
     progress_records = db.relationship('UserProgress', backref='alt_baslik', lazy=True, cascade="all, delete-orphan")
     materials = db.relationship('Material', backref='alt_baslik', lazy=True, cascade="all, delete-orphan")
     quiz = db.relationship('Quiz', backref='alt_baslik_rel', lazy=True, uselist=False, cascade="all, delete-orphan")
@@ -75,7 +293,7 @@ class AltBaslik(db.Model):
 class UserProgress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False)
+    alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False, index=True)
     completed_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     __table_args__ = (UniqueConstraint('user_id', 'alt_baslik_id', name='_user_alt_baslik_uc'),)
@@ -83,6 +301,22 @@ class UserProgress(db.Model):
     def __repr__(self):
         return f'<UserProgress UserID: {self.user_id}, AltBaslikID: {self.alt_baslik_id}>'
 
+# İlerleme özet tabloları: UserProgress ile aynı transaction içinde güncel tutulur,
+# 'flask rebuild-progress-summaries' ile ham satırlardan yeniden hesaplanabilir.
+class KonuProgressSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    konu_id = db.Column(db.Integer, db.ForeignKey('konu.id'), primary_key=True, index=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+
+class DersProgressSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    ders_id = db.Column(db.Integer, db.ForeignKey('ders.id'), primary_key=True, index=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+
+class DersCompletionTotal(db.Model):
+    ders_id = db.Column(db.Integer, db.ForeignKey('ders.id'), primary_key=True)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+
 class Announcement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
@@ -90,36 +324,133 @@ class Announcement(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
 
+    # Aktif duyurular created_at'e göre sıralı listelenir
+    __table_args__ = (db.Index('ix_announcement_is_active_created_at', 'is_active', 'created_at'),)
+
     def __repr__(self):
         return f'<Announcement {self.title}>'
 
+class MaterialBlob(db.Model):
+    # İçerik adresli dosya: aynı içerik (sha256) diskte bir kez saklanır.
+    # ref_count, Material satırlarının mapper olaylarıyla güncellenir.
+    digest = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MaterialBlob {self.digest[:12]} refs={self.ref_count}>'
+
 class Material(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False)
-    filename = db.Column(db.String(255), nullable=False)
+    alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=False, index=True) # download_file bu sütunla arar
     original_filename = db.Column(db.String(255), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # None ise eski düzen: dosya UPLOAD_FOLDER/filename altında
+    blob_digest = db.Column(db.String(64), db.ForeignKey('material_blob.digest'), nullable=True, index=True)
 
     def __repr__(self):
         return f'<Material {self.original_filename}>'
 
+class UploadSession(db.Model):
+    # Devam ettirilebilir parçalı yükleme: parçalar hazırlama dosyasına doğrudan kendi
+    # konumlarına yazılır, tamamlanınca dosya blob deposuna taşınıp Material olarak kaydedilir.
+    # Geçici kayıt: kullanıcı/alt başlık/materyal silinmesini engellememesi için yabancı anahtar
+    # tanımlanmaz; alt başlık complete sırasında yeniden doğrulanır
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    alt_baslik_id = db.Column(db.Integer, nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    material_id = db.Column(db.Integer, nullable=True)
+    chunks = db.relationship('UploadChunk', lazy=True, cascade="all, delete-orphan")
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.original_filename}>'
+
+class UploadChunk(db.Model):
+    upload_id = db.Column(db.String(32), db.ForeignKey('upload_session.id'), primary_key=True)
+    index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+
+class SearchDocument(db.Model):
+    """Arama dizini: Ders/Konu/AltBaslik/Comment başına bir satır, Türkçe normalleştirilmiş metinle.
+
+    Tam metin dizini veritabanına göre eklenir (SEARCH_INDEX_DDL): SQLite'ta bu tabloyu içerik
+    kaynağı olarak kullanan bir FTS5 tablosu, PostgreSQL'de üretilmiş bir tsvector sütunu ve GIN indeksi.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)
+    # Yorumlar için bağlı oldukları alt başlık (sonuçta konuma gitmek için)
+    alt_baslik_id = db.Column(db.Integer, nullable=True)
+    title = db.Column(db.Text, nullable=False, default='')
+    body = db.Column(db.Text, nullable=False, default='')
+
+    __table_args__ = (UniqueConstraint('kind', 'ref_id', name='uq_search_document_kind_ref'),)
+
+# search_document -> search_fts eşitlemesi; toplu yeniden kurmada kaldırılıp tek 'rebuild' yapılır
+SEARCH_FTS_TRIGGERS = {
+    'search_document_ai':
+        "CREATE TRIGGER IF NOT EXISTS search_document_ai AFTER INSERT ON search_document BEGIN "
+        "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    'search_document_ad':
+        "CREATE TRIGGER IF NOT EXISTS search_document_ad AFTER DELETE ON search_document BEGIN "
+        "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    'search_document_au':
+        "CREATE TRIGGER IF NOT EXISTS search_document_au AFTER UPDATE ON search_document BEGIN "
+        "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+        "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+}
+
+SEARCH_INDEX_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+        "title, body, content='search_document', content_rowid='id', tokenize='unicode61 remove_diacritics 0')",
+        *SEARCH_FTS_TRIGGERS.values(),
+    ],
+    'postgresql': [
+        "ALTER TABLE search_document ADD COLUMN tsv tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED",
+        "CREATE INDEX ix_search_document_tsv ON search_document USING gin (tsv)",
+    ],
+}
+
+# create_all/drop_all (benchmark ve yerel kurulum) dizini de kurar; üretimde migration kurar
+for _dialect, _statements in SEARCH_INDEX_DDL.items():
+    for _statement in _statements:
+        event.listen(SearchDocument.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+event.listen(SearchDocument.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS search_fts").execute_if(dialect='sqlite'))
+
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False)
+    alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False, index=True)
     quiz_type = db.Column(db.String(50), nullable=False, default='normal')
+    # Soru/cevap içeriği her değiştiğinde 'quiz' sayacından yeni değer alır (cevap anahtarı önbelleği);
+    # sayaç 1'den başladığı için 0, sayaçtan önce oluşturulmuş quizleri gösterir
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     questions = db.relationship('Question', backref='quiz', lazy=True, cascade="all, delete-orphan")
     
     # DÜZELTME: backref parametresi kaldırıldı, çünkü UserQuizAttempt modelinde manuel olarak tanımlı.
     # Quiz silindiğinde ilgili UserQuizAttempt'leri de silmek için cascade hala geçerli.
     attempts = db.relationship('UserQuizAttempt', lazy=True, cascade="all, delete-orphan") 
+    attempt_history = db.relationship('QuizAttemptHistory', lazy=True, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f'<Quiz {self.title}>'
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     question_text = db.Column(db.Text, nullable=False) 
     answers = db.relationship('Answer', backref='question', lazy=True, cascade="all, delete-orphan")
 
@@ -128,7 +459,7 @@ class Question(db.Model):
 
 class Answer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False, index=True)
     answer_text = db.Column(db.Text, nullable=False) 
     is_correct = db.Column(db.Boolean, default=False, nullable=False)
 
@@ -138,12 +469,12 @@ class Answer(db.Model):
 class UserQuizAttempt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     score = db.Column(db.Integer, nullable=False)
     attempt_date = db.Column(db.DateTime, default=datetime.utcnow)
-    # Veritabanı türüne göre JSON sütunu tanımla
-    # PostgreSQL için db.JSONB veya db.JSON, SQLite için db.Text
-    details = db.Column(db.JSON if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql') else db.Text) 
+    # Her soru için (soru_id, seçilen cevap_id) çifti, küçük-endian uint32 olarak paketlenir
+    # (cevap verilmeyen soru için 0). Metinler gösterim anında cevap anahtarından çözülür.
+    answers = db.Column(db.LargeBinary, nullable=False, default=b'')
 
     # DÜZELTME: Bu ilişki artık Quiz modelindeki 'attempts' backref'ine bakmalı.
     # 'primaryjoin' ve 'foreign_keys' ile ilişkiyi açıkça tanımlıyoruz.
@@ -154,39 +485,2411 @@ class UserQuizAttempt(db.Model):
     def __repr__(self):
         return f'<UserQuizAttempt UserID: {self.user_id}, QuizID: {self.quiz_id}, Score: {self.score}>'
 
-class Comment(db.Model):
+class QuizAttemptHistory(db.Model):
+    # Her gönderim buraya eklenir, satırlar güncellenmez. UserQuizAttempt bu günlüğün
+    # "son deneme" izdüşümüdür; panel quiz başına yine tek satır okur.
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
+    score = db.Column(db.Integer, nullable=False)
+    attempt_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    answers = db.Column(db.LargeBinary, nullable=False, default=b'')
+
+    __table_args__ = (db.Index('ix_quiz_attempt_history_user_quiz_date', 'user_id', 'quiz_id', 'attempt_date'),)
+
+    def __repr__(self):
+        return f'<QuizAttemptHistory UserID: {self.user_id}, QuizID: {self.quiz_id}, Score: {self.score}>'
+
+class Comment(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     alt_baslik_id = db.Column(db.Integer, db.ForeignKey('alt_baslik.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    parent_comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True)
+    parent_comment_id = db.Column(db.Integer, db.ForeignKey('comment.id'), nullable=True, index=True)
 
     replies = db.relationship('Comment', backref=db.backref('parent_comment_rel', remote_side=[id]), lazy=True, cascade="all, delete-orphan")
 
+    # Yorum dizileri: alt başlık + ana yorum filtresi, (created_at, id) keyset sıralaması
+    __table_args__ = (db.Index('ix_comment_thread', 'alt_baslik_id', 'parent_comment_id', 'created_at', 'id'),)
+
     def __repr__(self):
         return f'<Comment by {self.user_id} on AltBaslik {self.alt_baslik_id}: {self.content[:50]}...>'
 
 
+class CacheVersion(db.Model):
+    # Süreç içi önbelleklerin geçersiz kılınması için DB'de tutulan sürüm sayaçları.
+    # Tüm gunicorn worker'ları aynı satırı okuduğu için bir yazma hepsine yansır.
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}: {self.version}>'
+
+
+# --- KATALOG AĞACI ---
+# Ders -> Konu -> AltBaslik hiyerarşisini (quiz ve materyaller dahil) sabit sayıda sorguyla
+# yükleyip şablonlara salt okunur bir ağaç olarak veriyoruz. Böylece şablonlardaki
+# her ilişki erişimi ayrı bir lazy SELECT'e dönüşmüyor.
+
+CatalogDers = namedtuple('CatalogDers', 'id name konular')
+CatalogKonu = namedtuple('CatalogKonu', 'id name ders_id alt_basliklar')
+CatalogAltBaslik = namedtuple('CatalogAltBaslik', 'id name video_link konu_id quiz materials')
+CatalogQuiz = namedtuple('CatalogQuiz', 'id title quiz_type alt_baslik_id version question_count')
+CatalogMaterial = namedtuple('CatalogMaterial', 'id alt_baslik_id filename original_filename uploaded_at blob_digest')
+
+def load_catalog_tree():
+    """Tüm kataloğu 5 sorguda yükler; katalog büyüse de sorgu sayısı değişmez."""
+    ders_rows = db.session.query(Ders.id, Ders.name).order_by(Ders.name).all()
+    konu_rows = db.session.query(Konu.id, Konu.name, Konu.ders_id).order_by(Konu.id).all()
+    alt_baslik_rows = db.session.query(AltBaslik.id, AltBaslik.name, AltBaslik.video_link, AltBaslik.konu_id)\
+                                .order_by(AltBaslik.id).all()
+    # Sorular yüklenmez, sadece sayıları alınır
+    quiz_rows = db.session.query(Quiz.id, Quiz.title, Quiz.quiz_type, Quiz.alt_baslik_id, Quiz.version,
+                                 func.count(Question.id))\
+                          .outerjoin(Question, Question.quiz_id == Quiz.id)\
+                          .group_by(Quiz.id, Quiz.title, Quiz.quiz_type, Quiz.alt_baslik_id, Quiz.version)\
+                          .order_by(Quiz.id).all()
+    material_rows = db.session.query(Material.id, Material.alt_baslik_id, Material.filename,
+                                     Material.original_filename, Material.uploaded_at, Material.blob_digest)\
+                              .order_by(Material.id).all()
+
+    quiz_by_alt_baslik = {}
+    for row in quiz_rows:
+        # AltBaslik.quiz ilişkisi tekil (uselist=False); birden fazla varsa ilki kullanılır
+        quiz_by_alt_baslik.setdefault(row[3], CatalogQuiz(*row))
+
+    materials_by_alt_baslik = {}
+    for row in material_rows:
+        materials_by_alt_baslik.setdefault(row[1], []).append(CatalogMaterial(*row))
+
+    alt_basliklar_by_konu = {}
+    for ab_id, ab_name, video_link, konu_id in alt_baslik_rows:
+        alt_basliklar_by_konu.setdefault(konu_id, []).append(CatalogAltBaslik(
+            id=ab_id, name=ab_name, video_link=video_link, konu_id=konu_id,
+            quiz=quiz_by_alt_baslik.get(ab_id),
+            materials=tuple(materials_by_alt_baslik.get(ab_id, ()))
+        ))
+
+    konular_by_ders = {}
+    for konu_id, konu_name, ders_id in konu_rows:
+        konular_by_ders.setdefault(ders_id, []).append(CatalogKonu(
+            id=konu_id, name=konu_name, ders_id=ders_id,
+            alt_basliklar=tuple(alt_basliklar_by_konu.get(konu_id, ()))
+        ))
+
+    return tuple(
+        CatalogDers(id=ders_id, name=ders_name, konular=tuple(konular_by_ders.get(ders_id, ())))
+        for ders_id, ders_name in ders_rows
+    )
+
+
+# --- KATALOG ÖNBELLEĞİ ---
+
+CATALOG_VERSION_KEY = 'catalog'
+# admin_panel'de silindiğinde katalog sürümünü artıran kayıt türleri
+CATALOG_DELETE_TYPES = {'ders', 'konu', 'alt_baslik', 'quiz', 'material'}
+
+def get_cache_version(name):
+    return db.session.query(CacheVersion.version).filter_by(name=name).scalar() or 0
+
+def bump_cache_version(name):
+    """Sayacı çağıranın transaction'ı içinde artırır; commit ile birlikte yayınlanır."""
+    result = db.session.execute(
+        update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.session.add(CacheVersion(name=name, version=1))
+
+def next_cache_version(name):
+    """Sayacı artırıp yeni değeri döner; silinip yeniden kullanılan id'ler için de tekil sürüm sağlar."""
+    bump_cache_version(name)
+    db.session.flush()
+    return get_cache_version(name)
+
+CatalogSnapshot = namedtuple('CatalogSnapshot', 'version dersler ders_by_id konu_by_id alt_baslik_by_id quiz_by_id')
+
+class CatalogCache:
+    """Katalog ağacının süreç boyunca yaşayan, değişmez anlık görüntüsü.
+
+    Her istekte sadece sürüm sayacı okunur; sayaç değişmişse ağaç yeniden yüklenir.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self):
+        version = get_cache_version(CATALOG_VERSION_KEY)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            dersler = load_catalog_tree()
+            konular = [konu for ders in dersler for konu in ders.konular]
+            alt_basliklar = [ab for konu in konular for ab in konu.alt_basliklar]
+            snapshot = CatalogSnapshot(
+                version=version,
+                dersler=dersler,
+                ders_by_id=MappingProxyType({ders.id: ders for ders in dersler}),
+                konu_by_id=MappingProxyType({konu.id: konu for konu in konular}),
+                alt_baslik_by_id=MappingProxyType({ab.id: ab for ab in alt_basliklar}),
+                quiz_by_id=MappingProxyType({ab.quiz.id: ab.quiz for ab in alt_basliklar if ab.quiz})
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'version': self._snapshot.version if self._snapshot else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+catalog_cache = CatalogCache()
+
+
+# --- KATALOG API ---
+# Aynı katalog sürümü için aynı kaynak bayt bayt aynı gövdeyi üretir; bu yüzden ETag güçlüdür
+# ve serileştirilmiş gövde sürüm değişene kadar yeniden kullanılabilir.
+
+CATALOG_API_REVISION = 'v1'
+
+def serialize_catalog_quiz(quiz):
+    if quiz is None:
+        return None
+    return {'id': quiz.id, 'title': quiz.title, 'quiz_type': quiz.quiz_type, 'version': quiz.version,
+            'question_count': quiz.question_count}
+
+def serialize_catalog_alt_baslik(alt_baslik):
+    return {
+        'id': alt_baslik.id,
+        'name': alt_baslik.name,
+        'video_link': alt_baslik.video_link,
+        'quiz': serialize_catalog_quiz(alt_baslik.quiz),
+        'materials': [{
+            'id': material.id,
+            'original_filename': material.original_filename,
+            'uploaded_at': material.uploaded_at.isoformat() if material.uploaded_at else None,
+            'download_url': url_for('download_file', filename=material.filename)
+        } for material in alt_baslik.materials]
+    }
+
+def serialize_catalog_konu(konu):
+    return {'id': konu.id, 'name': konu.name, 'ders_id': konu.ders_id,
+            'alt_basliklar': [serialize_catalog_alt_baslik(ab) for ab in konu.alt_basliklar]}
+
+def serialize_catalog_ders(ders):
+    return {'id': ders.id, 'name': ders.name, 'konular': [serialize_catalog_konu(konu) for konu in ders.konular]}
+
+class CatalogJsonCache:
+    """Geçerli katalog sürümü için kaynak adı -> serileştirilmiş JSON gövdesi."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._bodies = {}
+
+    def get(self, snapshot, resource, build):
+        with self._lock:
+            if self._version != snapshot.version:
+                self._version = snapshot.version
+                self._bodies = {}
+            body = self._bodies.get(resource)
+        if body is None:
+            payload = dict(build(), catalog_version=snapshot.version)
+            body = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            with self._lock:
+                if self._version == snapshot.version:
+                    self._bodies[resource] = body
+        return body
+
+catalog_json_cache = CatalogJsonCache()
+
+def catalog_api_response(snapshot, resource, build):
+    """If-None-Match eşleşirse gövdesiz 304, aksi halde önbellekteki JSON gövdesi döner."""
+    etag = f"catalog-{CATALOG_API_REVISION}-{snapshot.version}-{resource}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(catalog_json_cache.get(snapshot, resource, build), mimetype='application/json')
+    response.set_etag(etag)
+    max_age = app.config['CATALOG_API_MAX_AGE']
+    # Katalog giriş gerektirir; paylaşılan önbelleklerde tutulmamalı
+    response.headers['Cache-Control'] = f"private, max-age={max_age}" if max_age > 0 else 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+# --- ŞABLON PARÇA ÖNBELLEĞİ ---
+# Kullanıcıya bağlı olmayan pahalı şablon bölümleri bir kez render edilip saklanır:
+#   {% cache 'ders_secici', catalog_version, selected_ders_id %} ... {% endcache %}
+# İlk argüman bölüm adı, ikincisi veri sürümü; kalanlar anahtara eklenir. Sürüm değişince
+# eski girdiler kullanılmaz ve LRU sırasıyla düşer. Bölüm içine kullanıcıya özel veri konmamalı.
+
+ANNOUNCEMENT_VERSION_KEY = 'announcement'
+
+class FragmentCache:
+    """(bölüm, sürüm, ...) -> HTML; toplam boyut max_bytes'ı aşınca en eski girdiler atılır."""
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds_saved = 0.0
+
+    def render(self, key, caller):
+        if not self.app.config['FRAGMENT_CACHE_ENABLED']:
+            return caller()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.render_seconds_saved += entry[2]
+                return Markup(entry[0])
+        start = time.perf_counter()
+        html = str(caller())
+        render_seconds = time.perf_counter() - start
+        size = len(html.encode('utf-8'))
+        with self._lock:
+            self.misses += 1
+            if size <= self.app.config['FRAGMENT_CACHE_MAX_BYTES']:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._bytes -= previous[1]
+                self._entries[key] = (html, size, render_seconds)
+                self._bytes += size
+                while self._bytes > self.app.config['FRAGMENT_CACHE_MAX_BYTES']:
+                    self._bytes -= self._entries.popitem(last=False)[1][1]
+                    self.evictions += 1
+        return Markup(html)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'render_ms_saved': round(self.render_seconds_saved * 1000, 1)
+        }
+
+fragment_cache = FragmentCache(app)
+
+class FragmentCacheExtension(Extension):
+    """{% cache bölüm, sürüm[, anahtar...] %}...{% endcache %} etiketi."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        if len(key) < 2:
+            parser.fail("cache etiketi en az bölüm adı ve sürüm ister", lineno)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.Tuple(key, 'load')]), [], [], body)\
+                    .set_lineno(lineno)
+
+    def _render(self, key, caller):
+        return fragment_cache.render(key, caller)
+
+app.jinja_env.add_extension(FragmentCacheExtension)
+
+def load_questions_by_quiz(quiz_ids):
+    """quiz_id -> cevaplarıyla birlikte sorular (id sırasıyla); iki sorguda yüklenir."""
+    questions_by_quiz = {}
+    questions = Question.query.filter(Question.quiz_id.in_(quiz_ids))\
+                              .options(selectinload(Question.answers))\
+                              .order_by(Question.id).all()
+    for question in questions:
+        questions_by_quiz.setdefault(question.quiz_id, []).append(question)
+    return questions_by_quiz
+
+def load_active_announcements():
+    # Şablondaki duyuru bölümü önbellekte yoksa çağrılır
+    return Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).all()
+
+# --- ARAMA ---
+# Ders, konu, alt başlık ve yorumlarda tam metin arama. Metin hem dizine yazılırken hem de
+# sorguda aynı şekilde normalleştirilir: Türkçe büyük/küçük harf (İ/ı) ve aksanlar (ğ, ş, ç,
+# ö, ü) katlanır; 'IŞIK', 'ışık' ve 'isik' aynı terimdir. Dizin ORM yazımlarıyla aynı
+# transaction içinde güncellenir; toplu (Core) yazımlardan sonra `flask reindex-search` çalıştırılır.
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_TERMS = 8
+SEARCH_REINDEX_BATCH_SIZE = 5000
+SEARCH_SNIPPET_LENGTH = 200
+SEARCH_TERM_PATTERN = re.compile(r'[^\W_]+')
+# Türkçe harfler doğrudan ASCII karşılığına katlanır (I/İ/ı -> i); diğer aksanlı harfler için NFKD
+SEARCH_CHAR_FOLD = str.maketrans('İIıÇçĞğÖöŞşÜüÂâÎîÛû', 'iiiccggoossuuaaiiuu')
+
+SearchHit = namedtuple('SearchHit', 'kind ref_id alt_baslik_id rank')
+
+def normalize_search_text(text):
+    text = (text or '').translate(SEARCH_CHAR_FOLD).lower()
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+        text = text.translate(SEARCH_CHAR_FOLD)
+    return text
+
+def search_query_terms(query):
+    return SEARCH_TERM_PATTERN.findall(normalize_search_text(query))[:SEARCH_MAX_TERMS]
+
+# Model -> (kind, ref_id, alt_baslik_id, başlık, gövde)
+SEARCH_DOCUMENT_BUILDERS = {
+    Ders: lambda ders: ('ders', ders.id, None, ders.name, ''),
+    Konu: lambda konu: ('konu', konu.id, None, konu.name, ''),
+    AltBaslik: lambda alt_baslik: ('alt_baslik', alt_baslik.id, alt_baslik.id, alt_baslik.name, ''),
+    Comment: lambda comment: ('comment', comment.id, comment.alt_baslik_id, '', comment.content),
+}
+# Değiştiğinde belgenin yeniden yazılmasını gerektiren alanlar (ör. video_link değişikliği dizine dokunmaz)
+SEARCH_INDEXED_ATTRIBUTES = {Ders: ('name',), Konu: ('name',), AltBaslik: ('name',),
+                             Comment: ('content', 'alt_baslik_id')}
+
+def search_document_row(kind, ref_id, alt_baslik_id, title, body):
+    return {'kind': kind, 'ref_id': ref_id, 'alt_baslik_id': alt_baslik_id,
+            'title': normalize_search_text(title), 'body': normalize_search_text(body)}
+
+def _index_search_document(mapper, connection, target):
+    row = search_document_row(*SEARCH_DOCUMENT_BUILDERS[mapper.class_](target))
+    connection.execute(insert(SearchDocument.__table__).values(row))
+
+def _reindex_search_document(mapper, connection, target):
+    state = db.inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in SEARCH_INDEXED_ATTRIBUTES[mapper.class_]):
+        return
+    row = search_document_row(*SEARCH_DOCUMENT_BUILDERS[mapper.class_](target))
+    table = SearchDocument.__table__
+    result = connection.execute(update(table).where(table.c.kind == row['kind'], table.c.ref_id == row['ref_id'])
+                                .values(row))
+    if result.rowcount == 0:
+        # Toplu (Core) eklenmiş ve henüz dizine alınmamış kayıt
+        connection.execute(insert(table).values(row))
+
+def _unindex_search_document(mapper, connection, target):
+    kind, ref_id = SEARCH_DOCUMENT_BUILDERS[mapper.class_](target)[:2]
+    table = SearchDocument.__table__
+    connection.execute(delete(table).where(table.c.kind == kind, table.c.ref_id == ref_id))
+
+for _model in SEARCH_DOCUMENT_BUILDERS:
+    event.listen(_model, 'after_insert', _index_search_document)
+    event.listen(_model, 'after_update', _reindex_search_document)
+    event.listen(_model, 'after_delete', _unindex_search_document)
+
+def reindex_search(batch_size=SEARCH_REINDEX_BATCH_SIZE):
+    """Dizini kaynak tablolardan baştan kurar; çağıran commit eder. Tür başına belge sayısını döner."""
+    table = SearchDocument.__table__
+    sqlite = db.engine.dialect.name == 'sqlite'
+    if sqlite:
+        # Satır başına tetikleyici yerine FTS tablosu sonda tek seferde kurulur (SQLite'ta DDL transaction içindedir)
+        for trigger in SEARCH_FTS_TRIGGERS:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    db.session.execute(delete(table))
+    sources = [
+        ('ders', select(Ders.id, db.literal(None), Ders.name, db.literal(''))),
+        ('konu', select(Konu.id, db.literal(None), Konu.name, db.literal(''))),
+        ('alt_baslik', select(AltBaslik.id, AltBaslik.id, AltBaslik.name, db.literal(''))),
+        ('comment', select(Comment.id, Comment.alt_baslik_id, db.literal(''), Comment.content)),
+    ]
+    counts = {}
+    for kind, statement in sources:
+        counts[kind] = 0
+        last_id = 0
+        id_column = statement.selected_columns[0]
+        while True:
+            rows = db.session.execute(statement.where(id_column > last_id).order_by(id_column).limit(batch_size)).all()
+            if not rows:
+                break
+            db.session.execute(insert(table), [search_document_row(kind, *row) for row in rows])
+            counts[kind] += len(rows)
+            last_id = rows[-1][0]
+    if sqlite:
+        db.session.execute(text("INSERT INTO search_fts(search_fts) VALUES ('rebuild')"))
+        for statement in SEARCH_FTS_TRIGGERS.values():
+            db.session.execute(text(statement))
+    return counts
+
+def search_documents(query, page=1, per_page=SEARCH_PAGE_SIZE):
+    """Sıralı SearchHit listesi ve sonraki sayfanın olup olmadığını döner."""
+    terms = search_query_terms(query)
+    if not terms:
+        return [], False
+    params = {'limit': per_page + 1, 'offset': (page - 1) * per_page}
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # Terimler sadece harf/rakam içerir; tırnak içinde önek sorgusu olarak güvenle birleştirilir
+        params['match'] = ' '.join(f'"{term}"*' for term in terms)
+        statement = text(
+            "SELECT d.kind, d.ref_id, d.alt_baslik_id, bm25(search_fts, 10.0, 1.0) AS rank "
+            "FROM search_fts JOIN search_document d ON d.id = search_fts.rowid "
+            "WHERE search_fts MATCH :match ORDER BY rank, d.id LIMIT :limit OFFSET :offset")
+    elif dialect == 'postgresql':
+        params['match'] = ' & '.join(f'{term}:*' for term in terms)
+        statement = text(
+            "SELECT kind, ref_id, alt_baslik_id, -ts_rank(tsv, to_tsquery('simple', :match)) AS rank "
+            "FROM search_document WHERE tsv @@ to_tsquery('simple', :match) "
+            "ORDER BY rank, id LIMIT :limit OFFSET :offset")
+    else:
+        # Tam metin desteği olmayan veritabanları: normalleştirilmiş metinde tarama
+        conditions = [or_(SearchDocument.title.contains(term), SearchDocument.body.contains(term)) for term in terms]
+        statement = select(SearchDocument.kind, SearchDocument.ref_id, SearchDocument.alt_baslik_id, db.literal(0))\
+            .where(and_(*conditions)).order_by(SearchDocument.id).limit(params['limit']).offset(params['offset'])
+    rows = db.session.execute(statement, params).all()
+    return [SearchHit(*row) for row in rows[:per_page]], len(rows) > per_page
+
+def build_search_results(hits):
+    """Dizin sonuçlarını katalog anlık görüntüsüyle görüntülenebilir kayıtlara çevirir.
+
+    Katalogda artık bulunmayan (dizinde eskimiş) kayıtlar atlanır.
+    """
+    catalog = catalog_cache.get()
+    comment_ids = [hit.ref_id for hit in hits if hit.kind == 'comment']
+    comments = {}
+    if comment_ids:
+        comments = {row.id: row for row in db.session.query(Comment.id, Comment.content, Comment.created_at,
+                                                             User.username)
+                                                      .join(User, Comment.user_id == User.id)
+                                                      .filter(Comment.id.in_(comment_ids))}
+    results = []
+    for hit in hits:
+        ders = konu = alt_baslik = None
+        if hit.kind == 'ders':
+            ders = catalog.ders_by_id.get(hit.ref_id)
+        elif hit.kind == 'konu':
+            konu = catalog.konu_by_id.get(hit.ref_id)
+        else:
+            alt_baslik = catalog.alt_baslik_by_id.get(hit.alt_baslik_id)
+            konu = catalog.konu_by_id.get(alt_baslik.konu_id) if alt_baslik else None
+        if konu:
+            ders = catalog.ders_by_id.get(konu.ders_id)
+        if ders is None or (hit.kind == 'comment' and hit.ref_id not in comments):
+            continue
+        result = {
+            'kind': hit.kind,
+            'id': hit.ref_id,
+            'ders': {'id': ders.id, 'name': ders.name},
+            'konu': {'id': konu.id, 'name': konu.name} if konu else None,
+            'alt_baslik': {'id': alt_baslik.id, 'name': alt_baslik.name} if alt_baslik else None,
+            'url': url_for('user_panel', ders_id=ders.id, konu_id=konu.id if konu else None)
+        }
+        if hit.kind == 'comment':
+            comment = comments[hit.ref_id]
+            result.update(title=comment.username, snippet=comment.content[:SEARCH_SNIPPET_LENGTH],
+                          created_at=comment.created_at.isoformat() if comment.created_at else None)
+            result['url'] += f'#yorumlar{alt_baslik.id}'
+        else:
+            result['title'] = (alt_baslik or konu or ders).name
+        results.append(result)
+    return results
+
+@app.cli.command("reindex-search")
+def reindex_search_command():
+    """Arama dizinini Ders/Konu/AltBaslik/Comment tablolarından yeniden kurar."""
+    start = time.perf_counter()
+    counts = reindex_search()
+    db.session.commit()
+    print(f"Arama dizini yeniden kuruldu ({time.perf_counter() - start:.1f} sn): "
+          + ', '.join(f"{kind} {count}" for kind, count in counts.items()))
+
+# --- İLERLEME ÖZETLERİ ---
+
+def _upsert_counts(model, key_columns, rows):
+    """rows içindeki (anahtarlar + delta) değerlerini completed_count'a ekler, satır yoksa oluşturur."""
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_func = sqlite_insert if dialect == 'sqlite' else postgresql.insert
+        for row in rows:
+            stmt = insert_func(model).values(**row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={'completed_count': model.__table__.c.completed_count + stmt.excluded.completed_count}
+            )
+            db.session.execute(stmt)
+        return
+    for row in rows:
+        keys = {column: row[column] for column in key_columns}
+        result = db.session.execute(update(model).filter_by(**keys)
+                                    .values(completed_count=model.completed_count + row['completed_count']))
+        if result.rowcount == 0:
+            db.session.add(model(**row))
+
+def adjust_progress_summaries(user_deltas, konu_id, ders_id):
+    """user_deltas: {user_id: delta}. Konu/ders özetlerini ve ders toplamını birlikte günceller."""
+    user_deltas = {user_id: delta for user_id, delta in user_deltas.items() if delta}
+    if not user_deltas:
+        return
+    _upsert_counts(KonuProgressSummary, ['user_id', 'konu_id'],
+                   [dict(user_id=u, konu_id=konu_id, completed_count=d) for u, d in user_deltas.items()])
+    _upsert_counts(DersProgressSummary, ['user_id', 'ders_id'],
+                   [dict(user_id=u, ders_id=ders_id, completed_count=d) for u, d in user_deltas.items()])
+    _upsert_counts(DersCompletionTotal, ['ders_id'],
+                   [dict(ders_id=ders_id, completed_count=sum(user_deltas.values()))])
+
+def _users_completed(alt_baslik_id):
+    return [row[0] for row in db.session.query(UserProgress.user_id).filter_by(alt_baslik_id=alt_baslik_id)]
+
+def move_alt_baslik_progress(alt_baslik_id, old_konu_id, old_ders_id, new_konu_id, new_ders_id):
+    if old_konu_id == new_konu_id:
+        return
+    user_ids = _users_completed(alt_baslik_id)
+    adjust_progress_summaries({u: -1 for u in user_ids}, old_konu_id, old_ders_id)
+    adjust_progress_summaries({u: 1 for u in user_ids}, new_konu_id, new_ders_id)
+
+def remove_alt_baslik_progress(alt_baslik_id, konu_id, ders_id):
+    adjust_progress_summaries({u: -1 for u in _users_completed(alt_baslik_id)}, konu_id, ders_id)
+
+def move_konu_progress(konu_id, old_ders_id, new_ders_id):
+    if old_ders_id == new_ders_id:
+        return
+    counts = dict(db.session.query(KonuProgressSummary.user_id, KonuProgressSummary.completed_count)
+                            .filter_by(konu_id=konu_id))
+    for user_id, count in counts.items():
+        _upsert_counts(DersProgressSummary, ['user_id', 'ders_id'],
+                       [dict(user_id=user_id, ders_id=old_ders_id, completed_count=-count),
+                        dict(user_id=user_id, ders_id=new_ders_id, completed_count=count)])
+    moved = sum(counts.values())
+    _upsert_counts(DersCompletionTotal, ['ders_id'], [dict(ders_id=old_ders_id, completed_count=-moved),
+                                                     dict(ders_id=new_ders_id, completed_count=moved)])
+
+def remove_konu_progress(konu_id, ders_id):
+    counts = dict(db.session.query(KonuProgressSummary.user_id, KonuProgressSummary.completed_count)
+                            .filter_by(konu_id=konu_id))
+    _upsert_counts(DersProgressSummary, ['user_id', 'ders_id'],
+                   [dict(user_id=u, ders_id=ders_id, completed_count=-c) for u, c in counts.items()])
+    _upsert_counts(DersCompletionTotal, ['ders_id'], [dict(ders_id=ders_id, completed_count=-sum(counts.values()))])
+    KonuProgressSummary.query.filter_by(konu_id=konu_id).delete(synchronize_session=False)
+
+def remove_ders_progress(ders_id):
+    konu_ids = select(Konu.id).where(Konu.ders_id == ders_id)
+    KonuProgressSummary.query.filter(KonuProgressSummary.konu_id.in_(konu_ids)).delete(synchronize_session=False)
+    DersProgressSummary.query.filter_by(ders_id=ders_id).delete(synchronize_session=False)
+    DersCompletionTotal.query.filter_by(ders_id=ders_id).delete(synchronize_session=False)
+
+def remove_user_progress(user_id):
+    counts = db.session.query(DersProgressSummary.ders_id, DersProgressSummary.completed_count)\
+                       .filter_by(user_id=user_id).all()
+    _upsert_counts(DersCompletionTotal, ['ders_id'], [dict(ders_id=d, completed_count=-c) for d, c in counts])
+    KonuProgressSummary.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    DersProgressSummary.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+def remove_progress_for_deleted(delete_type, item):
+    # admin_panel silme yolunda, ORM cascade'i ilerleme satırlarını silmeden önce çağrılır
+    if delete_type == 'alt_baslik':
+        remove_alt_baslik_progress(item.id, item.konu_id, item.konu.ders_id)
+    elif delete_type == 'konu':
+        remove_konu_progress(item.id, item.ders_id)
+    elif delete_type == 'ders':
+        remove_ders_progress(item.id)
+    elif delete_type == 'user':
+        remove_user_progress(item.id)
+
+def computed_progress_summaries():
+    """Özetleri ham UserProgress satırlarından hesaplar: (konu, ders, toplam) sözlükleri."""
+    konu_counts = {(u, k): c for u, k, c in db.session.query(UserProgress.user_id, AltBaslik.konu_id, func.count())
+                   .join(AltBaslik, AltBaslik.id == UserProgress.alt_baslik_id)
+                   .group_by(UserProgress.user_id, AltBaslik.konu_id)}
+    ders_counts = {(u, d): c for u, d, c in db.session.query(UserProgress.user_id, Konu.ders_id, func.count())
+                   .join(AltBaslik, AltBaslik.id == UserProgress.alt_baslik_id)
+                   .join(Konu, Konu.id == AltBaslik.konu_id)
+                   .group_by(UserProgress.user_id, Konu.ders_id)}
+    totals = {}
+    for (user_id, ders_id), count in ders_counts.items():
+        totals[ders_id] = totals.get(ders_id, 0) + count
+    return konu_counts, ders_counts, totals
+
+def stored_progress_summaries():
+    konu_counts = {(u, k): c for u, k, c in db.session.query(KonuProgressSummary.user_id, KonuProgressSummary.konu_id,
+                                                             KonuProgressSummary.completed_count) if c}
+    ders_counts = {(u, d): c for u, d, c in db.session.query(DersProgressSummary.user_id, DersProgressSummary.ders_id,
+                                                             DersProgressSummary.completed_count) if c}
+    totals = {d: c for d, c in db.session.query(DersCompletionTotal.ders_id, DersCompletionTotal.completed_count) if c}
+    return konu_counts, ders_counts, totals
+
+def rebuild_progress_summary_tables(expected=None):
+    """Özet tablolarını toplu olarak yeniden yazar; sonuç ham satırlarla eşleşiyorsa True döner."""
+    expected = expected or computed_progress_summaries()
+    konu_counts, ders_counts, totals = expected
+    KonuProgressSummary.query.delete()
+    DersProgressSummary.query.delete()
+    DersCompletionTotal.query.delete()
+    if konu_counts:
+        db.session.execute(KonuProgressSummary.__table__.insert(),
+                           [dict(user_id=u, konu_id=k, completed_count=c) for (u, k), c in konu_counts.items()])
+    if ders_counts:
+        db.session.execute(DersProgressSummary.__table__.insert(),
+                           [dict(user_id=u, ders_id=d, completed_count=c) for (u, d), c in ders_counts.items()])
+    if totals:
+        db.session.execute(DersCompletionTotal.__table__.insert(),
+                           [dict(ders_id=d, completed_count=c) for d, c in totals.items()])
+    db.session.commit()
+    return stored_progress_summaries() == expected
+
+@app.cli.command("rebuild-progress-summaries")
+@click.option('--verify-only', is_flag=True, help='Sadece karşılaştır, tabloları yeniden yazma.')
+def rebuild_progress_summaries(verify_only):
+    """Recomputes progress summary tables from UserProgress and verifies them."""
+    expected = computed_progress_summaries()
+    names = ('konu özeti', 'ders özeti', 'ders toplamı')
+    mismatches = 0
+    for name, computed, stored in zip(names, expected, stored_progress_summaries()):
+        diff = {key for key in computed.keys() | stored.keys() if computed.get(key) != stored.get(key)}
+        mismatches += len(diff)
+        print(f"{name}: {len(computed)} satır, {len(diff)} farklı")
+    if verify_only:
+        if mismatches:
+            raise SystemExit(1)
+        return
+
+    if not rebuild_progress_summary_tables(expected):
+        print("HATA: Yeniden hesaplanan özetler ham satırlarla eşleşmiyor.")
+        raise SystemExit(1)
+    print("İlerleme özetleri yeniden oluşturuldu ve doğrulandı.")
+
+# --- ADMIN PANELİ İSTATİSTİKLERİ ---
+
+DashboardStats = namedtuple('DashboardStats', 'total_users active_users chart_labels chart_data computed_at')
+
+class DashboardStatsService:
+    """Admin paneli sayılarını arka plan thread'inde yenilenen bir anlık görüntüde tutar.
+
+    Sayfa sadece anlık görüntüyü okur; yazma işlemleri trigger() ile erken yenileme ister.
+    """
+
+    # Art arda gelen tetiklemeler bu süreden sık yenileme yapmaz
+    MIN_REFRESH_GAP = 2.0
+
+    def __init__(self, app):
+        self.app = app
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread_pid = None
+
+    @property
+    def interval(self):
+        return self.app.config['DASHBOARD_STATS_REFRESH_SECONDS']
+
+    def compute(self):
+        now = datetime.utcnow()
+        total_users = db.session.query(func.count(User.id)).scalar()
+        # Süreli ve süresi dolmamış hesaplar; (is_expired, expire_date) indeksinden sayılır
+        active_users = db.session.query(func.count(User.id))\
+            .filter(User.is_expired.is_(False), User.expire_date.isnot(None)).scalar()
+        course_completion_counts = db.session.query(
+            Ders.name,
+            DersCompletionTotal.completed_count
+        ).join(DersCompletionTotal, Ders.id == DersCompletionTotal.ders_id)\
+         .filter(DersCompletionTotal.completed_count > 0)\
+         .order_by(DersCompletionTotal.completed_count.desc())\
+         .all()
+        return DashboardStats(
+            total_users=total_users,
+            active_users=active_users,
+            chart_labels=tuple(row[0] for row in course_completion_counts),
+            chart_data=tuple(row[1] for row in course_completion_counts),
+            computed_at=now
+        )
+
+    def refresh(self):
+        with self._lock:
+            self._snapshot = self.compute()
+        return self._snapshot
+
+    def get(self):
+        if self.interval <= 0:
+            return self.compute()
+        self._ensure_thread()
+        return self._snapshot or self.refresh()
+
+    def trigger(self):
+        self._wake.set()
+
+    def _ensure_thread(self):
+        # Thread'ler fork'tan sağ çıkmaz; her worker süreci kendi thread'ini başlatır
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._run, name='dashboard-stats', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    self.refresh()
+            except Exception as e:
+                self.app.logger.error(f"HATA: Admin istatistikleri yenilenemedi: {e}")
+            time.sleep(self.MIN_REFRESH_GAP)
+
+dashboard_stats = DashboardStatsService(app)
+
+# --- QUIZ SONUÇLARI ---
+
+# Deneme cevapları soru başına 8 bayt: (question_id, answer_id) uint32 çifti
+ATTEMPT_ANSWER_PAIR = struct.Struct('<II')
+
+def pack_attempt_answers(answer_key, selections):
+    """Geçerli seçimleri soru sırasıyla paketler; başka soruya ait/bilinmeyen cevap 0 yazılır."""
+    packed = bytearray(ATTEMPT_ANSWER_PAIR.size * len(answer_key.question_ids))
+    for index, question_id in enumerate(answer_key.question_ids):
+        answer_id = selections.get(question_id)
+        owner = answer_key.answers.get(answer_id)
+        ATTEMPT_ANSWER_PAIR.pack_into(packed, index * ATTEMPT_ANSWER_PAIR.size, question_id,
+                                      answer_id if owner and owner[0] == index else 0)
+    return bytes(packed)
+
+def unpack_attempt_answers(packed):
+    """Paketlenmiş cevapları {question_id: answer_id veya None} sözlüğüne açar."""
+    return {question_id: answer_id or None
+            for question_id, answer_id in ATTEMPT_ANSWER_PAIR.iter_unpack(packed or b'')}
+
+def load_quiz_results(user_id, quiz_ids):
+    """Kullanıcının verilen quizlerdeki denemelerini tek sorguda, şablona hazır olarak döner.
+
+    Soru ve cevap metinleri önbellekteki cevap anahtarlarından çözülür.
+    """
+    if not quiz_ids:
+        return {}
+    rows = db.session.query(UserQuizAttempt.id, UserQuizAttempt.quiz_id, UserQuizAttempt.score,
+                            UserQuizAttempt.attempt_date, UserQuizAttempt.answers)\
+                     .filter(UserQuizAttempt.user_id == user_id, UserQuizAttempt.quiz_id.in_(quiz_ids))\
+                     .all()
+    quiz_by_id = catalog_cache.get().quiz_by_id
+    answer_keys = answer_key_cache.get_many([quiz_by_id[row[1]] for row in rows if row[1] in quiz_by_id])
+    results = {}
+    for attempt_id, quiz_id, score, attempt_date, answers in rows:
+        answer_key = answer_keys.get(quiz_id)
+        results[quiz_id] = {
+            'score': score,
+            'attempt_date': attempt_date,
+            'details': grade_quiz(answer_key, unpack_attempt_answers(answers))[2] if answer_key else [],
+            'id': attempt_id # Quiz denemesinin ID'si (silmek için)
+        }
+    return results
+
+def record_quiz_attempt(user_id, quiz_id, score, answers):
+    """Denemeyi geçmiş günlüğüne ekler ve son deneme izdüşümünü tek ifadeyle günceller."""
+    values = {'user_id': user_id, 'quiz_id': quiz_id, 'score': score,
+              'attempt_date': datetime.utcnow(), 'answers': answers}
+    db.session.execute(insert(QuizAttemptHistory).values(**values))
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_func = sqlite_insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert_func(UserQuizAttempt).values(**values)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['user_id', 'quiz_id'],
+            set_={key: stmt.excluded[key] for key in ('score', 'attempt_date', 'answers')}
+        ))
+        return
+    result = db.session.execute(update(UserQuizAttempt)
+                                .where(UserQuizAttempt.user_id == user_id, UserQuizAttempt.quiz_id == quiz_id)
+                                .values(score=values['score'], attempt_date=values['attempt_date'],
+                                        answers=values['answers']))
+    if result.rowcount == 0:
+        db.session.execute(insert(UserQuizAttempt).values(**values))
+
+
+QUIZ_HISTORY_TREND_LIMIT = 50
+
+def load_quiz_history_stats(user_id, quiz_ids):
+    """Quiz başına en iyi puan ve deneme sayısı; (user_id, quiz_id, attempt_date) indeksinden okunur."""
+    if not quiz_ids:
+        return {}
+    rows = db.session.query(QuizAttemptHistory.quiz_id, func.max(QuizAttemptHistory.score),
+                            func.count(QuizAttemptHistory.id))\
+                     .filter(QuizAttemptHistory.user_id == user_id, QuizAttemptHistory.quiz_id.in_(quiz_ids))\
+                     .group_by(QuizAttemptHistory.quiz_id).all()
+    return {quiz_id: {'best_score': best_score, 'attempt_count': attempt_count}
+            for quiz_id, best_score, attempt_count in rows}
+
+def load_quiz_score_trend(user_id, quiz_id, limit=QUIZ_HISTORY_TREND_LIMIT):
+    """Son `limit` denemenin puanları, eskiden yeniye. İndeks sırasıyla okunur, sıralama gerekmez."""
+    rows = db.session.query(QuizAttemptHistory.attempt_date, QuizAttemptHistory.score)\
+                     .filter(QuizAttemptHistory.user_id == user_id, QuizAttemptHistory.quiz_id == quiz_id)\
+                     .order_by(QuizAttemptHistory.attempt_date.desc())\
+                     .limit(limit).all()
+    return [{'attempt_date': attempt_date, 'score': score} for attempt_date, score in reversed(rows)]
+
+# --- QUIZ CEVAP ANAHTARLARI ---
+# submit_quiz her gönderimde soruları ve cevapları tek tek yüklemek yerine quizin derlenmiş
+# cevap anahtarını kullanır; paketlenmiş deneme cevaplarının metinleri de buradan çözülür.
+# Anahtar (quiz_id, version) ile saklanır; quiz değiştiğinde veya silindiğinde katalog
+# görüntüsündeki sürüm değişeceği için eski anahtar bir daha okunmaz.
+
+QUIZ_VERSION_KEY = 'quiz'
+ANSWER_KEY_CACHE_SIZE = 512
+
+# question_ids/question_texts/correct_answer_ids/correct_answer_texts soru sırasıyla hizalıdır;
+# answers: answer_id -> (soru sırası, cevap metni)
+AnswerKey = namedtuple('AnswerKey', 'quiz_id version question_ids question_texts correct_answer_ids '
+                                    'correct_answer_texts answers')
+
+def compile_answer_keys(catalog_quizzes):
+    """Verilen quizlerin cevap anahtarlarını tek sorguda derler: {quiz_id: AnswerKey}."""
+    versions = {quiz.id: quiz.version for quiz in catalog_quizzes}
+    if not versions:
+        return {}
+    rows = db.session.query(Question.quiz_id, Question.id, Question.question_text,
+                            Answer.id, Answer.answer_text, Answer.is_correct)\
+                     .outerjoin(Answer, Answer.question_id == Question.id)\
+                     .filter(Question.quiz_id.in_(versions))\
+                     .order_by(Question.quiz_id, Question.id, Answer.id).all()
+    parts = {quiz_id: ([], [], [], [], {}) for quiz_id in versions}
+    for quiz_id, question_id, question_text, answer_id, answer_text, is_correct in rows:
+        question_ids, question_texts, correct_ids, correct_texts, answers = parts[quiz_id]
+        if not question_ids or question_ids[-1] != question_id:
+            question_ids.append(question_id)
+            question_texts.append(question_text)
+            correct_ids.append(None)
+            correct_texts.append("Belirtilmedi")
+        if answer_id is None:
+            continue
+        answers[answer_id] = (len(question_ids) - 1, answer_text)
+        if is_correct:
+            correct_ids[-1] = answer_id
+            correct_texts[-1] = answer_text
+    return {
+        quiz_id: AnswerKey(quiz_id=quiz_id, version=versions[quiz_id], question_ids=tuple(question_ids),
+                           question_texts=tuple(question_texts), correct_answer_ids=tuple(correct_ids),
+                           correct_answer_texts=tuple(correct_texts), answers=MappingProxyType(answers))
+        for quiz_id, (question_ids, question_texts, correct_ids, correct_texts, answers) in parts.items()
+    }
+
+class AnswerKeyCache:
+    """Derlenmiş cevap anahtarlarının süreç içi, boyutu sınırlı LRU önbelleği."""
+
+    def __init__(self, max_entries=ANSWER_KEY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, catalog_quiz):
+        return self.get_many([catalog_quiz])[catalog_quiz.id]
+
+    def get_many(self, catalog_quizzes):
+        """Eksik anahtarları tek sorguda derler; {quiz_id: AnswerKey} döner."""
+        found = {}
+        missing = []
+        with self._lock:
+            for quiz in catalog_quizzes:
+                answer_key = self._entries.get((quiz.id, quiz.version))
+                if answer_key is None:
+                    missing.append(quiz)
+                    continue
+                self._entries.move_to_end((quiz.id, quiz.version))
+                self.hits += 1
+                found[quiz.id] = answer_key
+        if not missing:
+            return found
+        compiled = compile_answer_keys(missing)
+        with self._lock:
+            for answer_key in compiled.values():
+                self.misses += 1
+                self._entries[(answer_key.quiz_id, answer_key.version)] = answer_key
+                self._entries.move_to_end((answer_key.quiz_id, answer_key.version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        found.update(compiled)
+        return found
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+answer_key_cache = AnswerKeyCache()
+
+def grade_quiz(answer_key, selections):
+    """selections: question_id -> seçilen answer_id (veya None). Veritabanına dokunmaz.
+
+    (score, correct_count, details) döner; details eski submit_quiz çıktısıyla aynı biçimdedir.
+    """
+    correct_count = 0
+    details = []
+    for index, question_id in enumerate(answer_key.question_ids):
+        selected_answer_id = selections.get(question_id)
+        # Başka bir soruya ait ya da bilinmeyen cevap id'si "cevap verilmedi" sayılır
+        owner = answer_key.answers.get(selected_answer_id)
+        selected_text = owner[1] if owner and owner[0] == index else "Cevap verilmedi"
+        is_correct = owner is not None and owner[0] == index and selected_answer_id == answer_key.correct_answer_ids[index]
+        correct_count += is_correct
+        details.append({
+            'question_text': answer_key.question_texts[index],
+            'user_selected_answer': selected_text,
+            'correct_answer': answer_key.correct_answer_texts[index],
+            'is_correct': is_correct
+        })
+    total = len(answer_key.question_ids)
+    score = int((correct_count / total) * 100) if total > 0 else 0
+    return score, correct_count, details
+
+
+# --- YORUM DİZİLERİ ---
+# Görünen tüm alt başlıkların ana yorumları tek sorguda, yanıtlar ve yazar adları
+# toplu olarak yüklenir. Her dizi (created_at, id) üzerinden keyset sayfalama yapar.
+
+COMMENT_PAGE_SIZE = 20
+
+CommentView = namedtuple('CommentView', 'id user_id username content created_at parent_comment_id replies')
+CommentThread = namedtuple('CommentThread', 'alt_baslik_id comments next_cursor')
+
+def encode_comment_cursor(created_at, comment_id):
+    return f"{created_at.isoformat()}_{comment_id}"
+
+def decode_comment_cursor(cursor):
+    try:
+        created_at, comment_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except (AttributeError, ValueError):
+        return None
+
+def load_comment_threads(alt_baslik_ids, page_size=COMMENT_PAGE_SIZE, cursors=None):
+    """alt_baslik_id -> CommentThread sözlüğü döner; cursors ile bazı diziler daha eski sayfadan başlar."""
+    alt_baslik_ids = list(alt_baslik_ids)
+    if not alt_baslik_ids:
+        return {}
+    cursors = cursors or {}
+
+    # Her dizi için cursor'dan daha eski yorumlar; cursor'u olmayan diziler en yeniden başlar
+    thread_filters = []
+    for alt_baslik_id in alt_baslik_ids:
+        cursor = cursors.get(alt_baslik_id)
+        if cursor:
+            created_at, comment_id = cursor
+            thread_filters.append(and_(
+                Comment.alt_baslik_id == alt_baslik_id,
+                or_(Comment.created_at < created_at,
+                    and_(Comment.created_at == created_at, Comment.id < comment_id))
+            ))
+    uncursored_ids = [ab_id for ab_id in alt_baslik_ids if not cursors.get(ab_id)]
+    if uncursored_ids:
+        thread_filters.append(Comment.alt_baslik_id.in_(uncursored_ids))
+
+    # Dizi başına page_size + 1 satır: fazladan gelen satır bir sonraki sayfanın varlığını gösterir
+    row_number = func.row_number().over(
+        partition_by=Comment.alt_baslik_id,
+        order_by=(Comment.created_at.desc(), Comment.id.desc())
+    ).label('row_number')
+    ranked = select(Comment.id, Comment.user_id, Comment.alt_baslik_id, Comment.content,
+                    Comment.created_at, row_number)\
+                .where(Comment.parent_comment_id.is_(None), or_(*thread_filters))\
+                .subquery()
+    top_rows = db.session.execute(
+        select(ranked).where(ranked.c.row_number <= page_size + 1)
+                      .order_by(ranked.c.alt_baslik_id, ranked.c.row_number)
+    ).all()
+
+    rows_by_thread = {}
+    for row in top_rows:
+        rows_by_thread.setdefault(row.alt_baslik_id, []).append(row)
+
+    top_ids = [row.id for rows in rows_by_thread.values() for row in rows[:page_size]]
+    reply_rows = []
+    if top_ids:
+        reply_rows = db.session.query(Comment.id, Comment.user_id, Comment.content, Comment.created_at,
+                                      Comment.parent_comment_id)\
+                               .filter(Comment.parent_comment_id.in_(top_ids))\
+                               .order_by(Comment.created_at, Comment.id).all()
+
+    user_ids = {row.user_id for row in top_rows} | {row.user_id for row in reply_rows}
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+
+    replies_by_parent = {}
+    for row in reply_rows:
+        replies_by_parent.setdefault(row.parent_comment_id, []).append(CommentView(
+            id=row.id, user_id=row.user_id, username=usernames.get(row.user_id), content=row.content,
+            created_at=row.created_at, parent_comment_id=row.parent_comment_id, replies=()
+        ))
+
+    threads = {}
+    for alt_baslik_id in alt_baslik_ids:
+        rows = rows_by_thread.get(alt_baslik_id, [])
+        page = rows[:page_size]
+        comments = tuple(
+            CommentView(id=row.id, user_id=row.user_id, username=usernames.get(row.user_id), content=row.content,
+                        created_at=row.created_at, parent_comment_id=None,
+                        replies=tuple(replies_by_parent.get(row.id, ())))
+            for row in page
+        )
+        next_cursor = encode_comment_cursor(page[-1].created_at, page[-1].id) if len(rows) > page_size else None
+        threads[alt_baslik_id] = CommentThread(alt_baslik_id=alt_baslik_id, comments=comments, next_cursor=next_cursor)
+    return threads
+
+# --- QUIZ İÇE/DIŞA AKTARIM ---
+# Soru bankaları JSON veya CSV olarak taşınır. Alt başlık, "ders/konu/alt_baslik" adlarıyla
+# (kurulumlar arası taşımada) ya da alt_baslik_id ile belirtilir. İçe aktarma tek transaction
+# içinde, parti başına tek flush ile toplu INSERT kullanır.
+#
+# JSON: {"version": 1, "quizzes": [{"ders": .., "konu": .., "alt_baslik": .., "alt_baslik_id": ..,
+#        "title": .., "quiz_type": .., "questions": [{"text": .., "answers": [{"text": .., "correct": true}]}]}]}
+# CSV:  her satır bir cevap; aynı quiz_title + question_no satırları tek soruda birleşir.
+
+QUIZ_IMPORT_BATCH_SIZE = 1000
+QUIZ_EXPORT_FORMAT_VERSION = 1
+QUIZ_CSV_COLUMNS = ['ders', 'konu', 'alt_baslik', 'alt_baslik_id', 'quiz_title', 'quiz_type',
+                    'question_no', 'question_text', 'answer_text', 'is_correct']
+
+class QuizImportError(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} doğrulama hatası")
+        self.errors = errors
+
+def parse_quiz_json(stream):
+    # stream ikili (binary) dosya nesnesidir: yüklenen dosya veya 'rb' ile açılmış dosya
+    try:
+        data = json.load(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise QuizImportError([f"JSON okunamadı: {e}"])
+    quizzes = data.get('quizzes') if isinstance(data, dict) else data
+    if not isinstance(quizzes, list):
+        raise QuizImportError(["JSON içinde 'quizzes' listesi bulunamadı."])
+    return quizzes
+
+def parse_quiz_csv(stream):
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    quizzes = {}
+    errors = []
+    for line_no, row in enumerate(csv.DictReader(text_stream), start=2):
+        title = (row.get('quiz_title') or '').strip()
+        key = (row.get('alt_baslik_id') or '', row.get('ders') or '', row.get('konu') or '', row.get('alt_baslik') or '', title)
+        quiz = quizzes.get(key)
+        if quiz is None:
+            quiz = quizzes[key] = {
+                'ders': row.get('ders'), 'konu': row.get('konu'), 'alt_baslik': row.get('alt_baslik'),
+                'alt_baslik_id': row.get('alt_baslik_id'), 'title': title,
+                'quiz_type': row.get('quiz_type') or 'normal', 'questions': {}
+            }
+        question_no = (row.get('question_no') or '').strip()
+        if not question_no:
+            errors.append(f"Satır {line_no}: question_no boş.")
+            continue
+        question = quiz['questions'].setdefault(question_no, {'text': row.get('question_text'), 'answers': []})
+        question['answers'].append({
+            'text': row.get('answer_text'),
+            'correct': (row.get('is_correct') or '').strip().lower() in ('1', 'true', 'evet', 'yes', 'x')
+        })
+    if errors:
+        raise QuizImportError(errors)
+    for quiz in quizzes.values():
+        quiz['questions'] = list(quiz['questions'].values())
+    return list(quizzes.values())
+
+def _alt_baslik_lookup(catalog):
+    by_path = {}
+    for ders in catalog.dersler:
+        for konu in ders.konular:
+            for alt_baslik in konu.alt_basliklar:
+                by_path.setdefault((ders.name, konu.name, alt_baslik.name), []).append(alt_baslik.id)
+    return by_path
+
+def validate_quizzes(quizzes, replace=False):
+    """Quizleri doğrular ve alt başlıklarını çözer. Hata varsa hiçbir şey yazılmadan QuizImportError fırlatılır."""
+    catalog = catalog_cache.get()
+    by_path = _alt_baslik_lookup(catalog)
+    errors = []
+    resolved = []
+    seen_alt_basliklar = set()
+    for q_index, quiz in enumerate(quizzes, start=1):
+        where = f"Quiz {q_index}"
+        if not isinstance(quiz, dict):
+            errors.append(f"{where}: geçersiz kayıt.")
+            continue
+        title = (quiz.get('title') or '').strip()
+        where = f"Quiz {q_index} ('{title}')"
+        path = tuple((quiz.get(key) or '').strip() for key in ('ders', 'konu', 'alt_baslik'))
+        alt_baslik_id = None
+        if all(path):
+            candidates = by_path.get(path, [])
+            if len(candidates) == 1:
+                alt_baslik_id = candidates[0]
+            else:
+                errors.append(f"{where}: '{' / '.join(path)}' alt başlığı {'birden fazla' if candidates else 'bulunamadı'}.")
+        elif str(quiz.get('alt_baslik_id') or '').strip().isdigit():
+            alt_baslik_id = int(quiz['alt_baslik_id'])
+            if alt_baslik_id not in catalog.alt_baslik_by_id:
+                errors.append(f"{where}: {alt_baslik_id} numaralı alt başlık bulunamadı.")
+                alt_baslik_id = None
+        else:
+            errors.append(f"{where}: alt başlık belirtilmemiş (ders/konu/alt_baslik veya alt_baslik_id).")
+
+        if not title:
+            errors.append(f"{where}: quiz başlığı boş olamaz.")
+        if alt_baslik_id is not None:
+            if alt_baslik_id in seen_alt_basliklar:
+                errors.append(f"{where}: aynı alt başlık için dosyada birden fazla quiz var.")
+            elif catalog.alt_baslik_by_id[alt_baslik_id].quiz and not replace:
+                errors.append(f"{where}: alt başlığın zaten bir quizi var (değiştirmek için 'replace' seçin).")
+            seen_alt_basliklar.add(alt_baslik_id)
+
+        questions = []
+        for s_index, question in enumerate(quiz.get('questions') or [], start=1):
+            question_text = (question.get('text') or '').strip() if isinstance(question, dict) else ''
+            answers = [{'text': (a.get('text') or '').strip(), 'correct': bool(a.get('correct'))}
+                       for a in (question.get('answers') or []) if isinstance(a, dict)] if isinstance(question, dict) else []
+            if not question_text:
+                errors.append(f"{where}, soru {s_index}: soru metni boş.")
+            if len(answers) < 2 or any(not a['text'] for a in answers):
+                errors.append(f"{where}, soru {s_index}: en az iki dolu cevap gerekli.")
+            if sum(a['correct'] for a in answers) != 1:
+                errors.append(f"{where}, soru {s_index}: tam olarak bir doğru cevap olmalı.")
+            questions.append({'text': question_text, 'answers': answers})
+        if not questions:
+            errors.append(f"{where}: en az bir soru gerekli.")
+
+        resolved.append({'alt_baslik_id': alt_baslik_id, 'title': title,
+                         'quiz_type': (quiz.get('quiz_type') or 'normal').strip() or 'normal', 'questions': questions})
+    if errors:
+        raise QuizImportError(errors)
+    return resolved
+
+def delete_quizzes(quiz_ids):
+    """Quizleri soruları, cevapları ve denemeleriyle birlikte küme tabanlı DELETE'lerle siler."""
+    if not quiz_ids:
+        return
+    question_ids = select(Question.id).where(Question.quiz_id.in_(quiz_ids))
+    db.session.execute(delete(Answer).where(Answer.question_id.in_(question_ids)))
+    db.session.execute(delete(Question).where(Question.quiz_id.in_(quiz_ids)))
+    db.session.execute(delete(UserQuizAttempt).where(UserQuizAttempt.quiz_id.in_(quiz_ids)))
+    db.session.execute(delete(QuizAttemptHistory).where(QuizAttemptHistory.quiz_id.in_(quiz_ids)))
+    db.session.execute(delete(Quiz).where(Quiz.id.in_(quiz_ids)))
+
+def _insert_returning_ids(model, rows):
+    """Satırları toplu ekler ve oluşan id'leri parametre sırasıyla döner (iki ifade, satır sayısından bağımsız)."""
+    if not rows:
+        return []
+    if db.engine.dialect.name != 'sqlite':
+        result = db.session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+        return [row[0] for row in result]
+    # SQLite RETURNING satır sırasını garanti etmediği için sort_by_parameter_order satır başına
+    # INSERT'e düşer. Bunun yerine tek executemany yapılır: yazma kilidi transaction sonuna kadar
+    # bizde olduğu ve yeni rowid her zaman mevcut en büyük id'nin üstünde verildiği için en büyük
+    # len(rows) id bu satırlarındır ve artan sırada parametre sırasını verir.
+    db.session.execute(insert(model), rows)
+    ids = db.session.execute(select(model.id).order_by(model.id.desc()).limit(len(rows))).scalars().all()
+    return ids[::-1]
+
+def import_quizzes(quizzes, replace=False, batch_size=QUIZ_IMPORT_BATCH_SIZE):
+    """Doğrulanmış quizleri toplu ekler. Commit etmez; çağıran transaction'ı yönetir."""
+    quizzes = validate_quizzes(quizzes, replace=replace)
+    if replace:
+        alt_baslik_ids = [quiz['alt_baslik_id'] for quiz in quizzes]
+        delete_quizzes([row[0] for row in db.session.query(Quiz.id).filter(Quiz.alt_baslik_id.in_(alt_baslik_ids))])
+
+    quiz_version = next_cache_version(QUIZ_VERSION_KEY)
+    quiz_ids = _insert_returning_ids(Quiz, [
+        {'title': quiz['title'], 'alt_baslik_id': quiz['alt_baslik_id'], 'quiz_type': quiz['quiz_type'],
+         'version': quiz_version}
+        for quiz in quizzes
+    ])
+    pending = [(quiz_id, question) for quiz_id, quiz in zip(quiz_ids, quizzes) for question in quiz['questions']]
+    answer_count = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        question_ids = _insert_returning_ids(Question, [
+            {'quiz_id': quiz_id, 'question_text': question['text']} for quiz_id, question in batch
+        ])
+        answer_rows = [
+            {'question_id': question_id, 'answer_text': answer['text'], 'is_correct': answer['correct']}
+            for question_id, (quiz_id, question) in zip(question_ids, batch) for answer in question['answers']
+        ]
+        db.session.execute(insert(Answer), answer_rows)
+        answer_count += len(answer_rows)
+    return {'quizzes': len(quiz_ids), 'questions': len(pending), 'answers': answer_count, 'quiz_ids': quiz_ids}
+
+def _quiz_export_rows(alt_baslik_ids=None):
+    # Quiz -> soru -> cevap sırasıyla akış halinde okunur; bellekte her seferinde tek quiz tutulur
+    stmt = select(Quiz.id, Quiz.title, Quiz.quiz_type, Quiz.alt_baslik_id, Question.id, Question.question_text,
+                  Answer.answer_text, Answer.is_correct)\
+        .outerjoin(Question, Question.quiz_id == Quiz.id)\
+        .outerjoin(Answer, Answer.question_id == Question.id)\
+        .order_by(Quiz.id, Question.id, Answer.id)
+    if alt_baslik_ids:
+        stmt = stmt.where(Quiz.alt_baslik_id.in_(alt_baslik_ids))
+    return db.session.execute(stmt.execution_options(yield_per=QUIZ_IMPORT_BATCH_SIZE))
+
+def iter_exported_quizzes(alt_baslik_ids=None):
+    catalog = catalog_cache.get()
+    current = None
+    questions = {}
+    for quiz_id, title, quiz_type, alt_baslik_id, question_id, question_text, answer_text, is_correct in _quiz_export_rows(alt_baslik_ids):
+        if current is None or current['id'] != quiz_id:
+            if current is not None:
+                yield current
+            alt_baslik = catalog.alt_baslik_by_id.get(alt_baslik_id)
+            konu = catalog.konu_by_id.get(alt_baslik.konu_id) if alt_baslik else None
+            ders = catalog.ders_by_id.get(konu.ders_id) if konu else None
+            questions = {}
+            current = {'id': quiz_id, 'ders': ders.name if ders else None, 'konu': konu.name if konu else None,
+                       'alt_baslik': alt_baslik.name if alt_baslik else None, 'alt_baslik_id': alt_baslik_id,
+                       'title': title, 'quiz_type': quiz_type, 'questions': []}
+        if question_id is None:
+            continue
+        question = questions.get(question_id)
+        if question is None:
+            question = questions[question_id] = {'text': question_text, 'answers': []}
+            current['questions'].append(question)
+        if answer_text is not None:
+            question['answers'].append({'text': answer_text, 'correct': bool(is_correct)})
+    if current is not None:
+        yield current
+
+def export_quizzes_json(alt_baslik_ids=None):
+    yield f'{{"version": {QUIZ_EXPORT_FORMAT_VERSION}, "quizzes": ['
+    for index, quiz in enumerate(iter_exported_quizzes(alt_baslik_ids)):
+        quiz.pop('id')
+        yield (',' if index else '') + '\n' + json.dumps(quiz, ensure_ascii=False)
+    yield '\n]}\n'
+
+def export_quizzes_csv(alt_baslik_ids=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(QUIZ_CSV_COLUMNS)
+    for quiz in iter_exported_quizzes(alt_baslik_ids):
+        for question_no, question in enumerate(quiz['questions'], start=1):
+            for answer in question['answers']:
+                writer.writerow([quiz['ders'], quiz['konu'], quiz['alt_baslik'], quiz['alt_baslik_id'], quiz['title'],
+                                 quiz['quiz_type'], question_no, question['text'], answer['text'],
+                                 1 if answer['correct'] else 0])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+# --- MATERYAL DEPOSU ---
+# Yüklenen dosyalar sabit boyutlu parçalarla diske yazılırken sha256 ile özetlenir ve
+# UPLOAD_FOLDER/blobs/<ilk 2 karakter>/<digest> altında bir kez saklanır. Material satırları
+# blob'a referans verir; referans sayısı sıfıra düşen blob'lar silme yolunda ya da
+# gc-material-blobs komutuyla temizlenir.
+
+MATERIAL_CHUNK_SIZE = 64 * 1024
+# Yeni oluşturulan/yeniden kullanılan blob'lar bu süre boyunca çöp toplayıcıdan korunur
+MATERIAL_BLOB_GC_GRACE = timedelta(hours=1)
+
+def material_blob_root():
+    # send_from_directory ile aynı şekilde göreli yol uygulama köküne göre çözülür
+    return os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'blobs')
+
+def material_blob_path(digest):
+    return os.path.join(material_blob_root(), digest[:2], digest)
+
+def material_public_name(original_filename):
+    # URL'de kullanılan, malzeme başına tekil ad; aynı saniyede aynı adla yüklemeler çakışmaz
+    return f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{secrets.token_hex(4)}_{secure_filename(original_filename)}"
+
+def _ensure_blob_row(digest, size):
+    """Blob satırını ref_count=0 ile ekler; varsa created_at'i tazeleyip GC'den korur."""
+    values = {'digest': digest, 'size': size, 'ref_count': 0, 'created_at': datetime.utcnow()}
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_func = sqlite_insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert_func(MaterialBlob).values(**values)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=['digest'],
+                                                      set_={'created_at': stmt.excluded.created_at}))
+        return
+    result = db.session.execute(update(MaterialBlob).where(MaterialBlob.digest == digest)
+                                .values(created_at=values['created_at']))
+    if result.rowcount == 0:
+        db.session.execute(insert(MaterialBlob).values(**values))
+
+def store_material_stream(stream):
+    """Akışı parça parça geçici dosyaya yazarken özetler ve içerik adresli depoya taşır.
+
+    Dosya belleğe alınmaz. (digest, size) döner; blob satırı çağıranın transaction'ında oluşturulur.
+    """
+    tmp_dir = os.path.join(material_blob_root(), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            for chunk in iter(lambda: stream.read(MATERIAL_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+                size += len(chunk)
+        digest = hasher.hexdigest()
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    move_into_blob_store(tmp_path, digest, size)
+    return digest, size
+
+def move_into_blob_store(tmp_path, digest, size):
+    """Özetlenmiş dosyayı kopyalamadan (rename) depoya taşır; içerik zaten varsa dosyayı siler.
+
+    Blob satırı dosyaya bakılmadan önce bu transaction'da yazılır (satır kilitlenir). Aynı anda
+    son referansını kaybeden blob'u silen purge_unreferenced_blobs ya bu transaction'ın sonunu
+    bekler (ref_count artmış olur, silmez) ya da dosyasını silip commit ettikten sonra buraya
+    gelinir; her iki durumda da aşağıdaki kontrol dosyanın gerçek durumunu görür.
+    """
+    _ensure_blob_row(digest, size)
+    final_path = material_blob_path(digest)
+    try:
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _adjust_blob_refs(connection, digest, delta):
+    connection.execute(update(MaterialBlob.__table__).where(MaterialBlob.__table__.c.digest == digest)
+                       .values(ref_count=MaterialBlob.__table__.c.ref_count + delta))
+
+@event.listens_for(Material, 'after_insert')
+def _material_blob_acquire(mapper, connection, target):
+    if target.blob_digest:
+        _adjust_blob_refs(connection, target.blob_digest, 1)
+
+@event.listens_for(Material, 'after_delete')
+def _material_blob_release(mapper, connection, target):
+    # Ders/konu/alt başlık silinirken ORM cascade ile silinen materyaller de buradan geçer
+    if target.blob_digest:
+        _adjust_blob_refs(connection, target.blob_digest, -1)
+        db.session.info.setdefault('released_blobs', set()).add(target.blob_digest)
+
+def purge_unreferenced_blobs(digests=None):
+    """Referansı kalmamış blob'ları (verilmişse sadece digests içindekileri) siler ve commit eder.
+
+    Silinen blob sayısını döner. Koşullu DELETE sayesinde bu arada yeniden referans
+    alan blob silinmez; dosya, satır kilidi bırakılmadan (commit'ten önce) silinir ki aynı içeriği
+    yükleyen istek silinmek üzere olan dosyaya güvenmesin (bkz. move_into_blob_store).
+    """
+    query = db.session.query(MaterialBlob.digest).filter(MaterialBlob.ref_count <= 0)
+    if digests is not None:
+        if not digests:
+            return 0
+        query = query.filter(MaterialBlob.digest.in_(digests))
+    else:
+        query = query.filter(MaterialBlob.created_at < datetime.utcnow() - MATERIAL_BLOB_GC_GRACE)
+    removed = 0
+    for (digest,) in query.all():
+        result = db.session.execute(delete(MaterialBlob).where(MaterialBlob.digest == digest,
+                                                               MaterialBlob.ref_count <= 0))
+        if result.rowcount:
+            removed += 1
+            if os.path.exists(material_blob_path(digest)):
+                try:
+                    os.remove(material_blob_path(digest))
+                except OSError as e:
+                    # Kayıtsız kalan dosyayı gc-material-blobs temizler
+                    app.logger.error(f"HATA: Blob dosyası silinemedi {digest}: {e}")
+        db.session.commit()
+    return removed
+
+def purge_released_blobs():
+    """Bu oturumda serbest bırakılan blob'lardan referansı sıfıra inenleri temizler (commit sonrası)."""
+    return purge_unreferenced_blobs(db.session.info.pop('released_blobs', set()))
+
+@app.cli.command("gc-material-blobs")
+@click.option("--dry-run", is_flag=True, help="Sadece raporla, silme.")
+def gc_material_blobs(dry_run):
+    """Referans sayılarını yeniden hesaplar, yetim blob'ları ve dosyaları siler."""
+    counts = dict(db.session.query(Material.blob_digest, func.count(Material.id))
+                  .filter(Material.blob_digest.isnot(None)).group_by(Material.blob_digest).all())
+    fixed = 0
+    for digest, ref_count in db.session.query(MaterialBlob.digest, MaterialBlob.ref_count).all():
+        if ref_count != counts.get(digest, 0):
+            fixed += 1
+            if not dry_run:
+                db.session.execute(update(MaterialBlob).where(MaterialBlob.digest == digest)
+                                   .values(ref_count=counts.get(digest, 0)))
+    db.session.commit()
+
+    cutoff = time.time() - MATERIAL_BLOB_GC_GRACE.total_seconds()
+    known = {digest for (digest,) in db.session.query(MaterialBlob.digest)}
+    stray_files = []
+    root = material_blob_root()
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            in_tmp = os.path.basename(dirpath) == 'tmp'
+            if (in_tmp or name not in known) and os.path.getmtime(path) < cutoff:
+                stray_files.append(path)
+
+    orphan_count = db.session.query(func.count(MaterialBlob.digest))\
+                             .filter(MaterialBlob.ref_count <= 0,
+                                     MaterialBlob.created_at < datetime.utcnow() - MATERIAL_BLOB_GC_GRACE).scalar()
+    if dry_run:
+        print(f"{fixed} referans sayısı düzeltilecek, {orphan_count} yetim blob ve {len(stray_files)} kayıtsız dosya silinecek.")
+        return
+    removed = purge_unreferenced_blobs()
+    for path in stray_files:
+        os.remove(path)
+    stale_uploads = purge_stale_uploads()
+    print(f"{fixed} referans sayısı düzeltildi, {removed} yetim blob, {len(stray_files)} kayıtsız dosya "
+          f"ve {stale_uploads} yarım kalmış yükleme silindi.")
+
+@app.cli.command("migrate-materials-to-blobs")
+def migrate_materials_to_blobs():
+    """Eski düzende (UPLOAD_FOLDER/filename) saklanan materyalleri içerik adresli depoya taşır."""
+    moved = missing = 0
+    for material in Material.query.filter(Material.blob_digest.is_(None)).all():
+        legacy_path = os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], material.filename)
+        if not os.path.exists(legacy_path):
+            missing += 1
+            continue
+        with open(legacy_path, 'rb') as f:
+            digest, _ = store_material_stream(f)
+        material.blob_digest = digest
+        _adjust_blob_refs(db.session.connection(), digest, 1)
+        db.session.commit()
+        os.remove(legacy_path)
+        moved += 1
+    print(f"{moved} materyal taşındı, {missing} materyalin dosyası bulunamadı.")
+
+# --- MATERYAL İNDİRME ---
+# Blob dosyaları değişmez olduğundan ETag doğrudan içerik özetidir. Koşullu istekler (304)
+# ve Range istekleri desteklenir; istenirse baytları ön vekil gönderir. Paneldeki bağlantılar
+# kısa ömürlü imzalı jeton taşır; jeton geçerliyse Material sorgusu atlanır,
+# kullanıcının erişim süresi ise (önbellekteki bağlamdan) her istekte kontrol edilir.
+
+def _download_serializer():
+    return URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='material-download')
+
+def make_download_token(material, user_id):
+    return _download_serializer().dumps({'f': material.filename, 'd': material.blob_digest,
+                                         'n': material.original_filename, 'u': user_id})
+
+def read_download_token(token, filename, user_id):
+    """Jeton bu dosya ve kullanıcı için geçerliyse (digest, özgün ad) döner, değilse None."""
+    if not token:
+        return None
+    try:
+        claims = _download_serializer().loads(token, max_age=app.config['MATERIAL_DOWNLOAD_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return None
+    if not isinstance(claims, dict) or claims.get('f') != filename or claims.get('u') != user_id or not claims.get('d'):
+        return None
+    return claims['d'], claims.get('n') or filename
+
+@app.template_global()
+def material_download_url(material):
+    # İçerik adresli materyaller için imzalı bağlantı; eski düzendekiler ve süresi dolmuş
+    # kullanıcılar normal yoldan iner (orada yetki kontrolü yapılır)
+    user = current_user_context()
+    if material.blob_digest and user and not user.is_expired():
+        return url_for('download_file', filename=material.filename, t=make_download_token(material, user.id))
+    return url_for('download_file', filename=material.filename)
+
+def _attachment_disposition(download_name):
+    try:
+        download_name.encode('latin-1')
+        return f'attachment; filename="{download_name}"'
+    except UnicodeEncodeError:
+        fallback = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(download_name, safe="")}'
+
+def serve_material_blob(digest, download_name):
+    """Blob'u güçlü ETag/Last-Modified ile, koşullu ve Range isteklerini destekleyerek gönderir."""
+    path = material_blob_path(digest)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        abort(404)
+    offload = app.config['MATERIAL_DOWNLOAD_OFFLOAD']
+    if offload not in ('x-accel', 'x-sendfile'):
+        response = send_file(path, as_attachment=True, download_name=download_name, etag=digest,
+                             last_modified=stat.st_mtime, conditional=True, max_age=0)
+    else:
+        # Gövdeyi vekil gönderir; Range isteklerini de o karşılar. 304 kararı burada verilir.
+        response = Response(mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream')
+        response.set_etag(digest)
+        response.last_modified = stat.st_mtime
+        response.headers['Content-Disposition'] = _attachment_disposition(download_name)
+        if offload == 'x-accel':
+            response.headers['X-Accel-Redirect'] = app.config['MATERIAL_X_ACCEL_PREFIX'] + f"{digest[:2]}/{digest}"
+        else:
+            response.headers['X-Sendfile'] = path
+        response = response.make_conditional(request)
+    # Yetki gerektiren içerik: sadece tarayıcıda saklanır ve her kullanımda doğrulanır (304 ucuz)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# --- PARÇALI YÜKLEME ---
+# init -> parça yükleme (herhangi bir sırada, tekrar denenebilir) -> complete. Her parça önce
+# kendi geçici dosyasına akış halinde yazılır; boyutu ve sha256'sı doğrulandıktan sonra
+# UPLOAD_FOLDER/staging/<id> dosyasındaki konumuna kopyalanır. Başarısız bir tekrar deneme
+# böylece daha önce alınmış sağlam baytları bozmaz. Tamamlanırken parça özetleri yeniden
+# kontrol edilir ve dosya yeniden kopyalanmadan (rename) blob deposuna taşınır.
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+def upload_staging_path(upload_id):
+    return os.path.join(app.root_path, app.config['UPLOAD_FOLDER'], 'staging', upload_id)
+
+def create_upload_session(user_id, alt_baslik_id, filename, total_size, chunk_size=None):
+    filename = (filename or '').strip()
+    if not filename or not allowed_file(filename):
+        raise UploadError("Geçersiz dosya türü.")
+    if alt_baslik_id not in catalog_cache.get().alt_baslik_by_id:
+        raise UploadError("Alt başlık bulunamadı.", 404)
+    if not isinstance(total_size, int) or total_size <= 0 or total_size > app.config['UPLOAD_MAX_SIZE']:
+        raise UploadError("Dosya boyutu geçersiz veya izin verilen sınırın üzerinde.")
+    chunk_size = chunk_size or app.config['UPLOAD_CHUNK_SIZE']
+    if not isinstance(chunk_size, int) or not MATERIAL_CHUNK_SIZE <= chunk_size <= app.config['UPLOAD_CHUNK_SIZE_MAX']:
+        raise UploadError("Parça boyutu geçersiz.")
+
+    upload = UploadSession(id=secrets.token_hex(16), user_id=user_id, alt_baslik_id=alt_baslik_id,
+                           original_filename=filename, total_size=total_size, chunk_size=chunk_size)
+    staging_path = upload_staging_path(upload.id)
+    os.makedirs(os.path.dirname(staging_path), exist_ok=True)
+    # Seyrek dosya: parçalar doğrudan son konumlarına yazılır, birleştirme için kopya gerekmez
+    with open(staging_path, 'wb') as f:
+        f.truncate(total_size)
+    db.session.add(upload)
+    return upload
+
+def write_upload_chunk(upload, index, stream, expected_sha256):
+    """Parçayı istek gövdesinden okuyup doğrular ve hazırlama dosyasına yazar; gövde belleğe alınmaz."""
+    if upload.material_id:
+        raise UploadError("Yükleme zaten tamamlandı.", 409)
+    if not 0 <= index < upload.chunk_count:
+        raise UploadError("Parça numarası geçersiz.")
+    if not expected_sha256 or not re.fullmatch(r'[0-9a-fA-F]{64}', expected_sha256):
+        raise UploadError("X-Chunk-Sha256 başlığı eksik veya geçersiz.")
+    offset = index * upload.chunk_size
+    expected_size = min(upload.chunk_size, upload.total_size - offset)
+
+    staging_path = upload_staging_path(upload.id)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, part_path = tempfile.mkstemp(dir=os.path.dirname(staging_path), prefix=f'{upload.id}.{index}.')
+    try:
+        with os.fdopen(fd, 'w+b') as part:
+            while size <= expected_size:
+                piece = stream.read(min(MATERIAL_CHUNK_SIZE, expected_size + 1 - size))
+                if not piece:
+                    break
+                if size + len(piece) > expected_size:
+                    raise UploadError(f"Parça {index} beklenenden büyük ({expected_size} bayt).")
+                hasher.update(piece)
+                part.write(piece)
+                size += len(piece)
+            if size != expected_size:
+                raise UploadError(f"Parça {index} eksik: {size}/{expected_size} bayt.")
+            if hasher.hexdigest() != expected_sha256.lower():
+                raise UploadError(f"Parça {index} sağlama toplamı uyuşmuyor.", 422)
+            # Doğrulanmış parça son konumuna kopyalanır
+            part.seek(0)
+            with open(staging_path, 'r+b') as f:
+                f.seek(offset)
+                for piece in iter(lambda: part.read(MATERIAL_CHUNK_SIZE), b''):
+                    f.write(piece)
+    finally:
+        os.remove(part_path)
+    db.session.merge(UploadChunk(upload_id=upload.id, index=index, size=size, sha256=hasher.hexdigest()))
+
+def upload_status(upload):
+    received = sorted(index for (index,) in db.session.query(UploadChunk.index).filter_by(upload_id=upload.id))
+    received_set = set(received)
+    return {
+        'upload_id': upload.id,
+        'filename': upload.original_filename,
+        'total_size': upload.total_size,
+        'chunk_size': upload.chunk_size,
+        'chunk_count': upload.chunk_count,
+        'received': received,
+        'missing': [index for index in range(upload.chunk_count) if index not in received_set],
+        'material_id': upload.material_id
+    }
+
+def complete_upload(upload):
+    """Tüm parçalar geldiyse dosyayı özetleyip depoya taşır ve Material kaydı oluşturur."""
+    if upload.material_id:
+        return db.session.get(Material, upload.material_id)
+    received = db.session.query(func.count(UploadChunk.index)).filter_by(upload_id=upload.id).scalar()
+    if received != upload.chunk_count:
+        raise UploadError(f"Eksik parçalar var: {received}/{upload.chunk_count}.", 409)
+    if upload.alt_baslik_id not in catalog_cache.get().alt_baslik_by_id:
+        raise UploadError("Alt başlık bulunamadı.", 404)
+
+    # Dosya özetlenirken her parça kayıtlı sha256'sıyla karşılaştırılır
+    chunk_digests = dict(db.session.query(UploadChunk.index, UploadChunk.sha256).filter_by(upload_id=upload.id))
+    staging_path = upload_staging_path(upload.id)
+    hasher = hashlib.sha256()
+    corrupted = []
+    with open(staging_path, 'rb') as f:
+        for index in range(upload.chunk_count):
+            chunk_hasher = hashlib.sha256()
+            remaining = min(upload.chunk_size, upload.total_size - index * upload.chunk_size)
+            while remaining > 0:
+                piece = f.read(min(1024 * 1024, remaining))
+                if not piece:
+                    break
+                hasher.update(piece)
+                chunk_hasher.update(piece)
+                remaining -= len(piece)
+            if remaining or chunk_hasher.hexdigest() != chunk_digests[index]:
+                corrupted.append(index)
+    if corrupted:
+        # Bozuk parçalar eksik sayılır; istemci upload_status'tan görüp yeniden gönderir
+        db.session.execute(delete(UploadChunk).where(UploadChunk.upload_id == upload.id,
+                                                     UploadChunk.index.in_(corrupted)))
+        db.session.commit()
+        raise UploadError(f"Parçalar doğrulanamadı, yeniden gönderin: {', '.join(map(str, corrupted))}.", 422)
+    digest = hasher.hexdigest()
+    move_into_blob_store(staging_path, digest, upload.total_size)
+
+    material = Material(alt_baslik_id=upload.alt_baslik_id, filename=material_public_name(upload.original_filename),
+                        original_filename=upload.original_filename, blob_digest=digest)
+    db.session.add(material)
+    db.session.flush()
+    upload.material_id = material.id
+    db.session.execute(delete(UploadChunk).where(UploadChunk.upload_id == upload.id))
+    bump_cache_version(CATALOG_VERSION_KEY)
+    return material
+
+def discard_upload(upload):
+    staging_path = upload_staging_path(upload.id)
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+    db.session.delete(upload)
+
+def purge_stale_uploads():
+    """Süresi dolmuş, tamamlanmamış yükleme oturumlarını hazırlama dosyalarıyla siler."""
+    cutoff = datetime.utcnow() - timedelta(hours=app.config['UPLOAD_SESSION_TTL_HOURS'])
+    stale = UploadSession.query.filter(UploadSession.created_at < cutoff).all()
+    for upload in stale:
+        discard_upload(upload)
+    db.session.commit()
+    return len(stale)
+
+# --- ŞİFRE DOĞRULAMA ---
+
+LOGIN_METRICS_WINDOW = 512
+# Hash havuzları fork ile açılmaz: gthread worker'ında arka plan thread'leri bir kilidi tutarken
+# fork edilen çocuk o kilitte sonsuza dek bekleyebilir. forkserver çocukları tek thread'li
+# sunucu sürecinden türetir; iş fonksiyonları modül seviyesinde olduğu için pickle ile taşınır.
+HASH_POOL_MP_CONTEXT = 'forkserver'
+
+class LoginBusy(Exception):
+    """Doğrulama kuyruğu dolu ya da zaman aşımı; istemci Retry-After sonra tekrar denemeli."""
+
+def hash_password(password):
+    return generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
+
+def _verify_password_job(pwhash, password, method_prefix, submitted_at):
+    # Havuz sürecinde çalışır; sadece werkzeug kullanır, veritabanına dokunmaz
+    started_at = time.time()
+    ok = check_password_hash(pwhash, password)
+    new_hash = None
+    if ok and method_prefix and pwhash.split('$', 1)[0] != method_prefix:
+        new_hash = generate_password_hash(password, method=method_prefix)
+    return ok, new_hash, max(0.0, started_at - submitted_at), time.time() - started_at
+
+class PasswordHasher:
+    """check_password_hash'i worker sürecinin dışında, sınırlı bir süreç havuzunda çalıştırır.
+
+    Aynı anda bekleyen doğrulama sayısı queue_limit ile sınırlıdır; sınır aşılırsa LoginBusy
+    hemen fırlatılır, böylece giriş fırtınası diğer sayfaları da kilitlemez.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._method_prefix = None
+        self._pending = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+        self._hash_times = deque(maxlen=LOGIN_METRICS_WINDOW)
+        self._queue_waits = deque(maxlen=LOGIN_METRICS_WINDOW)
+
+    @property
+    def method_prefix(self):
+        # 'pbkdf2:sha256' gibi eksik yazılmış yöntemleri werkzeug'un tam önekine çevirir
+        method = self.app.config['PASSWORD_HASH_METHOD']
+        if self._method_prefix is None or self._method_prefix[0] != method:
+            self._method_prefix = (method, generate_password_hash('', method=method).split('$', 1)[0])
+        return self._method_prefix[1]
+
+    def _get_executor(self):
+        # Havuz gunicorn'un fork'undan sağ çıkmaz; her worker süreci kendi havuzunu ilk girişte açar
+        if self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.app.config['LOGIN_HASH_WORKERS'],
+                                                 mp_context=multiprocessing.get_context(HASH_POOL_MP_CONTEXT))
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            if self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._executor_pid = None
+
+    def verify(self, pwhash, password):
+        """(doğru_mu, yeni_hash) döner; yeni_hash sadece yöntem değiştiyse doludur."""
+        method_prefix = self.method_prefix
+        with self._lock:
+            if self._pending >= self.app.config['LOGIN_QUEUE_LIMIT']:
+                self.rejected += 1
+                raise LoginBusy()
+            self._pending += 1
+            executor = self._get_executor() if self.app.config['LOGIN_HASH_WORKERS'] > 0 else None
+        try:
+            if executor is None:
+                result = _verify_password_job(pwhash, password, method_prefix, time.time())
+            else:
+                future = executor.submit(_verify_password_job, pwhash, password, method_prefix, time.time())
+                try:
+                    result = future.result(timeout=self.app.config['LOGIN_QUEUE_TIMEOUT'])
+                except FutureTimeoutError:
+                    future.cancel()
+                    with self._lock:
+                        self.timeouts += 1
+                    raise LoginBusy()
+                except BrokenProcessPool:
+                    # Havuz süreci öldürüldüyse sonraki giriş yeni bir havuz açar
+                    self._reset_executor()
+                    raise LoginBusy()
+        finally:
+            with self._lock:
+                self._pending -= 1
+        ok, new_hash, queue_wait, hash_time = result
+        with self._lock:
+            self.accepted += 1
+            self.rehashed += new_hash is not None
+            self._queue_waits.append(queue_wait)
+            self._hash_times.append(hash_time)
+        return ok, new_hash
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.app.config['PASSWORD_HASH_METHOD'],
+                'workers': self.app.config['LOGIN_HASH_WORKERS'],
+                'queue_limit': self.app.config['LOGIN_QUEUE_LIMIT'],
+                'pending': self._pending,
+                'accepted': self.accepted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'rehashed': self.rehashed,
+                'hash_time': _percentiles(self._hash_times),
+                'queue_wait': _percentiles(self._queue_waits)
+            }
+
+password_hasher = PasswordHasher(app)
+
+# --- KULLANICI BAĞLAMI ---
+
+def access_deadline(expire_date):
+    # Erişim, bitiş tarihinin ertesi günü başına kadar sürer
+    return expire_date + timedelta(days=1) if expire_date else None
+
+def expiry_cutoff(now):
+    # expire_date <= expiry_cutoff(now)  <=>  access_deadline(expire_date) <= now
+    return now - timedelta(days=1)
+
+class UserContext(namedtuple('UserContext', 'id username is_admin expire_date expired')):
+    """Sıcak okuma yollarının ihtiyaç duyduğu, oturumlar arası önbelleğe alınabilen kullanıcı alanları."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.is_admin, user.expire_date, user.is_expired)
+
+    def is_expired(self, now=None):
+        # Önce taramanın yazdığı bayrak; iki tarama arasında dolan süre bağlamdaki tarihle yakalanır
+        if self.expired:
+            return True
+        deadline = access_deadline(self.expire_date)
+        return deadline is not None and (now or datetime.utcnow()) >= deadline
+
+    def remaining_days(self, now=None):
+        if self.expired:
+            return 0
+        deadline = access_deadline(self.expire_date)
+        if deadline is None:
+            return None
+        return max(0, (deadline - (now or datetime.utcnow())).days)
+
+class UserContextCache:
+    """user_id -> (UserContext, yüklenme zamanı) LRU önbelleği; girdiler TTL sonunda tazelenir."""
+
+    def __init__(self, app):
+        self.app = app
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < self.app.config['USER_CONTEXT_TTL_SECONDS']:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+        row = db.session.query(User.id, User.username, User.is_admin, User.expire_date, User.is_expired)\
+            .filter(User.id == user_id).first()
+        context = UserContext(*row) if row else None
+        with self._lock:
+            self.misses += 1
+            if context is None:
+                self._entries.pop(user_id, None)
+            else:
+                self._store(context, now)
+        return context
+
+    def put(self, context):
+        with self._lock:
+            self._store(context, time.monotonic())
+
+    def _store(self, context, loaded_at):
+        self._entries[context.id] = (context, loaded_at)
+        self._entries.move_to_end(context.id)
+        while len(self._entries) > self.app.config['USER_CONTEXT_CACHE_SIZE']:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+user_context_cache = UserContextCache(app)
+
+def queue_user_context_invalidation(user_ids=None):
+    """Kullanıcı bağlamlarını oturum commit edildiğinde önbellekten düşürmek üzere kaydeder (None: hepsi).
+
+    Flush anında temizlemek yetmez: commit'ten önce aynı süreçte gelen bir istek eski satırı okuyup
+    TTL boyunca yeniden önbelleğe alabilir.
+    """
+    pending = db.session.info.setdefault('user_context_invalidations', set())
+    if user_ids is None:
+        pending.add(None)
+    else:
+        pending.update(user_ids)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user_context(mapper, connection, target):
+    # ORM üzerinden yapılan şifre/süre/yetki değişiklikleri ve silmeler bu süreçte commit'le birlikte yansır
+    queue_user_context_invalidation([target.id])
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_user_context_invalidations(session):
+    pending = session.info.pop('user_context_invalidations', None)
+    if not pending:
+        return
+    if None in pending:
+        user_context_cache.invalidate()
+        return
+    for user_id in pending:
+        user_context_cache.invalidate(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_user_context_invalidations(session):
+    # Geri alınan değişiklikler önbellekteki bağlamı eskitmez
+    session.info.pop('user_context_invalidations', None)
+
+def current_user_context():
+    """Oturumdaki kullanıcının bağlamı; istek başına en fazla bir kez çözülür."""
+    if 'user_context' not in g:
+        user_id = session.get('user_id')
+        g.user_context = user_context_cache.get(user_id) if user_id is not None else None
+    return g.user_context
+
+# --- HESAP DURUMU ---
+# User.is_expired, erişim süresi dolmuş ya da iptal edilmiş hesapları işaretler. Periyodik tarama
+# süresi dolanları tek UPDATE ile işaretler; toplu uzatma/iptal süzülen kullanıcı kümesini tek
+# UPDATE ile günceller. Bu yollar Core UPDATE kullandığı için mapper olayları tetiklenmez;
+# etkilenen kullanıcıların bağlamı burada commit'te temizlenmek üzere kaydedilir. Önbellek worker
+# başınadır: işlem çalıştığı süreçte commit'le, diğer worker'larda (ve CLI'dan yapıldıysa tüm
+# worker'larda) en geç USER_CONTEXT_TTL_SECONDS sonunda geçerli olur.
+
+USER_ACCESS_STATES = ('all', 'active', 'expired')
+
+def _returning_user_ids(statement):
+    """UPDATE'i çalıştırır, etkilenen kullanıcıların bağlamını commit'te önbellekten düşürür ve sayıyı döner."""
+    if db.engine.dialect.update_returning:
+        user_ids = db.session.execute(statement.returning(User.id)).scalars().all()
+        queue_user_context_invalidation(user_ids)
+        count = len(user_ids)
+    else:
+        count = db.session.execute(statement).rowcount
+        if count:
+            queue_user_context_invalidation()
+    if count:
+        dashboard_stats.trigger()
+    return count
+
+def sweep_expired_users(now=None):
+    """Süresi dolan hesapları işaretler, uzatılmış olanların işaretini kaldırır; çağıran commit eder.
+
+    (işaretlenen, işareti kaldırılan) sayılarını döner. İkinci UPDATE, tarih doğrudan düzenlenmiş
+    hesapları düzeltir; normal akışta (toplu uzatma bayrağı da yazar) hiçbir satıra dokunmaz.
+    """
+    cutoff = expiry_cutoff(now or datetime.utcnow())
+    expired = _returning_user_ids(update(User)
+                                  .where(User.is_expired.is_(False), User.expire_date <= cutoff)
+                                  .values(is_expired=True))
+    restored = _returning_user_ids(update(User)
+                                   .where(User.is_expired.is_(True),
+                                          or_(User.expire_date.is_(None), User.expire_date > cutoff))
+                                   .values(is_expired=False))
+    return expired, restored
+
+def user_access_conditions(usernames=None, username_prefix=None, state='all', expiring_within_days=None, now=None):
+    """Toplu erişim işlemlerinin WHERE koşulları; admin hesapları hiçbir zaman dahil edilmez."""
+    now = now or datetime.utcnow()
+    conditions = [User.is_admin.is_(False)]
+    if usernames:
+        conditions.append(User.username.in_(usernames))
+    if username_prefix:
+        conditions.append(User.username.startswith(username_prefix, autoescape=True))
+    if state == 'active':
+        conditions.append(User.is_expired.is_(False))
+    elif state == 'expired':
+        conditions.append(User.is_expired.is_(True))
+    if expiring_within_days is not None:
+        conditions.append(User.expire_date.between(expiry_cutoff(now), expiry_cutoff(now) + timedelta(days=expiring_within_days)))
+    return conditions
+
+def _extended_expire_date(days, now):
+    # Yeni bitiş: max(mevcut bitiş, şimdi) + gün; süresi dolmuş hesap bugünden itibaren uzatılır
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        # SQLAlchemy'nin SQLite DateTime biçimiyle (mikrosaniye 6 hane) aynı metni üretir
+        return func.strftime('%Y-%m-%d %H:%M:%f000', func.max(User.expire_date, now), f'+{days} days')
+    if dialect == 'postgresql':
+        return func.greatest(User.expire_date, now) + timedelta(days=days)
+    return None
+
+def extend_user_access(conditions, days, now=None):
+    """Süzülen süreli hesapların erişimini uzatır ve işaretlerini kaldırır; çağıran commit eder.
+
+    Sınırsız (expire_date boş) hesaplar olduğu gibi kalır. Güncellenen hesap sayısını döner.
+    """
+    now = now or datetime.utcnow()
+    conditions = [*conditions, User.expire_date.isnot(None)]
+    new_expire_date = _extended_expire_date(days, now)
+    if new_expire_date is not None:
+        return _returning_user_ids(update(User).where(*conditions)
+                                   .values(expire_date=new_expire_date, is_expired=False))
+    # Tarih aritmetiği desteklenmeyen veritabanları: yeni tarihler Python'da hesaplanır
+    rows = db.session.execute(select(User.id, User.expire_date).where(*conditions)).all()
+    if rows:
+        db.session.execute(update(User), [{'id': user_id, 'expire_date': max(expire_date, now) + timedelta(days=days),
+                                           'is_expired': False} for user_id, expire_date in rows])
+        queue_user_context_invalidation([user_id for user_id, _ in rows])
+        dashboard_stats.trigger()
+    return len(rows)
+
+def revoke_user_access(conditions, now=None):
+    """Süzülen hesapların erişimini sonlandırır; çağıran commit eder.
+
+    Uzatmanın aksine sınırsız (expire_date boş) hesaplar da iptal edilir: bitişleri şimdiye çekilir.
+    Diğer worker'lar iptali en geç USER_CONTEXT_TTL_SECONDS sonunda görür (bkz. HESAP DURUMU).
+    """
+    now = now or datetime.utcnow()
+    return _returning_user_ids(update(User).where(*conditions)
+                               .values(expire_date=expiry_cutoff(now), is_expired=True))
+
+class AccountSweeper:
+    """sweep_expired_users'ı her worker sürecinde arka plan thread'inde periyodik çalıştırır.
+
+    Tarama idempotenttir ve (is_expired, expire_date) indeksini kullanır; birden çok worker'ın
+    aynı anda çalıştırması zararsızdır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._thread_pid = None
+        self.runs = 0
+        self.expired = 0
+        self.restored = 0
+        self.last_run_at = None
+
+    @property
+    def interval(self):
+        return self.app.config['ACCOUNT_SWEEP_INTERVAL_SECONDS']
+
+    def run_once(self):
+        expired, restored = sweep_expired_users()
+        db.session.commit()
+        with self._lock:
+            self.runs += 1
+            self.expired += expired
+            self.restored += restored
+            self.last_run_at = datetime.utcnow()
+        return expired, restored
+
+    def ensure_started(self):
+        # Thread'ler fork'tan sağ çıkmaz; her worker süreci kendi thread'ini ilk istekte başlatır
+        if self.interval <= 0 or self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            threading.Thread(target=self._run, name='account-sweeper', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    self.run_once()
+            except Exception as e:
+                self.app.logger.error(f"HATA: Süresi dolan hesap taraması başarısız: {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval_seconds': self.interval,
+                'runs': self.runs,
+                'expired': self.expired,
+                'restored': self.restored,
+                'last_run_at': self.last_run_at.isoformat(timespec='seconds') if self.last_run_at else None
+            }
+
+account_sweeper = AccountSweeper(app)
+
+@app.before_request
+def start_account_sweeper():
+    account_sweeper.ensure_started()
+
+# --- TOPLU KULLANICI EKLEME ---
+# CSV sütunları: username, password, access_days (boş: sınırsız). Dosya satır satır okunur ve
+# partiler halinde işlenir: parti başına tek sorguyla mevcut kullanıcı adları bulunur, şifreler
+# süreç havuzunda paralel hash'lenir ve geçerli satırlar tek executemany INSERT ile eklenir.
+# Hatalı satırlar atlanır ve satır numarasıyla raporlanır; diğer satırlar yine eklenir.
+
+USER_IMPORT_BATCH_SIZE = 500
+USER_IMPORT_CSV_COLUMNS = ['username', 'password', 'access_days']
+USER_IMPORT_REPORT_COLUMNS = ['line', 'username', 'error']
+ACCESS_DAYS_MAX = 36500  # 100 yıl
+USERNAME_MAX_LENGTH = User.__table__.c.username.type.length
+
+UserImportRowError = namedtuple('UserImportRowError', 'line username error')
+
+class UserImportError(Exception):
+    """Dosyanın tamamını geçersiz kılan hata (eksik sütun, okunamayan dosya, satır sınırı)."""
+
+def parse_access_days(value):
+    """Boş değer için None (sınırsız), aksi halde gün sayısı; geçersizse kullanıcıya gösterilecek mesajla ValueError."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError("Erişim süresi sadece sayı içermelidir.")
+    days = int(value)
+    if days <= 0:
+        raise ValueError("Erişim süresi pozitif bir sayı olmalıdır.")
+    if days > ACCESS_DAYS_MAX:
+        raise ValueError("Erişim süresi çok büyük. Lütfen daha küçük bir değer girin.")
+    return days
+
+def iter_user_csv(stream):
+    """(satır_no, kayıt) üretir; stream ikili (binary) dosya nesnesidir ve bellekte tutulmaz."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    try:
+        missing = [column for column in ('username', 'password') if column not in (reader.fieldnames or [])]
+        if missing:
+            raise UserImportError(f"CSV başlığında eksik sütun: {', '.join(missing)} "
+                                  f"(beklenen: {', '.join(USER_IMPORT_CSV_COLUMNS)}).")
+        for row in reader:
+            yield reader.line_num, row
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise UserImportError(f"CSV okunamadı: {e}")
+
+def _hash_password_job(password, method):
+    # Havuz sürecinde çalışır; veritabanına dokunmaz
+    return generate_password_hash(password, method=method)
+
+def _validate_user_rows(batch, seen_usernames, errors):
+    candidates = []
+    for line_no, row in batch:
+        username = (row.get('username') or '').strip()
+        password = (row.get('password') or '').strip()
+        error = days = None
+        if not username or not password:
+            error = "Kullanıcı adı ve şifre boş olamaz."
+        elif len(username) > USERNAME_MAX_LENGTH:
+            error = f"Kullanıcı adı en fazla {USERNAME_MAX_LENGTH} karakter olabilir."
+        elif not username.isprintable():
+            error = "Kullanıcı adı satır sonu veya kontrol karakteri içeremez."
+        elif username in seen_usernames:
+            error = "Kullanıcı adı dosyada birden fazla kez geçiyor."
+        else:
+            try:
+                days = parse_access_days(row.get('access_days'))
+            except ValueError as e:
+                error = str(e)
+        if error:
+            errors.append(UserImportRowError(line_no, username, error))
+            continue
+        seen_usernames.add(username)
+        candidates.append((line_no, username, password, days))
+    return candidates
+
+def _drop_existing_usernames(candidates, errors):
+    if not candidates:
+        return candidates
+    existing = set(db.session.execute(select(User.username)
+                                      .where(User.username.in_([c[1] for c in candidates]))).scalars())
+    for line_no, username, _, _ in candidates:
+        if username in existing:
+            errors.append(UserImportRowError(line_no, username, "Bu kullanıcı adı zaten mevcut."))
+    return [c for c in candidates if c[1] not in existing]
+
+def import_users(rows, batch_size=USER_IMPORT_BATCH_SIZE, workers=None, method=None):
+    """(satır_no, kayıt) akışındaki kullanıcıları ekler ve {'rows', 'created', 'errors'} özetini döner.
+
+    Hash'leme uzun sürdüğü için her parti ayrı commit edilir; yazma kilidi hash'leme sırasında tutulmaz.
+    Aynı dosya yeniden çalıştırılırsa önceden eklenmiş kullanıcılar "zaten mevcut" olarak raporlanır.
+    """
+    workers = app.config['USER_IMPORT_HASH_WORKERS'] if workers is None else workers
+    method = method or app.config['PASSWORD_HASH_METHOD']
+    summary = {'rows': 0, 'created': 0, 'errors': []}
+    seen_usernames = set()
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context(HASH_POOL_MP_CONTEXT)) \
+        if workers > 1 else None
+    rows = iter(rows)
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            summary['rows'] += len(batch)
+            candidates = _validate_user_rows(batch, seen_usernames, summary['errors'])
+            candidates = _drop_existing_usernames(candidates, summary['errors'])
+            # Mevcutluk sorgusunun açtığı okuma transaction'ı hash'leme boyunca açık kalmasın
+            db.session.rollback()
+            if not candidates:
+                continue
+            passwords = [c[2] for c in candidates]
+            if executor is None:
+                hashes = [_hash_password_job(password, method) for password in passwords]
+            else:
+                hashes = list(executor.map(_hash_password_job, passwords, repeat(method),
+                                           chunksize=max(1, len(passwords) // (workers * 4))))
+            now = datetime.utcnow()
+            new_rows = [{'username': username, 'password': pwhash, 'is_admin': False,
+                         'expire_date': now + timedelta(days=days) if days else None}
+                        for (_, username, _, days), pwhash in zip(candidates, hashes)]
+            try:
+                db.session.execute(insert(User), new_rows)
+                db.session.commit()
+            except IntegrityError:
+                # Kontrol ile INSERT arasında aynı ad başka yerden eklendi; partiyi yeniden süz
+                db.session.rollback()
+                remaining = {c[1] for c in _drop_existing_usernames(candidates, summary['errors'])}
+                new_rows = [row for row in new_rows if row['username'] in remaining]
+                if new_rows:
+                    db.session.execute(insert(User), new_rows)
+                db.session.commit()
+            summary['created'] += len(new_rows)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    summary['errors'].sort()
+    if summary['created']:
+        dashboard_stats.trigger()
+    return summary
+
+def user_import_report_csv(errors):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(USER_IMPORT_REPORT_COLUMNS)
+    writer.writerows(errors)
+    return buffer.getvalue()
+
 # --- YARDIMCI FONKSİYONLAR ---
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return redirect(url_for('login'))
+        # Silinmiş kullanıcının oturumu geçersizdir (bağlam önbellekten gelir, sorgu gerekmez)
+        if current_user_context() is None:
+            session.clear()
+            return redirect(url_for('login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def api_login_required(f):
+    # JSON uç noktaları giriş sayfasına yönlendirmek yerine 401 döner
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session or current_user_context() is None:
+            return jsonify({'error': "Oturum açmanız gerekiyor."}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+def api_admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session or current_user_context() is None:
+            return jsonify({'error': "Oturum açmanız gerekiyor."}), 401
+        if not current_user_context().is_admin:
+            return jsonify({'error': "Bu işlem için yetkiniz yok."}), 403
         return f(*args, **kwargs)
     return decorated_function
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not session.get('is_admin'):
+        # Yetki oturumdaki kopyadan değil bağlamdan okunur; kaldırılan yetki TTL içinde düşer
+        user_context = current_user_context() if 'user_id' in session else None
+        if not user_context or not user_context.is_admin:
             flash("Bu sayfaya erişim yetkiniz yok.", "danger")
             return redirect(url_for('login'))
         return f(*args, **kwargs)
     return decorated_function
 
 
+# --- SQL ÖLÇÜMLEME ---
+# Her istekte çalışan SQL ifadelerini sayar ve süresini ölçer. Aynı ifade şeklinin tekrar
+# tekrar çalışması (tipik N+1 belirtisi) rota adıyla loglanır; sıkı modda rota bütçesini
+# aşan istekler hata verir.
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+_IN_LIST_RE = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,)*\s*(?:\?|%\(\w+\)s|:\w+)\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def statement_shape(statement):
+    # IN (?, ?, ?) listelerinin uzunluğu değişse de aynı şekil sayılsın
+    return _IN_LIST_RE.sub('(?...)', _WHITESPACE_RE.sub(' ', statement)).strip()
+
+def _sql_stats():
+    if has_request_context():
+        return g.get('sql_stats')
+    return None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('sql_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['sql_query_start'].pop()
+    stats = _sql_stats()
+    if stats is not None:
+        stats['count'] += 1
+        stats['time'] += elapsed
+        stats['shapes'][statement_shape(statement)] += 1
+
+def _before_render_template(sender, template, context, **extra):
+    if has_request_context() and 'sql_stats' in g:
+        g.template_render_start = time.perf_counter()
+
+def _template_rendered(sender, template, context, **extra):
+    if has_request_context() and g.get('template_render_start') is not None:
+        g.template_time += time.perf_counter() - g.template_render_start
+        g.template_render_start = None
+
+def init_sql_instrumentation(app):
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+
+@app.before_request
+def start_request_instrumentation():
+    g.request_start = time.perf_counter()
+    g.template_time = 0.0
+    g.template_render_start = None
+    g.sql_stats = {'count': 0, 'time': 0.0, 'shapes': Counter()}
+
+@app.after_request
+def finish_request_instrumentation(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    total_time = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or request.path
+
+    if app.config['SERVER_TIMING_ENABLED']:
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats["time"] * 1000:.2f};desc="{stats["count"]} queries", '
+            f'tpl;dur={g.template_time * 1000:.2f}, '
+            f'total;dur={total_time * 1000:.2f}'
+        )
+
+    threshold = app.config['SQL_REPEAT_WARN_THRESHOLD']
+    for shape, count in stats['shapes'].items():
+        if count >= threshold:
+            app.logger.warning(f"N+1 şüphesi: '{endpoint}' aynı sorguyu {count} kez çalıştırdı: {shape[:300]}")
+
+    budgets = app.config['SQL_QUERY_BUDGETS']
+    budget_key = f'{endpoint}:{request.method}'
+    if budget_key not in budgets:
+        budget_key = endpoint
+    budget = budgets.get(budget_key, app.config['SQL_QUERY_BUDGET_DEFAULT'])
+    if budget is not None and stats['count'] > budget:
+        message = f"'{endpoint}' sorgu bütçesini aştı: {stats['count']} sorgu (bütçe {budget})"
+        if app.config['SQL_QUERY_BUDGET_STRICT']:
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+    return response
+
+init_sql_instrumentation(app)
+
 # --- ROTALAR (SAYFALAR) ---
 
 @app.route("/", methods=["GET", "POST"])
@@ -196,13 +2899,25 @@ def login():
         password = request.form.get("password")
         user = User.query.filter_by(username=username).first()
 
-        if user and check_password_hash(user.password, password):
+        try:
+            password_ok, new_hash = password_hasher.verify(user.password, password) if user else (False, None)
+        except LoginBusy:
+            flash("Şu anda çok sayıda giriş yapılıyor. Lütfen birkaç saniye sonra tekrar deneyin.", "warning")
+            retry_after = app.config['LOGIN_RETRY_AFTER']
+            return render_template('login.html'), 503, {'Retry-After': str(retry_after)}
+
+        if password_ok:
+            if new_hash:
+                # Hash yöntemi değişmiş; şifre elimizdeyken yeni yöntemle yeniden yaz
+                user.password = new_hash
+                db.session.commit()
             # Erişim süresi kontrolü
-            if user.expire_date:
-                if datetime.utcnow() >= (user.expire_date + timedelta(days=1)):
-                    flash(f"Erişim süreniz {user.expire_date.strftime('%Y-%m-%d')} tarihinde dolmuştur. Lütfen yöneticinizle iletişime geçin.", "danger")
-                    return redirect(url_for('login'))
-            
+            user_context = UserContext.from_user(user)
+            if user_context.is_expired():
+                flash(f"Erişim süreniz {user.expire_date.strftime('%Y-%m-%d')} tarihinde dolmuştur. Lütfen yöneticinizle iletişime geçin.", "danger")
+                return redirect(url_for('login'))
+            user_context_cache.put(user_context)
+
             session['user_id'] = user.id
             session['username'] = user.username
             session['is_admin'] = user.is_admin
@@ -249,8 +2964,9 @@ def admin_panel():
                     item_to_delete = Quiz.query.get_or_404(delete_id)
                 elif delete_type == "material": 
                     material_to_delete = Material.query.get_or_404(delete_id)
+                    # İçerik adresli dosyalar referans sayısıyla, commit sonrası silinir
                     file_path = os.path.join(app.config['UPLOAD_FOLDER'], material_to_delete.filename)
-                    if os.path.exists(file_path):
+                    if material_to_delete.blob_digest is None and os.path.exists(file_path):
                         try:
                             os.remove(file_path)
                         except OSError as e:
@@ -264,8 +2980,15 @@ def admin_panel():
                     if delete_type == 'user' and item_to_delete.username == 'admin':
                         flash("Ana admin kullanıcısı silinemez.", "danger")
                     else:
+                        remove_progress_for_deleted(delete_type, item_to_delete)
                         db.session.delete(item_to_delete)
+                        if delete_type in CATALOG_DELETE_TYPES:
+                            bump_cache_version(CATALOG_VERSION_KEY)
+                        elif delete_type == 'announcement':
+                            bump_cache_version(ANNOUNCEMENT_VERSION_KEY)
                         db.session.commit()
+                        purge_released_blobs()
+                        dashboard_stats.trigger()
                         flash(f"{delete_type.capitalize()} başarıyla silildi.", "success")
             except Exception as e:
                 db.session.rollback()
@@ -276,32 +2999,24 @@ def admin_panel():
         elif action == "add_user" and is_main_admin:
             username = request.form.get("new_username", "").strip()
             password = request.form.get("new_password", "").strip()
-            access_days_str = request.form.get("access_days", "").strip()
 
             if not username or not password:
                 flash("Kullanıcı adı ve şifre boş olamaz.", "danger")
             elif User.query.filter_by(username=username).first():
                 flash("Bu kullanıcı adı zaten mevcut.", "danger")
             else:
-                expire_date = None
-                if access_days_str.isdigit():
-                    days_to_add = int(access_days_str)
-                    if days_to_add > 0 and days_to_add <= 36500: # Max 100 yıl
-                        expire_date = datetime.utcnow() + timedelta(days=days_to_add)
-                    elif days_to_add <= 0:
-                        flash("Erişim süresi pozitif bir sayı olmalıdır.", "danger")
-                        return redirect(url_for('admin_panel'))
-                    else:
-                        flash("Erişim süresi çok büyük. Lütfen daha küçük bir değer girin.", "danger")
-                        return redirect(url_for('admin_panel'))
-                elif access_days_str: # Sayısal olmayan ama boş olmayan giriş
-                    flash("Erişim süresi sadece sayı içermelidir.", "danger")
+                try:
+                    days_to_add = parse_access_days(request.form.get("access_days"))
+                except ValueError as e:
+                    flash(str(e), "danger")
                     return redirect(url_for('admin_panel'))
-                
-                hashed_password = generate_password_hash(password)
+                expire_date = datetime.utcnow() + timedelta(days=days_to_add) if days_to_add else None
+
+                hashed_password = hash_password(password)
                 new_user = User(username=username, password=hashed_password, is_admin=False, expire_date=expire_date)
                 db.session.add(new_user)
                 db.session.commit()
+                dashboard_stats.trigger()
                 flash(f"'{username}' kullanıcısı başarıyla eklendi.", "success")
             return redirect(url_for('admin_panel'))
         
@@ -310,6 +3025,7 @@ def admin_panel():
             if ders_name and not Ders.query.filter_by(name=ders_name).first():
                 new_ders = Ders(name=ders_name)
                 db.session.add(new_ders)
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
                 flash(f"'{ders_name}' dersi eklendi.", "success")
             else:
@@ -322,6 +3038,7 @@ def admin_panel():
             if konu_name and ders_id:
                 new_konu = Konu(name=konu_name, ders_id=ders_id)
                 db.session.add(new_konu)
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
                 flash(f"'{konu_name}' konusu eklendi.", "success")
             else:
@@ -337,6 +3054,7 @@ def admin_panel():
             if alt_baslik_name and konu_id:
                 new_alt_baslik = AltBaslik(name=alt_baslik_name, konu_id=konu_id, video_link=video_link)
                 db.session.add(new_alt_baslik)
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
                 flash(f"'{alt_baslik_name}' alt başlığı eklendi.", "success")
             else:
@@ -349,6 +3067,7 @@ def admin_panel():
             if title and content:
                 new_announcement = Announcement(title=title, content=content)
                 db.session.add(new_announcement)
+                bump_cache_version(ANNOUNCEMENT_VERSION_KEY)
                 db.session.commit()
                 flash("Duyuru başarıyla eklendi.", "success")
             else:
@@ -367,16 +3086,17 @@ def admin_panel():
                 return redirect(url_for('admin_panel'))
             
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                unique_filename = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{filename}"
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
+                # Aynı içerik daha önce yüklendiyse diskte yeni kopya oluşmaz
+                digest, _ = store_material_stream(file.stream)
 
                 new_material = Material(
                     alt_baslik_id=alt_baslik_id,
-                    filename=unique_filename,
-                    original_filename=file.filename
+                    filename=material_public_name(file.filename),
+                    original_filename=file.filename,
+                    blob_digest=digest
                 )
                 db.session.add(new_material)
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
                 flash(f"'{file.filename}' materyali başarıyla yüklendi.", "success")
             else:
@@ -394,40 +3114,51 @@ def admin_panel():
                 flash("Quiz başlığı, alt başlık seçimi veya en az bir soru boş olamaz.", "danger")
                 return redirect(url_for('admin_panel'))
 
-            new_quiz = Quiz(title=quiz_title, alt_baslik_id=alt_baslik_id, quiz_type=quiz_type)
-            db.session.add(new_quiz)
-            db.session.flush()
+            # Alt başlık tek quiz gösterir (AltBaslik.quiz); ikinci quiz panelde görünmez ve puanlanamazdı
+            catalog_alt_baslik = catalog_cache.get().alt_baslik_by_id.get(alt_baslik_id)
+            if catalog_alt_baslik and catalog_alt_baslik.quiz:
+                flash("Bu alt başlığın zaten bir quizi var. Yeni quiz eklemeden önce mevcut quizi silin.", "danger")
+                return redirect(url_for('admin_panel'))
 
+            questions = []
             for i, q_text in enumerate(question_texts):
                 if not q_text.strip():
                     continue
-                new_question = Question(quiz_id=new_quiz.id, question_text=q_text.strip())
-                db.session.add(new_question)
-                db.session.flush()
-
                 answer_texts = request.form.getlist(f"answer_text_{i+1}[]")
                 correct_answer_index_str = request.form.get(f"correct_answer_{i+1}")
                 
                 if not answer_texts or correct_answer_index_str is None:
                     flash(f"Soru {i+1} için cevaplar veya doğru cevap seçimi eksik.", "danger")
-                    db.session.rollback()
                     return redirect(url_for('admin_panel'))
                 
                 try:
                     correct_answer_index = int(correct_answer_index_str)
                 except ValueError:
                     flash(f"Soru {i+1} için doğru cevap seçimi geçersiz.", "danger")
-                    db.session.rollback()
+                    return redirect(url_for('admin_panel'))
+                # Boş bırakılan şık atlanır; doğru diye işaretlenmişse soru doğru cevapsız kalırdı
+                if not 0 <= correct_answer_index < len(answer_texts) or not answer_texts[correct_answer_index].strip():
+                    flash(f"Soru {i+1} için doğru olarak işaretlenen cevap boş.", "danger")
                     return redirect(url_for('admin_panel'))
 
+                questions.append({
+                    'text': q_text,
+                    'answers': [{'text': a_text, 'correct': j == correct_answer_index}
+                                for j, a_text in enumerate(answer_texts) if a_text.strip()]
+                })
 
-                for j, a_text in enumerate(answer_texts):
-                    if not a_text.strip():
-                        continue
-                    is_correct = (j == correct_answer_index)
-                    new_answer = Answer(question_id=new_question.id, answer_text=a_text.strip(), is_correct=is_correct)
-                    db.session.add(new_answer)
+            # Form da toplu içe aktarma ile aynı doğrulama ve toplu INSERT yolunu kullanır: her soruda
+            # en az iki dolu cevap ve tam bir doğru cevap (cevap anahtarı derlenebilsin diye)
+            try:
+                import_quizzes([{'alt_baslik_id': alt_baslik_id, 'title': quiz_title,
+                                 'quiz_type': quiz_type, 'questions': questions}])
+            except QuizImportError as e:
+                db.session.rollback()
+                for error in e.errors:
+                    flash(error, "danger")
+                return redirect(url_for('admin_panel'))
             
+            bump_cache_version(CATALOG_VERSION_KEY)
             db.session.commit()
             flash(f"'{quiz_title}' quizi başarıyla eklendi.", "success")
             return redirect(url_for('admin_panel'))
@@ -436,110 +3167,93 @@ def admin_panel():
         return redirect(url_for('admin_panel'))
 
     users = User.query.order_by(User.username).all()
-    dersler = Ders.query.order_by(Ders.name).all()
-    announcements = Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).all()
+    catalog = catalog_cache.get()
+    # Duyurular sadece parça önbellekte yoksa şablon içinden yüklenir
+    announcement_version = get_cache_version(ANNOUNCEMENT_VERSION_KEY)
 
 
-    total_users_count = User.query.count()
-    active_users_count = User.query.filter(User.expire_date > datetime.utcnow()).count()
-
-    course_completion_counts = db.session.query(
-        Ders.name,
-        func.count(UserProgress.id)
-    ).join(Konu, Ders.id == Konu.ders_id)\
-     .join(AltBaslik, Konu.id == AltBaslik.konu_id)\
-     .join(UserProgress, AltBaslik.id == UserProgress.alt_baslik_id)\
-     .group_by(Ders.name)\
-     .order_by(func.count(UserProgress.id).desc())\
-     .all()
-
-    chart_labels = [row[0] for row in course_completion_counts]
-    chart_data = [row[1] for row in course_completion_counts]
+    # Sayılar arka planda yenilenen anlık görüntüden okunur
+    stats = dashboard_stats.get()
     
     return render_template('admin.html', 
                            users=users, 
-                           dersler=dersler, 
+                           dersler=catalog.dersler, 
+                           catalog_version=catalog.version,
                            is_main_admin=is_main_admin,
-                           announcements=announcements,
-                           total_users_count=total_users_count,
-                           active_users_count=active_users_count,
-                           chart_labels=chart_labels,
-                           chart_data=chart_data)
+                           announcement_version=announcement_version,
+                           load_active_announcements=load_active_announcements,
+                           total_users_count=stats.total_users,
+                           active_users_count=stats.active_users,
+                           chart_labels=list(stats.chart_labels),
+                           chart_data=list(stats.chart_data),
+                           stats_age_seconds=int((datetime.utcnow() - stats.computed_at).total_seconds()))
 
 
 @app.route("/panel", methods=["GET"])
 @login_required
 def user_panel():
-    dersler = Ders.query.order_by(Ders.name).all()
+    catalog = catalog_cache.get()
+    dersler = catalog.dersler
     
     selected_ders_id = request.args.get('ders_id', type=int)
     selected_konu_id = request.args.get('konu_id', type=int)
     show_quiz_result_alt_baslik_id = request.args.get('show_quiz_result', type=int)
+    comment_alt_baslik_id = request.args.get('yorum_ab', type=int)
 
-    selected_ders = Ders.query.get(selected_ders_id) if selected_ders_id else None
-    selected_konu = Konu.query.get(selected_konu_id) if selected_konu_id else None
+    selected_ders = catalog.ders_by_id.get(selected_ders_id) if selected_ders_id else None
+    selected_konu = catalog.konu_by_id.get(selected_konu_id) if selected_konu_id else None
 
-    user = User.query.get(session['user_id'])
-    kalan_gun = None
-    if user.expire_date:
-        remaining_time = (user.expire_date + timedelta(days=1)) - datetime.utcnow()
-        kalan_gun = max(0, remaining_time.days)
-        if kalan_gun == 0 and remaining_time.total_seconds() <= 0:
-            kalan_gun = 0
-        elif kalan_gun == 0 and remaining_time.total_seconds() > 0:
-            pass
+    user = current_user_context()
+    if not user:
+        session.clear()
+        flash("Kullanıcı bulunamadı.", "danger")
+        return redirect(url_for('login'))
+    kalan_gun = user.remaining_days()
 
+    # Tamamlandı işaretleri sadece seçili konunun alt başlıkları için gerekir
     completed_alt_baslik_ids = set()
-    if user:
-        progress_records = UserProgress.query.filter_by(user_id=user.id).all()
-        completed_alt_baslik_ids = {p.alt_baslik_id for p in progress_records}
+    if user and selected_konu and selected_konu.alt_basliklar:
+        completed_alt_baslik_ids = {row[0] for row in db.session.query(UserProgress.alt_baslik_id).filter(
+            UserProgress.user_id == user.id,
+            UserProgress.alt_baslik_id.in_([ab.id for ab in selected_konu.alt_basliklar])
+        )}
 
     unique_recommended_alt_basliks = []
 
     completion_percentage = 0
-    if selected_konu:
+    if selected_konu and user:
         total_alt_basliks_in_konu = len(selected_konu.alt_basliklar)
         if total_alt_basliks_in_konu > 0:
-            completed_count_in_konu = 0
-            for alt_baslik in selected_konu.alt_basliklar:
-                if alt_baslik.id in completed_alt_baslik_ids:
-                    completed_count_in_konu += 1
-            completion_percentage = int((completed_count_in_onu / total_alt_basliks_in_konu) * 100)
+            completed_count_in_konu = db.session.query(KonuProgressSummary.completed_count)\
+                                                .filter_by(user_id=user.id, konu_id=selected_konu.id).scalar() or 0
+            completion_percentage = min(100, int((completed_count_in_konu / total_alt_basliks_in_konu) * 100))
 
-    active_announcements = Announcement.query.filter_by(is_active=True).order_by(Announcement.created_at.desc()).all()
+    announcement_version = get_cache_version(ANNOUNCEMENT_VERSION_KEY)
 
-    # Quiz sonuçlarını çekmek için ekstra sorgular (UserQuizAttempt.details'ı kullanacak)
+    # Anlık görüntüde soru/cevap ve yorum yok; seçili konu için toplu olarak yükle. Sorular sadece
+    # quiz_formu bölümlerinden biri önbellekte yoksa gerekir: şablon ilk ihtiyaçta çağırır, konunun
+    # tüm soruları tek seferde yüklenir; bölümlerin hepsi önbellekteyse sorgu çalışmaz.
+    load_quiz_questions = dict
+    comment_threads = {}
+    if selected_konu:
+        quiz_ids = [ab.quiz.id for ab in selected_konu.alt_basliklar if ab.quiz]
+        if quiz_ids:
+            load_quiz_questions = cache(partial(load_questions_by_quiz, quiz_ids))
+
+        # Tek bir dizi daha eski sayfadan gösterilebilir (?yorum_ab=<id>&yorum_cursor=<cursor>)
+        comment_cursors = {}
+        cursor = decode_comment_cursor(request.args.get('yorum_cursor'))
+        if cursor and comment_alt_baslik_id:
+            comment_cursors[comment_alt_baslik_id] = cursor
+        comment_threads = load_comment_threads([ab.id for ab in selected_konu.alt_basliklar], cursors=comment_cursors)
+
+    # Sadece seçili konudaki quizlerin denemeleri yüklenir (soru/cevap grafiği yüklenmez)
     quiz_results = {}
+    quiz_history_stats = {}
     if selected_konu and user:
-        # Alt başlıkların quizlerini ve o quizlere ait kullanıcı denemelerini önceden yükle
-        quiz_attempts = db.session.query(UserQuizAttempt).filter_by(user_id=user.id)\
-                        .options(joinedload(UserQuizAttempt.quiz_obj).joinedload(Quiz.questions).joinedload(Question.answers))\
-                        .all()
-        
-        # Denemeleri quiz_id'ye göre bir dictionary'ye al
-        attempts_by_quiz_id = {attempt.quiz_id: attempt for attempt in quiz_attempts}
-
-        for alt_baslik in selected_konu.alt_basliklar:
-            if alt_baslik.quiz and alt_baslik.quiz.id in attempts_by_quiz_id:
-                attempt = attempts_by_quiz_id[alt_baslik.quiz.id]
-                
-                # SQLAlchemy'nin JSON türü otomatik olarak Python dict'e dönüştürür.
-                # db.Text olarak saklıyorsak, manuel json.loads yapmak gerekebilir.
-                if isinstance(attempt.details, str): # Eğer TEXT olarak saklanıyorsa
-                     import json
-                     try:
-                         parsed_details = json.loads(attempt.details)
-                     except json.JSONDecodeError:
-                         parsed_details = [] # Hata olursa boş liste
-                else: # Eğer db.JSON veya benzeri bir tipse, zaten dict/list olarak gelir
-                    parsed_details = attempt.details if attempt.details else []
-                
-                quiz_results[alt_baslik.quiz.id] = {
-                    'score': attempt.score,
-                    'attempt_date': attempt.attempt_date,
-                    'details': parsed_details, # Çözümlenmiş JSON detayları
-                    'id': attempt.id # Quiz denemesinin ID'si (silmek için)
-                }
+        quiz_ids = [ab.quiz.id for ab in selected_konu.alt_basliklar if ab.quiz]
+        quiz_results = load_quiz_results(user.id, quiz_ids)
+        quiz_history_stats = load_quiz_history_stats(user.id, list(quiz_results))
     
     return render_template('user.html', 
                            dersler=dersler, 
@@ -548,11 +3262,17 @@ def user_panel():
                            kalan_gun=kalan_gun,
                            completed_alt_baslik_ids=completed_alt_baslik_ids,
                            completion_percentage=completion_percentage,
-                           active_announcements=active_announcements,
+                           catalog_version=catalog.version,
+                           announcement_version=announcement_version,
+                           load_active_announcements=load_active_announcements,
                            recommended_alt_basliks=unique_recommended_alt_basliks,
                            UserQuizAttempt=UserQuizAttempt, # Sadece model referansı
                            session=session,
                            quiz_results=quiz_results, # Geliştirilmiş quiz sonuçları
+                           quiz_history_stats=quiz_history_stats,
+                           load_quiz_questions=load_quiz_questions,
+                           comment_threads=comment_threads,
+                           comment_alt_baslik_id=comment_alt_baslik_id,
                            show_quiz_result=show_quiz_result_alt_baslik_id # Quiz sonucunu otomatik açmak için
                            )
 
@@ -566,21 +3286,27 @@ def mark_completed():
         flash("Geçersiz istek.", "danger")
         return redirect(url_for('user_panel'))
 
-    alt_baslik = AltBaslik.query.get(alt_baslik_id)
+    catalog = catalog_cache.get()
+    alt_baslik = catalog.alt_baslik_by_id.get(alt_baslik_id)
     if not alt_baslik:
         flash("Alt başlık bulunamadı.", "danger")
         return redirect(url_for('user_panel'))
+    ders_id = catalog.konu_by_id[alt_baslik.konu_id].ders_id
 
     existing_progress = UserProgress.query.filter_by(user_id=user_id, alt_baslik_id=alt_baslik_id).first()
 
     if existing_progress:
         db.session.delete(existing_progress)
+        adjust_progress_summaries({user_id: -1}, alt_baslik.konu_id, ders_id)
         db.session.commit()
+        dashboard_stats.trigger()
         flash(f"'{alt_baslik.name}' tamamlandı işareti kaldırıldı.", "info")
     else:
         new_progress = UserProgress(user_id=user_id, alt_baslik_id=alt_baslik_id)
         db.session.add(new_progress)
+        adjust_progress_summaries({user_id: 1}, alt_baslik.konu_id, ders_id)
         db.session.commit()
+        dashboard_stats.trigger()
         flash(f"'{alt_baslik.name}' başarıyla tamamlandı olarak işaretlendi.", "success")
     
     selected_ders_id = request.form.get("selected_ders_id", type=int)
@@ -596,59 +3322,72 @@ def submit_quiz():
     selected_ders_id = request.form.get("selected_ders_id", type=int)
     selected_konu_id = request.form.get("selected_konu_id", type=int)
 
-    quiz = Quiz.query.get(quiz_id)
-    if not quiz:
+    catalog_quiz = catalog_cache.get().quiz_by_id.get(quiz_id)
+    if not catalog_quiz:
         flash("Quiz bulunamadı.", "danger")
         return redirect(url_for('user_panel', ders_id=selected_ders_id, konu_id=selected_konu_id))
 
-    correct_answers_count = 0
-    total_questions = len(quiz.questions)
-    quiz_attempt_details = [] # Quiz detaylarını saklamak için liste
-
-    if total_questions == 0:
+    answer_key = answer_key_cache.get(catalog_quiz)
+    if not answer_key.question_ids:
         flash("Bu quizde soru bulunmamaktadır.", "warning")
         return redirect(url_for('user_panel', ders_id=selected_ders_id, konu_id=selected_konu_id))
 
-    for question in quiz.questions:
-        selected_answer_id = request.form.get(f"question_{question.id}", type=int)
-        
-        is_correct_answer = False
-        user_selected_answer_text = "Cevap verilmedi"
-        correct_answer_text = "Belirtilmedi"
-
-        # Doğru cevabı ve kullanıcının seçtiği cevabı bul
-        for answer in question.answers:
-            if answer.is_correct:
-                correct_answer_text = answer.answer_text
-            if selected_answer_id and answer.id == selected_answer_id:
-                user_selected_answer_text = answer.answer_text
-                if answer.is_correct:
-                    is_correct_answer = True
-                    correct_answers_count += 1
-        
-        quiz_attempt_details.append({
-            'question_text': question.question_text,
-            'user_selected_answer': user_selected_answer_text,
-            'correct_answer': correct_answer_text,
-            'is_correct': is_correct_answer
-        })
-    
-    score = int((correct_answers_count / total_questions) * 100) if total_questions > 0 else 0
-
-    user_attempt = UserQuizAttempt.query.filter_by(user_id=user_id, quiz_id=quiz_id).first()
-    if user_attempt:
-        user_attempt.score = score
-        user_attempt.attempt_date = datetime.utcnow()
-        user_attempt.details = quiz_attempt_details # Detaylar güncellendi
-    else:
-        new_attempt = UserQuizAttempt(user_id=user_id, quiz_id=quiz_id, score=score, details=quiz_attempt_details) # Detaylar eklendi
-        db.session.add(new_attempt)
-    
+    selections = {question_id: request.form.get(f"question_{question_id}", type=int)
+                  for question_id in answer_key.question_ids}
+    score, _, _ = grade_quiz(answer_key, selections)
+    record_quiz_attempt(user_id, quiz_id, score, pack_attempt_answers(answer_key, selections))
     db.session.commit()
     flash(f"Quizi tamamladınız! Puanınız: {score}%", "success")
 
     return redirect(url_for('user_panel', ders_id=selected_ders_id, konu_id=selected_konu_id, show_quiz_result=alt_baslik_id)) # Quiz sonucunu göstermek için parametre
 
+@app.route("/api/quizzes/<int:quiz_id>/submit", methods=["POST"])
+@api_login_required
+def submit_quiz_json(quiz_id):
+    # Yönlendirme gerektirmeyen istemciler için: {"answers": {"<soru_id>": <cevap_id>, ...}}
+    payload = request.get_json(silent=True)
+    answers = payload.get('answers') if isinstance(payload, dict) else None
+    if not isinstance(answers, dict):
+        return jsonify({'error': "Gövde {'answers': {soru_id: cevap_id}} biçiminde olmalı."}), 400
+
+    catalog_quiz = catalog_cache.get().quiz_by_id.get(quiz_id)
+    if not catalog_quiz:
+        return jsonify({'error': "Quiz bulunamadı."}), 404
+    answer_key = answer_key_cache.get(catalog_quiz)
+    if not answer_key.question_ids:
+        return jsonify({'error': "Bu quizde soru bulunmamaktadır."}), 422
+
+    selections = {}
+    for question_id, answer_id in answers.items():
+        try:
+            selections[int(question_id)] = int(answer_id) if answer_id is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': f"Geçersiz soru/cevap id'si: {question_id}"}), 400
+    score, correct_count, details = grade_quiz(answer_key, selections)
+    record_quiz_attempt(session['user_id'], quiz_id, score, pack_attempt_answers(answer_key, selections))
+    db.session.commit()
+    return jsonify({
+        'quiz_id': quiz_id,
+        'score': score,
+        'correct_count': correct_count,
+        'total_questions': len(answer_key.question_ids),
+        'details': details
+    })
+
+@app.route("/api/quizzes/<int:quiz_id>/history", methods=["GET"])
+@api_login_required
+def quiz_history_json(quiz_id):
+    user_id = session['user_id']
+    stats = load_quiz_history_stats(user_id, [quiz_id]).get(quiz_id, {'best_score': None, 'attempt_count': 0})
+    limit = request.args.get('limit', QUIZ_HISTORY_TREND_LIMIT, type=int)
+    trend = load_quiz_score_trend(user_id, quiz_id, limit=max(1, min(limit, QUIZ_HISTORY_TREND_LIMIT)))
+    return jsonify({
+        'quiz_id': quiz_id,
+        'best_score': stats['best_score'],
+        'attempt_count': stats['attempt_count'],
+        'trend': [{'attempt_date': point['attempt_date'].isoformat(), 'score': point['score']} for point in trend]
+    })
+
 @app.route("/delete_quiz_attempt", methods=["POST"])
 @login_required
 def delete_quiz_attempt():
@@ -658,6 +3397,7 @@ def delete_quiz_attempt():
 
     attempt = UserQuizAttempt.query.get(quiz_attempt_id)
     if attempt and attempt.user_id == session.get('user_id'):
+        # Sadece son deneme izdüşümü silinir (quiz yeniden çözülebilir); geçmiş günlüğü korunur
         db.session.delete(attempt)
         db.session.commit()
         flash("Quiz denemeniz başarıyla silindi.", "info")
@@ -719,55 +3459,392 @@ def delete_comment():
 @app.route("/profile", methods=["GET", "POST"])
 @login_required
 def profile():
-    user = User.query.get(session['user_id'])
-    if not user:
+    user_context = current_user_context()
+    if not user_context:
         flash("Kullanıcı bulunamadı.", "danger")
         return redirect(url_for('login'))
 
-    kalan_gun = None
-    if user.expire_date:
-        remaining_time = (user.expire_date + timedelta(days=1)) - datetime.utcnow()
-        kalan_gun = max(0, remaining_time.days)
-        if kalan_gun == 0 and remaining_time.total_seconds() <= 0:
-            kalan_gun = 0
-        elif kalan_gun == 0 and remaining_time.total_seconds() > 0:
-            pass
+    kalan_gun = user_context.remaining_days()
 
     if request.method == "POST":
+        # Şifre hash'i önbellekte tutulmaz; sadece şifre değişikliğinde satır yüklenir
+        user = db.session.get(User, user_context.id)
         old_password = request.form.get("old_password")
         new_password = request.form.get("new_password")
         confirm_new_password = request.form.get("confirm_new_password")
 
-        if not check_password_hash(user.password, old_password):
+        try:
+            old_password_ok = password_hasher.verify(user.password, old_password)[0]
+        except LoginBusy:
+            flash("Sistem şu anda yoğun. Lütfen birkaç saniye sonra tekrar deneyin.", "warning")
+            return redirect(url_for('profile'))
+
+        if not old_password_ok:
             flash("Mevcut şifreniz yanlış.", "danger")
         elif not new_password or len(new_password) < 6:
             flash("Yeni şifreniz en az 6 karakter olmalıdır.", "danger")
         elif new_password != confirm_new_password:
             flash("Yeni şifreler uyuşmuyor.", "danger")
         else:
-            user.password = generate_password_hash(new_password)
+            user.password = hash_password(new_password)
             db.session.commit()
             flash("Şifreniz başarıyla güncellendi.", "success")
         
         return redirect(url_for('profile'))
 
-    return render_template('profile.html', user=user, kalan_gun=kalan_gun)
+    return render_template('profile.html', user=user_context, kalan_gun=kalan_gun)
 
 @app.route('/download/<filename>')
 @login_required
 def download_file(filename):
-    user = User.query.get(session['user_id'])
-    if not user or (user.expire_date and datetime.utcnow() >= (user.expire_date + timedelta(days=1))):
+    # Süre kontrolü jetonlu istekte de yapılır: jeton verildikten sonra erişim iptal edilmiş
+    # olabilir. Bağlam önbellekten geldiği için ek sorgu gerekmez.
+    user = current_user_context()
+    if not user or user.is_expired():
         flash("Dosyayı indirme yetkiniz bulunmamaktadır. Erişim süreniz dolmuş olabilir.", "danger")
         return redirect(url_for('user_panel'))
-        
+
+    # İmzalı jeton materyalin bu kullanıcıya gösterildiğini taşır; Material sorgusu gerekmez
+    token_claims = read_download_token(request.args.get('t'), filename, user.id)
+    if token_claims:
+        digest, download_name = token_claims
+        return serve_material_blob(digest, download_name)
+
     material = Material.query.filter_by(filename=filename).first()
     if not material:
         flash("İndirilecek dosya bulunamadı.", "danger")
         return redirect(url_for('user_panel'))
     
+    if material.blob_digest:
+        return serve_material_blob(material.blob_digest, material.original_filename)
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True, download_name=material.original_filename)
 
+# --- KATALOG API ROTALARI ---
+
+@app.route("/api/v1/catalog")
+@api_login_required
+def api_catalog():
+    snapshot = catalog_cache.get()
+    return catalog_api_response(snapshot, 'catalog', lambda: {
+        'dersler': [serialize_catalog_ders(ders) for ders in snapshot.dersler]
+    })
+
+@app.route("/api/v1/dersler/<int:ders_id>")
+@api_login_required
+def api_ders(ders_id):
+    snapshot = catalog_cache.get()
+    ders = snapshot.ders_by_id.get(ders_id)
+    if ders is None:
+        return jsonify({'error': "Ders bulunamadı."}), 404
+    return catalog_api_response(snapshot, f'ders-{ders_id}', lambda: serialize_catalog_ders(ders))
+
+@app.route("/api/v1/konular/<int:konu_id>")
+@api_login_required
+def api_konu(konu_id):
+    snapshot = catalog_cache.get()
+    konu = snapshot.konu_by_id.get(konu_id)
+    if konu is None:
+        return jsonify({'error': "Konu bulunamadı."}), 404
+    return catalog_api_response(snapshot, f'konu-{konu_id}', lambda: serialize_catalog_konu(konu))
+
+# --- ARAMA ROTALARI ---
+
+def _search_request():
+    query = (request.args.get('q') or '').strip()
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    hits, has_next = search_documents(query, page=page)
+    return query, page, build_search_results(hits), has_next
+
+@app.route("/api/v1/search")
+@api_login_required
+def api_search():
+    query, page, results, has_next = _search_request()
+    return jsonify({'query': query, 'page': page, 'has_next': has_next, 'results': results})
+
+@app.route("/search")
+@login_required
+def search():
+    query, page, results, has_next = _search_request()
+    return render_template("search.html", query=query, page=page, results=results, has_next=has_next)
+
+# --- PARÇALI YÜKLEME ROTALARI ---
+
+def _get_upload_or_404(upload_id):
+    upload = db.session.get(UploadSession, upload_id)
+    if upload is None:
+        abort(404)
+    return upload
+
+@app.errorhandler(UploadError)
+def handle_upload_error(error):
+    db.session.rollback()
+    return jsonify({'error': error.message}), error.status
+
+@app.route("/admin/uploads", methods=["POST"])
+@api_admin_required
+def init_upload():
+    payload = request.get_json(silent=True) or {}
+    upload = create_upload_session(session['user_id'], payload.get('alt_baslik_id'), payload.get('filename'),
+                                   payload.get('size'), payload.get('chunk_size'))
+    db.session.commit()
+    return jsonify(upload_status(upload)), 201
+
+@app.route("/admin/uploads/<upload_id>", methods=["GET"])
+@api_admin_required
+def get_upload(upload_id):
+    # Bağlantı koptuğunda istemci eksik parçaları buradan öğrenip devam eder
+    return jsonify(upload_status(_get_upload_or_404(upload_id)))
+
+@app.route("/admin/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+@api_admin_required
+def upload_chunk(upload_id, index):
+    upload = _get_upload_or_404(upload_id)
+    write_upload_chunk(upload, index, request.stream, request.headers.get('X-Chunk-Sha256'))
+    db.session.commit()
+    return jsonify({'upload_id': upload.id, 'index': index})
+
+@app.route("/admin/uploads/<upload_id>/complete", methods=["POST"])
+@api_admin_required
+def finish_upload(upload_id):
+    material = complete_upload(_get_upload_or_404(upload_id))
+    db.session.commit()
+    return jsonify({'material_id': material.id, 'filename': material.filename, 'digest': material.blob_digest})
+
+@app.route("/admin/uploads/<upload_id>", methods=["DELETE"])
+@api_admin_required
+def cancel_upload(upload_id):
+    discard_upload(_get_upload_or_404(upload_id))
+    db.session.commit()
+    return '', 204
+
+# --- QUIZ İÇE/DIŞA AKTARIM ROTALARI ---
+
+QUIZ_EXPORT_FORMATS = {
+    'json': (export_quizzes_json, 'application/json'),
+    'csv': (export_quizzes_csv, 'text/csv'),
+}
+
+def _read_quiz_file(file_storage, fmt=None):
+    fmt = fmt or os.path.splitext(file_storage.filename or '')[1].lstrip('.').lower()
+    if fmt == 'json':
+        return parse_quiz_json(file_storage.stream)
+    if fmt == 'csv':
+        return parse_quiz_csv(file_storage.stream)
+    raise QuizImportError(["Desteklenmeyen dosya türü; .json veya .csv yükleyin."])
+
+@app.route("/admin/quizzes/export")
+@login_required
+@admin_required
+def export_quizzes():
+    fmt = request.args.get('format', 'json').lower()
+    if fmt not in QUIZ_EXPORT_FORMATS:
+        abort(400)
+    alt_baslik_ids = request.args.getlist('alt_baslik_id', type=int)
+    generate, mimetype = QUIZ_EXPORT_FORMATS[fmt]
+    filename = f"quizler_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    return Response(stream_with_context(generate(alt_baslik_ids)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route("/admin/quizzes/import", methods=["POST"])
+@login_required
+@admin_required
+def import_quizzes_route():
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        flash("İçe aktarılacak dosya seçilmedi.", "danger")
+        return redirect(url_for('admin_panel'))
+    try:
+        summary = import_quizzes(_read_quiz_file(file), replace=bool(request.form.get('replace')))
+    except QuizImportError as e:
+        db.session.rollback()
+        for error in e.errors[:20]:
+            flash(error, "danger")
+        if len(e.errors) > 20:
+            flash(f"... ve {len(e.errors) - 20} hata daha. Hiçbir quiz eklenmedi.", "danger")
+        return redirect(url_for('admin_panel'))
+    bump_cache_version(CATALOG_VERSION_KEY)
+    db.session.commit()
+    flash(f"{summary['quizzes']} quiz, {summary['questions']} soru ve {summary['answers']} cevap içe aktarıldı.", "success")
+    return redirect(url_for('admin_panel'))
+
+@app.cli.command("import-quizzes")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--replace", is_flag=True, help="Alt başlıktaki mevcut quizi silip yenisiyle değiştirir.")
+def import_quizzes_command(path, replace):
+    """JSON veya CSV soru bankasını tek transaction içinde içe aktarır."""
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, 'rb') as f:
+        try:
+            if fmt not in QUIZ_EXPORT_FORMATS:
+                raise QuizImportError(["Desteklenmeyen dosya türü; .json veya .csv kullanın."])
+            quizzes = parse_quiz_json(f) if fmt == 'json' else parse_quiz_csv(f)
+            summary = import_quizzes(quizzes, replace=replace)
+        except QuizImportError as e:
+            db.session.rollback()
+            for error in e.errors:
+                click.echo(error, err=True)
+            raise SystemExit(1)
+    bump_cache_version(CATALOG_VERSION_KEY)
+    db.session.commit()
+    click.echo(f"{summary['quizzes']} quiz, {summary['questions']} soru, {summary['answers']} cevap içe aktarıldı.")
+
+@app.cli.command("export-quizzes")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option("--format", "fmt", type=click.Choice(sorted(QUIZ_EXPORT_FORMATS)), default=None,
+              help="Belirtilmezse dosya uzantısından anlaşılır.")
+def export_quizzes_command(path, fmt):
+    """Tüm quizleri JSON veya CSV olarak dışa aktarır."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in QUIZ_EXPORT_FORMATS:
+        raise click.BadParameter("Format json veya csv olmalı.")
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in QUIZ_EXPORT_FORMATS[fmt][0]():
+            f.write(chunk)
+    click.echo(f"Quizler {path} dosyasına yazıldı.")
+
+# --- TOPLU KULLANICI ROTALARI ---
+
+@app.route("/admin/users/import", methods=["POST"])
+@login_required
+@admin_required
+def import_users_route():
+    if session.get("username") != "admin":
+        abort(403)
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        flash("İçe aktarılacak dosya seçilmedi.", "danger")
+        return redirect(url_for('admin_panel'))
+    limit = app.config['USER_IMPORT_WEB_MAX_ROWS']
+    try:
+        rows = list(islice(iter_user_csv(file.stream), limit + 1))
+        if len(rows) > limit:
+            raise UserImportError(f"Dosyada {limit} satırdan fazla kullanıcı var; büyük listeler için "
+                                  f"`flask import-users` komutunu kullanın. Hiçbir kullanıcı eklenmedi.")
+        summary = import_users(rows)
+    except UserImportError as e:
+        db.session.rollback()
+        flash(str(e), "danger")
+        return redirect(url_for('admin_panel'))
+
+    errors = summary['errors']
+    if errors and request.form.get('report'):
+        filename = f"kullanici_hatalari_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.csv"
+        return Response(user_import_report_csv(errors), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    flash(f"{summary['created']} kullanıcı eklendi, {len(errors)} satır atlandı.",
+          "success" if not errors else "warning")
+    for error in errors[:20]:
+        flash(f"Satır {error.line} ({error.username or '-'}): {error.error}", "danger")
+    if len(errors) > 20:
+        flash(f"... ve {len(errors) - 20} hata daha.", "danger")
+    return redirect(url_for('admin_panel'))
+
+@app.cli.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--report", type=click.Path(dir_okay=False, writable=True),
+              help="Hatalı satırların yazılacağı CSV dosyası (yoksa hatalar stderr'e yazılır).")
+@click.option("--workers", type=int, default=None, help="Hash süreç sayısı (varsayılan USER_IMPORT_HASH_WORKERS).")
+@click.option("--batch-size", type=int, default=USER_IMPORT_BATCH_SIZE, show_default=True)
+def import_users_command(path, report, workers, batch_size):
+    """username,password,access_days sütunlu CSV'den kullanıcıları toplu ekler."""
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        try:
+            summary = import_users(iter_user_csv(f), batch_size=batch_size, workers=workers)
+        except UserImportError as e:
+            db.session.rollback()
+            click.echo(str(e), err=True)
+            raise SystemExit(1)
+    errors = summary['errors']
+    if report:
+        with open(report, 'w', encoding='utf-8', newline='') as f:
+            f.write(user_import_report_csv(errors))
+    else:
+        for error in errors:
+            click.echo(f"Satır {error.line} ({error.username or '-'}): {error.error}", err=True)
+    click.echo(f"{summary['rows']} satır işlendi: {summary['created']} kullanıcı eklendi, {len(errors)} hata "
+               f"({time.perf_counter() - start:.1f} sn).")
+    if errors:
+        raise SystemExit(1)
+
+def parse_usernames(value):
+    # Virgül, boşluk veya satır sonuyla ayrılmış kullanıcı adları
+    return [name for name in re.split(r'[\s,]+', value or '') if name]
+
+@app.route("/admin/users/access", methods=["POST"])
+@login_required
+@admin_required
+def bulk_user_access():
+    if session.get("username") != "admin":
+        abort(403)
+    action = request.form.get("access_action")
+    usernames = parse_usernames(request.form.get("usernames"))
+    username_prefix = request.form.get("username_prefix", "").strip()
+    state = request.form.get("state", "all")
+    expiring_within_days = request.form.get("expiring_within_days", type=int)
+    if action not in ('extend', 'revoke') or state not in USER_ACCESS_STATES:
+        abort(400)
+    if action == 'revoke' and not (usernames or username_prefix or expiring_within_days is not None):
+        flash("Toplu iptal için kullanıcı adı, ön ek veya bitiş aralığı filtresi gerekli.", "danger")
+        return redirect(url_for('admin_panel'))
+    conditions = user_access_conditions(usernames=usernames, username_prefix=username_prefix, state=state,
+                                        expiring_within_days=expiring_within_days)
+    if action == 'extend':
+        try:
+            days = parse_access_days(request.form.get("days"))
+        except ValueError as e:
+            flash(str(e), "danger")
+            return redirect(url_for('admin_panel'))
+        if not days:
+            flash("Uzatma için gün sayısı girin.", "danger")
+            return redirect(url_for('admin_panel'))
+        count = extend_user_access(conditions, days)
+        message = f"{count} kullanıcının erişimi {days} gün uzatıldı."
+    else:
+        count = revoke_user_access(conditions)
+        message = f"{count} kullanıcının erişimi sonlandırıldı."
+    db.session.commit()
+    flash(message, "success" if count else "info")
+    return redirect(url_for('admin_panel'))
+
+@app.cli.command("sweep-expired-users")
+def sweep_expired_users_command():
+    """Süresi dolan hesapları işaretler (cron için; ACCOUNT_SWEEP_INTERVAL_SECONDS=0 iken)."""
+    expired, restored = sweep_expired_users()
+    db.session.commit()
+    click.echo(f"{expired} hesap süresi dolmuş olarak işaretlendi, {restored} hesabın işareti kaldırıldı.")
+
+def user_access_filter_options(command):
+    command = click.option("--username", "usernames", multiple=True, help="Kullanıcı adı (tekrarlanabilir).")(command)
+    command = click.option("--prefix", "username_prefix", help="Kullanıcı adı ön eki (ör. 2026-guz-).")(command)
+    command = click.option("--state", type=click.Choice(USER_ACCESS_STATES), default='all', show_default=True)(command)
+    command = click.option("--expiring-within", "expiring_within_days", type=int,
+                           help="Erişimi bu kadar gün içinde bitecek hesaplar.")(command)
+    return command
+
+@app.cli.command("extend-access")
+@click.option("--days", type=click.IntRange(1, ACCESS_DAYS_MAX), required=True)
+@user_access_filter_options
+def extend_access_command(days, usernames, username_prefix, state, expiring_within_days):
+    """Süzülen süreli hesapların erişimini max(bitiş, bugün) + gün olarak uzatır."""
+    count = extend_user_access(user_access_conditions(usernames, username_prefix, state, expiring_within_days), days)
+    db.session.commit()
+    click.echo(f"{count} kullanıcının erişimi {days} gün uzatıldı.")
+
+@app.cli.command("revoke-access")
+@click.option("--all", "revoke_all", is_flag=True, help="Filtre olmadan tüm öğrenci hesaplarını iptal et.")
+@user_access_filter_options
+def revoke_access_command(revoke_all, usernames, username_prefix, state, expiring_within_days):
+    """Süzülen hesapların (sınırsızlar dahil) erişimini sonlandırır.
+
+    Çalışan web worker'ları iptali en geç USER_CONTEXT_TTL_SECONDS sonunda görür.
+    """
+    if not (revoke_all or usernames or username_prefix or expiring_within_days is not None):
+        raise click.UsageError("En az bir filtre (--username, --prefix, --expiring-within) ya da --all gerekli.")
+    count = revoke_user_access(user_access_conditions(usernames, username_prefix, state, expiring_within_days))
+    db.session.commit()
+    click.echo(f"{count} kullanıcının erişimi sonlandırıldı.")
+
 # --- DÜZENLEME ROTLARI ---
 
 @app.route("/admin/edit_ders/<int:ders_id>", methods=["GET", "POST"])
@@ -783,7 +3860,9 @@ def edit_ders(ders_id):
                 flash("Bu ders adı zaten mevcut.", "danger")
             else:
                 ders.name = new_name
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
+                dashboard_stats.trigger()
                 flash(f"'{ders.name}' dersi başarıyla güncellendi.", "success")
                 return redirect(url_for('admin_panel'))
         else:
@@ -812,9 +3891,12 @@ def edit_konu(konu_id):
             if existing_konu:
                 flash("Bu ders altında aynı isimde bir konu zaten mevcut.", "danger")
             else:
+                move_konu_progress(konu.id, konu.ders_id, new_ders_id)
                 konu.name = new_name
                 konu.ders_id = new_ders_id
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
+                dashboard_stats.trigger()
                 flash(f"'{konu.name}' konusu başarıyla güncellendi.", "success")
                 return redirect(url_for('admin_panel'))
         return redirect(url_for('edit_konu', konu_id=konu.id))
@@ -830,7 +3912,7 @@ def create_initial_admin():
             admin_username = 'admin'
             admin_password = 'Cemyildiz10.' # BURAYA KENDİ GÜVENLİ ŞİFRENI YAZ!
 
-            hashed_password = generate_password_hash(admin_password)
+            hashed_password = hash_password(admin_password)
             default_admin = User(username=admin_username, password=hashed_password, is_admin=True, expire_date=None) 
 
             db.session.add(default_admin)
@@ -840,12 +3922,74 @@ def create_initial_admin():
             print("Admin kullanıcısı zaten mevcut. Yeni admin oluşturulmadı.")
 
 
+def hot_query_statements():
+    # Büyüyen tablolarda indeks kullanması gereken sık sorgular
+    return [
+        ('UserProgress.user_id', select(UserProgress.alt_baslik_id).where(UserProgress.user_id == 1)),
+        ('UserProgress.alt_baslik_id', select(UserProgress.id).where(UserProgress.alt_baslik_id == 1)),
+        ('Comment thread', select(Comment.id).where(Comment.alt_baslik_id == 1, Comment.parent_comment_id.is_(None))
+                                             .order_by(Comment.created_at.desc(), Comment.id.desc())),
+        ('Comment.parent_comment_id', select(Comment.id).where(Comment.parent_comment_id.in_([1, 2]))),
+        ('Comment.user_id', select(Comment.id).where(Comment.user_id == 1)),
+        ('Material.filename', select(Material.id).where(Material.filename == 'dosya.pdf')),
+        ('Material.alt_baslik_id', select(Material.id).where(Material.alt_baslik_id == 1)),
+        ('Konu.ders_id', select(Konu.id).where(Konu.ders_id == 1)),
+        ('AltBaslik.konu_id', select(AltBaslik.id).where(AltBaslik.konu_id == 1)),
+        ('Quiz.alt_baslik_id', select(Quiz.id).where(Quiz.alt_baslik_id == 1)),
+        ('Question.quiz_id', select(Question.id).where(Question.quiz_id == 1)),
+        ('Answer.question_id', select(Answer.id).where(Answer.question_id == 1)),
+        ('UserQuizAttempt.user_id', select(UserQuizAttempt.id).where(UserQuizAttempt.user_id == 1)),
+        ('UserQuizAttempt.quiz_id', select(UserQuizAttempt.id).where(UserQuizAttempt.quiz_id == 1)),
+        ('QuizAttemptHistory best score', select(QuizAttemptHistory.quiz_id, func.max(QuizAttemptHistory.score))
+                                          .where(QuizAttemptHistory.user_id == 1, QuizAttemptHistory.quiz_id.in_([1, 2]))
+                                          .group_by(QuizAttemptHistory.quiz_id)),
+        ('QuizAttemptHistory trend', select(QuizAttemptHistory.score)
+                                     .where(QuizAttemptHistory.user_id == 1, QuizAttemptHistory.quiz_id == 1)
+                                     .order_by(QuizAttemptHistory.attempt_date.desc()).limit(50)),
+        ('QuizAttemptHistory.quiz_id', select(QuizAttemptHistory.id).where(QuizAttemptHistory.quiz_id == 1)),
+        ('User active count', select(func.count(User.id)).where(User.is_expired.is_(False), User.expire_date.isnot(None))),
+        ('User expiry sweep', select(User.id).where(User.is_expired.is_(False), User.expire_date <= datetime(2000, 1, 1))),
+        ('Announcement(is_active, created_at)', select(Announcement.id).where(Announcement.is_active.is_(True))
+                                                                       .order_by(Announcement.created_at.desc())),
+    ]
+
+def explain_query_plan(statement, connection=None):
+    """Sorgu planını satır listesi olarak ve planın tam tarama içerip içermediğini döner.
+
+    connection verilmezse uygulamanın oturumu kullanılır (testler migration ile kurulmuş ayrı bir
+    veritabanının bağlantısını verir).
+    """
+    connection = connection if connection is not None else db.session.connection()
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        plan = [row[-1] for row in connection.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+        full_scan = any((line.startswith('SCAN ') and 'INDEX' not in line) or 'TEMP B-TREE' in line for line in plan)
+    else:
+        # Küçük tablolarda planlayıcı her zaman Seq Scan seçer; indeksin kullanılabilirliğini görmek için kapatıyoruz
+        connection.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = [row[0] for row in connection.execute(text('EXPLAIN ' + sql))]
+        full_scan = any('Seq Scan' in line or 'Sort' in line.split('(')[0] for line in plan)
+    return plan, full_scan
+
+@app.cli.command("check-query-plans")
+def check_query_plans():
+    """Checks that hot queries use an index instead of a full table scan."""
+    failures = 0
+    for name, statement in hot_query_statements():
+        plan, full_scan = explain_query_plan(statement)
+        print(f"{'HATA' if full_scan else 'OK  '} {name}: {' | '.join(plan)}")
+        failures += full_scan
+    db.session.rollback()
+    if failures:
+        print(f"{failures} sorgu indeks kullanmıyor.")
+        raise SystemExit(1)
+
 @app.route("/admin/edit_alt_baslik/<int:alt_baslik_id>", methods=["GET", "POST"])
 @login_required
 @admin_required
 def edit_alt_baslik(alt_baslik_id):
     alt_baslik = AltBaslik.query.get_or_404(alt_baslik_id)
-    dersler = Ders.query.order_by(Ders.name).all()
+    dersler = catalog_cache.get().dersler
     
     if request.method == "POST":
         new_name = request.form.get("name", "").strip()
@@ -865,55 +4009,54 @@ def edit_alt_baslik(alt_baslik_id):
             if existing_alt_baslik:
                 flash("Bu konu altında aynı isimde bir alt başlık zaten mevcut.", "danger")
             else:
+                new_konu = Konu.query.get_or_404(new_konu_id)
+                move_alt_baslik_progress(alt_baslik.id, alt_baslik.konu_id, alt_baslik.konu.ders_id,
+                                         new_konu.id, new_konu.ders_id)
                 alt_baslik.name = new_name
                 alt_baslik.video_link = new_video_link
                 # alt_baslik.notlar kaldırıldı, bu satır yoktu
                 alt_baslik.konu_id = new_konu_id
+                bump_cache_version(CATALOG_VERSION_KEY)
                 db.session.commit()
+                dashboard_stats.trigger()
                 flash(f"'{alt_baslik.name}' alt başlığı başarıyla güncellendi.", "success")
                 return redirect(url_for('admin_panel'))
         return render_template('edit_alt_baslik.html', alt_baslik=alt_baslik, dersler=dersler)
     return render_template('edit_alt_baslik.html', alt_baslik=alt_baslik, dersler=dersler)
 
 
-# dersplanlama.py dosyasının en altına, app.run() çağrısından hemen önce ekle.
-# Bu kod, uygulamanın her deployunda veya yeniden başlatıldığında çalışır.
-# Sadece admin kullanıcısı oluşturulduktan sonra KALDIRILMALIDIR!
+# --- METRİKLER ---
 
-with app.app_context(): # Flask uygulama bağlamına gir
-    # Veritabanında hiç kullanıcı yoksa varsayılan admin kullanıcısını oluştur
-    # VEYA sadece 'admin' kullanıcısı yoksa oluştur
-    if User.query.filter_by(username='admin').first() is None:
-        print("Admin kullanıcısı bulunamadı. Varsayılan admin kullanıcısı oluşturuluyor...")
-        admin_username = 'admin'
-        admin_password = 'Cemyildiz10.' # BURAYA KENDİ ÇOK GÜVENLİ ŞİFRENİ YAZ!
-
-        hashed_password = generate_password_hash(admin_password)
-        default_admin = User(username=admin_username, password=hashed_password, is_admin=True, expire_date=None) 
-
-        db.session.add(default_admin)
-        db.session.commit()
-        print(f"Varsayılan admin kullanıcısı '{admin_username}' başarıyla oluşturuldu.")
-    else:
-        print("Admin kullanıcısı zaten mevcut. Yeni admin oluşturulmadı.")
+@app.route("/admin/metrics")
+@login_required
+@admin_required
+def admin_metrics():
+    # Bu worker sürecine ait önbellek/performans sayaçları
+    return jsonify({
+        'pid': os.getpid(),
+        'catalog_cache': catalog_cache.stats(),
+        'answer_key_cache': answer_key_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'user_context_cache': user_context_cache.stats(),
+        'account_sweeper': account_sweeper.stats(),
+        'db_pool': pool_metrics.stats(db.engine.pool),
+        'fragment_cache': fragment_cache.stats()
+    })
+
+# --- BAŞLATMA ---
+# Modül import edilirken veritabanına dokunulmaz: gunicorn worker'ları, `flask db upgrade` ve
+# şema henüz yokken yapılan importlar sorgu çalıştırmaz. İlk admin kullanıcısı sadece
+# `flask create-initial-admin` ile oluşturulur (entrypoint.sh / start.sh bunu çağırır).
+
+def warm_up():
+    """gunicorn --preload ile fork öncesi ebeveynde çalışır; şablonları derler, DB'ye dokunmaz."""
+    for name in app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html')):
+        app.jinja_env.get_template(name)
+
+def dispose_db_connections():
+    """Fork sonrası worker'da çağrılır; ebeveynden kalan bağlantılar worker'lar arasında paylaşılmaz."""
+    with app.app_context():
+        db.engine.dispose(close=False)
 
 if __name__ == '__main__':
     app.run(debug=True)
-    # Flask uygulaması bağlamına girerek ilk çalıştırmada admin kullanıcısı oluştur
-    with app.app_context():
-        # Sadece 'admin' kullanıcısı yoksa oluştur
-        if User.query.filter_by(username='admin').first() is None:
-            print("Admin kullanıcısı bulunamadı. Varsayılan admin kullanıcısı oluşturuluyor...")
-            admin_username = 'admin'
-            admin_password = 'Cemyildiz10.' # BURAYA KENDİ GÜVENLİ ŞİFRENI YAZ!
-
-            hashed_password = generate_password_hash(admin_password)
-            default_admin = User(username=admin_username, password=hashed_password, is_admin=True, expire_date=None) 
-
-            db.session.add(default_admin)
-            db.session.commit()
-            print(f"Varsayılan admin kullanıcısı '{admin_username}' başarıyla oluşturuldu.")
-        else:
-            print("Admin kullanıcısı zaten mevcut. Yeni admin oluşturulmadı.")
-
-    app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,25 @@
+# Gunicorn ayarları: gunicorn --config gunicorn.conf.py dersplanlama:app
+# Uygulama ebeveyn süreçte bir kez yüklenir (preload); worker'lar ısınmış ebeveynden fork edilir.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# Giriş doğrulaması süreç havuzunda beklerken aynı worker diğer istekleri thread'lerle sunar
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+accesslog = '-'
+
+
+def when_ready(server):
+    # preload_app ile uygulama modülü burada zaten yüklüdür; şablonları fork öncesi derle
+    if preload_app:
+        import dersplanlama
+        dersplanlama.warm_up()
+
+
+def post_fork(server, worker):
+    # Ebeveynin bağlantı havuzu (varsa) worker'lar arasında paylaşılmamalı
+    import dersplanlama
+    dersplanlama.dispose_db_connections()
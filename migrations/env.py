@@ -45,6 +45,24 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Arama dizininin modelde karşılığı olmayan parçaları (dersplanlama.SEARCH_INDEX_DDL ile kurulur):
+# SQLite'ta FTS5 sanal tablosu ve gölge tabloları, PostgreSQL'de tsvector sütunu ve GIN indeksi.
+# Autogenerate bunları silinmiş sanıp DROP üretmesin.
+UNMODELED_TABLE_PREFIXES = ('search_fts',)
+UNMODELED_COLUMNS = {('search_document', 'tsv')}
+UNMODELED_INDEXES = {'ix_search_document_tsv'}
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return not name.startswith(UNMODELED_TABLE_PREFIXES)
+    if type_ == 'column':
+        return (parent_names.get('table_name'), name) not in UNMODELED_COLUMNS
+    if type_ == 'index':
+        return name not in UNMODELED_INDEXES
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +83,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +112,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
@@ -0,0 +1,40 @@
+"""Add content-addressed material_blob store
+
+Revision ID: 0a6d2f8e4c71
+Revises: f3c9a2e6b418
+Create Date: 2026-10-18 16:58:12.660419
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6d2f8e4c71'
+down_revision = 'f3c9a2e6b418'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('material_blob',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    # Mevcut dosyalar 'flask migrate-materials-to-blobs' ile depoya taşınır
+    with op.batch_alter_table('material', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_digest', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_material_blob_digest'), ['blob_digest'], unique=False)
+        batch_op.create_foreign_key('fk_material_blob_digest', 'material_blob', ['blob_digest'], ['digest'])
+
+
+def downgrade():
+    with op.batch_alter_table('material', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_material_blob_digest', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_material_blob_digest'))
+        batch_op.drop_column('blob_digest')
+
+    op.drop_table('material_blob')
@@ -0,0 +1,49 @@
+"""Add upload_session and upload_chunk for resumable uploads
+
+Revision ID: 1b7e5c3a9d02
+Revises: 0a6d2f8e4c71
+Create Date: 2026-10-18 17:36:51.208734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7e5c3a9d02'
+down_revision = '0a6d2f8e4c71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_session',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('alt_baslik_id', sa.Integer(), nullable=False),
+    sa.Column('original_filename', sa.String(length=255), nullable=False),
+    sa.Column('total_size', sa.BigInteger(), nullable=False),
+    sa.Column('chunk_size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('material_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_session', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_session_created_at'), ['created_at'], unique=False)
+
+    op.create_table('upload_chunk',
+    sa.Column('upload_id', sa.String(length=32), nullable=False),
+    sa.Column('index', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload_session.id'], ),
+    sa.PrimaryKeyConstraint('upload_id', 'index')
+    )
+
+
+def downgrade():
+    op.drop_table('upload_chunk')
+    with op.batch_alter_table('upload_session', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_session_created_at'))
+
+    op.drop_table('upload_session')
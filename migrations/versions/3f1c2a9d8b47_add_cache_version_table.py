@@ -0,0 +1,30 @@
+"""Add cache_version table for cross-worker cache invalidation
+
+Revision ID: 3f1c2a9d8b47
+Revises: 76d9cd2132be
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d8b47'
+down_revision = '76d9cd2132be'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table('cache_version',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Sayaç satırı önceden oluşturulur; böylece ilk yazmada INSERT yarışı olmaz
+    op.bulk_insert(cache_version, [{'name': 'catalog', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('cache_version')
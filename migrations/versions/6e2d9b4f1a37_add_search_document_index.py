@@ -0,0 +1,60 @@
+"""Add search_document and full-text search index
+
+Revision ID: 6e2d9b4f1a37
+Revises: 1b7e5c3a9d02
+Create Date: 2026-10-18 19:02:44.513209
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Dizin DDL'i ve normalleştirme tek yerde, uygulama modülünde tutulur; modülün içe aktarılması
+# yan etkisizdir ve flask db komutları uygulamayı zaten yüklemiştir
+from dersplanlama import SEARCH_INDEX_DDL, normalize_search_text
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2d9b4f1a37'
+down_revision = '1b7e5c3a9d02'
+branch_labels = None
+depends_on = None
+
+BACKFILL_SOURCES = [
+    ('ders', "SELECT id, NULL, name, '' FROM ders"),
+    ('konu', "SELECT id, NULL, name, '' FROM konu"),
+    ('alt_baslik', "SELECT id, id, name, '' FROM alt_baslik"),
+    ('comment', "SELECT id, alt_baslik_id, '', content FROM comment"),
+]
+
+
+def upgrade():
+    search_document = op.create_table('search_document',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=16), nullable=False),
+    sa.Column('ref_id', sa.Integer(), nullable=False),
+    sa.Column('alt_baslik_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.Text(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'ref_id', name='uq_search_document_kind_ref')
+    )
+    bind = op.get_bind()
+
+    # Mevcut içerikten dizini doldur; FTS tarafı (SQLite) ve tsvector (PostgreSQL) sonra tek seferde kurulur
+    for kind, query in BACKFILL_SOURCES:
+        rows = [{'kind': kind, 'ref_id': ref_id, 'alt_baslik_id': alt_baslik_id,
+                 'title': normalize_search_text(title), 'body': normalize_search_text(body)}
+                for ref_id, alt_baslik_id, title, body in bind.execute(sa.text(query))]
+        if rows:
+            op.bulk_insert(search_document, rows)
+
+    for statement in SEARCH_INDEX_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+    if bind.dialect.name == 'sqlite':
+        op.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS search_fts")
+    op.drop_table('search_document')
@@ -0,0 +1,35 @@
+"""Add user.is_expired account state flag
+
+Revision ID: 8c4f2a6d3e19
+Revises: 6e2d9b4f1a37
+Create Date: 2026-10-18 20:14:09.382617
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f2a6d3e19'
+down_revision = '6e2d9b4f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_expired', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_user_is_expired_expire_date', ['is_expired', 'expire_date'], unique=False)
+
+    # Süresi zaten dolmuş hesapları işaretle (erişim bitiş tarihinin ertesi günü başına kadar sürer)
+    user = sa.table('user', sa.column('is_expired', sa.Boolean()), sa.column('expire_date', sa.DateTime()))
+    op.execute(user.update().where(user.c.expire_date <= datetime.utcnow() - timedelta(days=1))
+               .values(is_expired=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_is_expired_expire_date')
+        batch_op.drop_column('is_expired')
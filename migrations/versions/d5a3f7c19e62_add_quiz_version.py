@@ -0,0 +1,30 @@
+"""Add quiz.version for answer key cache invalidation
+
+Revision ID: d5a3f7c19e62
+Revises: c2b8e6f41a93
+Create Date: 2026-10-18 15:22:08.413517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a3f7c19e62'
+down_revision = 'c2b8e6f41a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+    cache_version = sa.table('cache_version', sa.column('name', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(cache_version, [{'name': 'quiz', 'version': 0}])
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_version WHERE name = 'quiz'")
+    with op.batch_alter_table('quiz', schema=None) as batch_op:
+        batch_op.drop_column('version')
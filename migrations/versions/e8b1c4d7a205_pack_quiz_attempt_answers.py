@@ -0,0 +1,130 @@
+"""Store quiz attempt answers as packed (question_id, answer_id) pairs
+
+Revision ID: e8b1c4d7a205
+Revises: d5a3f7c19e62
+Create Date: 2026-10-18 15:48:30.902114
+
+"""
+import json
+import logging
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b1c4d7a205'
+down_revision = 'd5a3f7c19e62'
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+# dersplanlama.ATTEMPT_ANSWER_PAIR ile aynı biçim; migration uygulama modülünü içe aktarmaz
+PAIR = struct.Struct('<II')
+BATCH_SIZE = 1000
+
+
+def _details_bytes(bind):
+    return bind.execute(sa.text("SELECT COALESCE(SUM(LENGTH(CAST(details AS TEXT))), 0) FROM user_quiz_attempt")).scalar()
+
+
+def _load_quiz_content(bind):
+    # quiz_id -> [(question_id, question_text, {answer_text: answer_id})], soru id sırasıyla;
+    # answers: answer_id -> (answer_text, is_correct)
+    rows = bind.execute(sa.text(
+        "SELECT q.quiz_id, q.id, q.question_text, a.id, a.answer_text, a.is_correct FROM question q "
+        "LEFT JOIN answer a ON a.question_id = q.id ORDER BY q.quiz_id, q.id, a.id"
+    ))
+    content = {}
+    answers = {}
+    for quiz_id, question_id, question_text, answer_id, answer_text, is_correct in rows:
+        questions = content.setdefault(quiz_id, [])
+        if not questions or questions[-1][0] != question_id:
+            questions.append((question_id, question_text, {}))
+        if answer_id is not None:
+            questions[-1][2].setdefault(answer_text, answer_id)
+            answers[answer_id] = (answer_text, bool(is_correct))
+    return content, answers
+
+
+def _pack(questions, details):
+    # Eski kayıtta soru ve cevap metinleri vardı; metinler soru sırasıyla eşleştirilir.
+    # Eşleşmeyen (sonradan değişmiş) soru/cevaplar "cevap verilmedi" (0) olarak yazılır.
+    if isinstance(details, str):
+        try:
+            details = json.loads(details)
+        except ValueError:
+            details = []
+    details = details if isinstance(details, list) else []
+    remaining = list(details)
+    packed = bytearray()
+    for question_id, question_text, answer_ids in questions:
+        answer_id = 0
+        for index, detail in enumerate(remaining):
+            if isinstance(detail, dict) and detail.get('question_text') == question_text:
+                answer_id = answer_ids.get(detail.get('user_selected_answer'), 0)
+                del remaining[index]
+                break
+        packed += PAIR.pack(question_id, answer_id)
+    return bytes(packed)
+
+
+def upgrade():
+    with op.batch_alter_table('user_quiz_attempt', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('answers', sa.LargeBinary(), server_default='', nullable=False))
+
+    bind = op.get_bind()
+    before = _details_bytes(bind)
+    content, _ = _load_quiz_content(bind)
+    attempts = sa.table('user_quiz_attempt', sa.column('id', sa.Integer), sa.column('answers', sa.LargeBinary))
+    update_stmt = attempts.update().where(attempts.c.id == sa.bindparam('attempt_id'))\
+                          .values(answers=sa.bindparam('packed'))
+    rows = bind.execute(sa.text("SELECT id, quiz_id, details FROM user_quiz_attempt ORDER BY id")).fetchall()
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(update_stmt, [
+            {'attempt_id': attempt_id, 'packed': _pack(content.get(quiz_id, []), details)}
+            for attempt_id, quiz_id, details in rows[start:start + BATCH_SIZE]
+        ])
+    after = bind.execute(sa.text("SELECT COALESCE(SUM(LENGTH(answers)), 0) FROM user_quiz_attempt")).scalar()
+    log.info(f"user_quiz_attempt: {len(rows)} deneme, details {before} bayt -> answers {after} bayt")
+
+    with op.batch_alter_table('user_quiz_attempt', schema=None) as batch_op:
+        batch_op.drop_column('details')
+
+
+def _unpack(questions, answers, packed):
+    selected = dict(PAIR.iter_unpack(packed or b''))
+    details = []
+    for question_id, question_text, answer_ids in questions:
+        correct = next((text for text, answer_id in answer_ids.items() if answers[answer_id][1]), "Belirtilmedi")
+        answer_id = selected.get(question_id)
+        details.append({
+            'question_text': question_text,
+            'user_selected_answer': answers[answer_id][0] if answer_id in answers else "Cevap verilmedi",
+            'correct_answer': correct,
+            'is_correct': bool(answer_id in answers and answers[answer_id][1])
+        })
+    return json.dumps(details, ensure_ascii=False)
+
+
+def downgrade():
+    # Eski metin kopyaları mevcut quiz içeriğinden yeniden üretilir
+    with op.batch_alter_table('user_quiz_attempt', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('details', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    content, answers = _load_quiz_content(bind)
+    attempts = sa.table('user_quiz_attempt', sa.column('id', sa.Integer), sa.column('details', sa.Text))
+    update_stmt = attempts.update().where(attempts.c.id == sa.bindparam('attempt_id'))\
+                          .values(details=sa.bindparam('unpacked'))
+    rows = bind.execute(sa.text("SELECT id, quiz_id, answers FROM user_quiz_attempt ORDER BY id")).fetchall()
+    for start in range(0, len(rows), BATCH_SIZE):
+        bind.execute(update_stmt, [
+            {'attempt_id': attempt_id, 'unpacked': _unpack(content.get(quiz_id, []), answers, packed)}
+            for attempt_id, quiz_id, packed in rows[start:start + BATCH_SIZE]
+        ])
+
+    with op.batch_alter_table('user_quiz_attempt', schema=None) as batch_op:
+        batch_op.drop_column('answers')
@@ -0,0 +1,48 @@
+"""Add append-only quiz_attempt_history table
+
+Revision ID: f3c9a2e6b418
+Revises: e8b1c4d7a205
+Create Date: 2026-10-18 16:20:44.517093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9a2e6b418'
+down_revision = 'e8b1c4d7a205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_attempt_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('attempt_date', sa.DateTime(), nullable=False),
+    sa.Column('answers', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quiz.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_attempt_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_quiz_attempt_history_quiz_id'), ['quiz_id'], unique=False)
+        batch_op.create_index('ix_quiz_attempt_history_user_quiz_date', ['user_id', 'quiz_id', 'attempt_date'], unique=False)
+
+    # Mevcut son denemeler geçmişin ilk kayıtları olur; daha önce üzerine yazılanlar kurtarılamaz
+    op.execute(
+        "INSERT INTO quiz_attempt_history (user_id, quiz_id, score, attempt_date, answers) "
+        "SELECT user_id, quiz_id, score, COALESCE(attempt_date, CURRENT_TIMESTAMP), answers "
+        "FROM user_quiz_attempt ORDER BY id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempt_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_attempt_history_user_quiz_date')
+        batch_op.drop_index(batch_op.f('ix_quiz_attempt_history_quiz_id'))
+
+    op.drop_table('quiz_attempt_history')
@@ -20,4 +20,4 @@ python3 -m flask create-initial-admin
 
 echo "--- Uygulama başlatılıyor ---"
 # Gunicorn sunucusunu başlatın
-python3 -m gunicorn dersplanlama:app
\ No newline at end of file
+python3 -m gunicorn --config gunicorn.conf.py dersplanlama:app
\ No newline at end of file
@@ -0,0 +1,102 @@
+# Testler uygulamayı geçici bir SQLite veritabanıyla yükler; ayarlar modül içe aktarılmadan
+# önce ortam değişkenleriyle verilir. Arka plan thread'leri ve süreç havuzları kapatılır.
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix='dersplanlama_test_')
+PASSWORD = 'test-sifre'
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'test.db')
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['LOGIN_HASH_WORKERS'] = '0'
+os.environ['DASHBOARD_STATS_REFRESH_SECONDS'] = '0'
+os.environ['ACCOUNT_SWEEP_INTERVAL_SECONDS'] = '0'
+os.environ['SQL_QUERY_BUDGET_STRICT'] = '0'
+os.chdir(WORK_DIR)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import dersplanlama as m  # noqa: E402
+
+
+def _reset_process_caches():
+    # Şema her testte yeniden kurulduğu için sürüm sayaçları baştan başlar; süreç içi önbellekler
+    # önceki testin aynı sürüm numaralı verisini döndürmesin
+    m.catalog_cache._snapshot = None
+    m.catalog_json_cache._version = None
+    m.fragment_cache.clear()
+    m.user_context_cache.invalidate()
+    m.answer_key_cache._entries.clear()
+
+
+@pytest.fixture
+def app():
+    m.app.config.update(TESTING=True, SQL_QUERY_BUDGET_STRICT=False,
+                        UPLOAD_FOLDER=os.path.join(WORK_DIR, 'uploads'))
+    os.makedirs(m.app.config['UPLOAD_FOLDER'], exist_ok=True)
+    with m.app.app_context():
+        m.db.drop_all()
+        m.db.create_all()
+        m.db.session.add_all([
+            m.User(username='admin', password=m.hash_password(PASSWORD), is_admin=True),
+            m.User(username='ogrenci', password=m.hash_password(PASSWORD), is_admin=False),
+        ])
+        m.db.session.commit()
+    _reset_process_caches()
+    yield m.app
+    with m.app.app_context():
+        m.db.session.remove()
+
+
+def login(app, username):
+    client = app.test_client()
+    response = client.post('/', data={'username': username, 'password': PASSWORD})
+    assert response.status_code == 302, f'{username} giriş yapamadı'
+    return client
+
+
+def seed_catalog(dersler=1, konu_per_ders=2, alt_baslik_per_konu=2, questions_per_quiz=2, answers_per_question=3):
+    """Her alt başlığa bir quiz ve bir materyal ekler; uygulama bağlamı içinde çağrılır."""
+    for d in range(dersler):
+        ders = m.Ders(name=f'Ders {d} {os.urandom(3).hex()}')
+        m.db.session.add(ders)
+        for k in range(konu_per_ders):
+            konu = m.Konu(name=f'Konu {k}', ders=ders)
+            m.db.session.add(konu)
+            for a in range(alt_baslik_per_konu):
+                alt_baslik = m.AltBaslik(name=f'Alt Başlık {a}', konu=konu,
+                                         video_link='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+                alt_baslik.quiz = m.Quiz(title=f'Quiz {a}', questions=[
+                    m.Question(question_text=f'Soru {q}', answers=[
+                        m.Answer(answer_text=f'Cevap {c}', is_correct=(c == 0)) for c in range(answers_per_question)
+                    ]) for q in range(questions_per_quiz)
+                ])
+                m.db.session.add(alt_baslik)
+                m.db.session.add(m.Material(alt_baslik=alt_baslik, original_filename='notlar.pdf',
+                                            filename=f'notlar_{d}_{k}_{a}_{os.urandom(4).hex()}.pdf'))
+    # Admin rotalarındaki gibi katalog sürümü artırılır; önbellekteki ağaç geçersiz kalır
+    m.bump_cache_version(m.CATALOG_VERSION_KEY)
+    m.db.session.commit()
+
+
+@contextmanager
+def count_queries():
+    """Blok içinde çalışan SQL ifadelerinin sayısını tek elemanlı bir listede toplar."""
+    count = [0]
+
+    def _count(*args):
+        count[0] += 1
+
+    with m.app.app_context():
+        engine = m.db.engine
+    event.listen(engine, 'before_cursor_execute', _count)
+    try:
+        yield count
+    finally:
+        event.remove(engine, 'before_cursor_execute', _count)
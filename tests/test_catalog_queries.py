@@ -0,0 +1,41 @@
+# Katalog ağacı ve admin paneli, katalog büyüdükçe sabit sayıda sorgu çalıştırmalı (N+1 yok).
+from conftest import count_queries, login, m, seed_catalog
+
+SMALL = dict(dersler=1, konu_per_ders=2, alt_baslik_per_konu=2)
+# Küçük kataloğun 10 katı konu, alt başlık, materyal ve quiz
+LARGE_EXTRA = dict(dersler=9, konu_per_ders=2, alt_baslik_per_konu=2)
+
+
+def _tree_queries():
+    with m.app.app_context():
+        with count_queries() as count:
+            tree = m.load_catalog_tree()
+    return count[0], sum(len(konu.alt_basliklar) for ders in tree for konu in ders.konular)
+
+
+def _admin_panel_queries(client):
+    # Katalog önbelleği sürüm sayacıyla geçersiz kalmıştır; ağaç bu istekte yeniden yüklenir
+    with count_queries() as count:
+        response = client.get('/admin')
+    assert response.status_code == 200
+    return count[0]
+
+
+def test_catalog_query_count_is_constant(app):
+    client = login(app, 'admin')
+    # Katalogdan bağımsız parçalar (duyurular vb.) ilk istekte önbelleğe girer; ölçümler aynı durumda başlasın
+    client.get('/admin')
+
+    with app.app_context():
+        seed_catalog(**SMALL)
+    small_tree_queries, small_alt_basliklar = _tree_queries()
+    small_admin_queries = _admin_panel_queries(client)
+
+    with app.app_context():
+        seed_catalog(**LARGE_EXTRA)
+    large_tree_queries, large_alt_basliklar = _tree_queries()
+    large_admin_queries = _admin_panel_queries(client)
+
+    assert large_alt_basliklar == 10 * small_alt_basliklar
+    assert large_tree_queries == small_tree_queries
+    assert large_admin_queries == small_admin_queries
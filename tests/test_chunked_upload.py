@@ -0,0 +1,66 @@
+# Parçalı yükleme: başarısız bir tekrar deneme daha önce alınmış parçayı bozmamalı ve
+# tamamlanırken bozuk parça yayımlanmamalı.
+import hashlib
+import os
+
+import pytest
+
+from conftest import login, m, seed_catalog
+
+CHUNK_SIZE = m.MATERIAL_CHUNK_SIZE
+
+
+@pytest.fixture
+def upload(app):
+    with app.app_context():
+        seed_catalog(dersler=1, konu_per_ders=1, alt_baslik_per_konu=1)
+        alt_baslik_id = m.AltBaslik.query.first().id
+    client = login(app, 'admin')
+    data = os.urandom(CHUNK_SIZE + CHUNK_SIZE // 2)
+    response = client.post('/admin/uploads', json={'alt_baslik_id': alt_baslik_id, 'filename': 'notlar.pdf',
+                                                   'size': len(data), 'chunk_size': CHUNK_SIZE})
+    assert response.status_code == 201
+    return client, response.get_json()['upload_id'], data
+
+
+def put_chunk(client, upload_id, index, body, sha256=None):
+    return client.put(f'/admin/uploads/{upload_id}/chunks/{index}', data=body,
+                      headers={'X-Chunk-Sha256': sha256 or hashlib.sha256(body).hexdigest()})
+
+
+def chunks(data):
+    return [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+
+@pytest.mark.parametrize('bad_body, status', [
+    (lambda good: b'x' * len(good), 422),   # sağlama toplamı uyuşmuyor
+    (lambda good: b'x' * 100, 400),          # eksik gövde
+], ids=['checksum', 'short-body'])
+def test_failed_retry_keeps_received_chunk(upload, bad_body, status):
+    client, upload_id, data = upload
+    first, second = chunks(data)
+    assert put_chunk(client, upload_id, 0, first).status_code == 200
+    assert put_chunk(client, upload_id, 1, second).status_code == 200
+
+    response = put_chunk(client, upload_id, 0, bad_body(first), sha256=hashlib.sha256(first).hexdigest())
+    assert response.status_code == status
+
+    response = client.post(f'/admin/uploads/{upload_id}/complete')
+    assert response.status_code == 200
+    assert response.get_json()['digest'] == hashlib.sha256(data).hexdigest()
+
+
+def test_complete_rejects_corrupted_staging_file(app, upload):
+    client, upload_id, data = upload
+    for index, body in enumerate(chunks(data)):
+        assert put_chunk(client, upload_id, index, body).status_code == 200
+    with app.app_context():
+        with open(m.upload_staging_path(upload_id), 'r+b') as f:
+            f.seek(CHUNK_SIZE + 10)
+            f.write(b'bozuk')
+
+    response = client.post(f'/admin/uploads/{upload_id}/complete')
+    assert response.status_code == 422
+    assert client.get(f'/admin/uploads/{upload_id}').get_json()['missing'] == [1]
+    with app.app_context():
+        assert m.Material.query.filter(m.Material.blob_digest.isnot(None)).count() == 0
@@ -0,0 +1,63 @@
+# Sıkı modda (SQL_QUERY_BUDGET_STRICT) rota sorgu bütçesini aşan istek hata vermeli.
+import pytest
+
+from conftest import login, m, seed_catalog
+
+
+@pytest.fixture
+def strict_app(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'SQL_QUERY_BUDGET_STRICT', True)
+    with app.app_context():
+        seed_catalog(dersler=2, konu_per_ders=3, alt_baslik_per_konu=3)
+        konu = m.Konu.query.order_by(m.Konu.id).first()
+        # Yanıtlı bir yorum dizisi: yanıtlar ve yazarlar da toplu yüklenir
+        comment = m.Comment(user_id=2, alt_baslik_id=konu.alt_basliklar[0].id, content='Bir sorum var')
+        comment.replies.append(m.Comment(user_id=1, alt_baslik_id=konu.alt_basliklar[0].id, content='Yanıt'))
+        m.db.session.add(comment)
+        m.db.session.commit()
+        panel_url = f'/panel?ders_id={konu.ders_id}&konu_id={konu.id}'
+    return app, panel_url
+
+
+def test_routes_stay_within_budget(strict_app):
+    app, panel_url = strict_app
+    # İlk istekler önbellekleri (katalog, şablon parçaları) soğuk buldukları için en pahalı olanlardır
+    assert login(app, 'ogrenci').get(panel_url).status_code == 200
+    assert login(app, 'admin').get('/admin').status_code == 200
+
+
+@pytest.mark.parametrize('endpoint, username, url', [
+    ('user_panel', 'ogrenci', None),
+    ('admin_panel', 'admin', '/admin'),
+])
+def test_exceeding_budget_fails_request(strict_app, monkeypatch, endpoint, username, url):
+    app, panel_url = strict_app
+    client = login(app, username)
+    monkeypatch.setitem(app.config['SQL_QUERY_BUDGETS'], endpoint, 1)
+    with pytest.raises(m.QueryBudgetExceeded, match=endpoint):
+        client.get(url or panel_url)
+
+
+@pytest.mark.parametrize('question_count', [1, 12])
+def test_add_quiz_statement_count_is_independent_of_questions(strict_app, question_count):
+    app, _ = strict_app
+    with app.app_context():
+        konu = m.Konu.query.first()
+        alt_baslik = m.AltBaslik(name='Quizsiz', konu=konu, video_link='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        m.db.session.add(alt_baslik)
+        # Katalog önbelleği soğuk kalır: istek bütçenin en kötü durumunu ölçer
+        m.bump_cache_version(m.CATALOG_VERSION_KEY)
+        m.db.session.commit()
+        alt_baslik_id = alt_baslik.id
+    form = {'action': 'add_quiz', 'alt_baslik_sec_quiz': alt_baslik_id, 'quiz_title': 'Deneme',
+            'question_text[]': [f'Soru {i}' for i in range(1, question_count + 1)]}
+    for i in range(1, question_count + 1):
+        form[f'answer_text_{i}[]'] = ['A', 'B', 'C', 'D']
+        form[f'correct_answer_{i}'] = '1'
+
+    response = login(app, 'admin').post('/admin', data=form)
+    assert response.status_code == 302
+    with app.app_context():
+        quiz = m.Quiz.query.filter_by(alt_baslik_id=alt_baslik_id).one()
+        assert [q.question_text for q in quiz.questions] == form['question_text[]']
+        assert all(len(q.answers) == 4 for q in quiz.questions)
@@ -0,0 +1,28 @@
+# Sık sorgular, migration'larla kurulmuş şemada indeks kullanmalı. Eksik bir indeks
+# (modelde var, migration'da unutulmuş ya da hiç tanımlanmamış) burada yakalanır.
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+from conftest import REPO_ROOT, WORK_DIR, m
+
+
+@pytest.fixture(scope='module')
+def migrated_connection():
+    database_url = 'sqlite:///' + os.path.join(WORK_DIR, 'migrated.db')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'dersplanlama', 'db', 'upgrade'],
+                   cwd=REPO_ROOT, env=dict(os.environ, DATABASE_URL=database_url),
+                   check=True, capture_output=True)
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+@pytest.mark.parametrize('name, statement', m.hot_query_statements(), ids=[name for name, _ in m.hot_query_statements()])
+def test_hot_query_uses_index(migrated_connection, name, statement):
+    plan, full_scan = m.explain_query_plan(statement, migrated_connection)
+    assert not full_scan, f"{name} tam tablo taraması yapıyor: {' | '.join(plan)}"